@@ -1,5 +1,8 @@
 from .analyzer import AIAnalyzer
+from .cache import LLMResponseCache, llm_cache
+from .prompt_builder import PromptBuilder
+from .providers import GroqProvider, HedgedLLM, LLMProvider, LLMProviderError, LocalProvider
 from .strategy import StrategyGenerator
 from .prompts import ANALYSIS_PROMPT, STRATEGY_PROMPT
 
-__all__ = ["AIAnalyzer", "StrategyGenerator", "ANALYSIS_PROMPT", "STRATEGY_PROMPT"]
+__all__ = ["AIAnalyzer", "LLMResponseCache", "llm_cache", "PromptBuilder", "LLMProvider", "GroqProvider", "LocalProvider", "HedgedLLM", "LLMProviderError", "StrategyGenerator", "ANALYSIS_PROMPT", "STRATEGY_PROMPT"]
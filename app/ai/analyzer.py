@@ -1,130 +1,202 @@
-import json
+import asyncio
 import logging
-import re
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple, Union
+from pydantic import ValidationError
 from app.models import TrendingData, StrategyResponse, TrendItem, ContentRecommendation
 from app.config import settings
-from groq import Groq
-from .prompts import ANALYSIS_PROMPT
+from app.utils.singleflight import SingleFlight
+from groq import AsyncGroq
+from .cache import LLMResponseCache, llm_cache
+from .parser import ParsedJSON, StreamingJSONParser, parse_llm_json
+from .prompt_builder import PromptBuilder
+from .providers import HedgedLLM, create_llm
 
 logger = logging.getLogger(__name__)
 
-# Compile regex for cleaning control characters
-# This regex removes characters with ASCII values from 0 to 31, except for tab, newline, and carriage return.
-CLEAN_JSON_REGEX = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
-
 class AIAnalyzer:
-    def __init__(self):
+    # Identical in-flight prompts share one completion
+    _flight = SingleFlight()
+
+    def __init__(self, cache: LLMResponseCache = None, prompt_builder: PromptBuilder = None, llm: HedgedLLM = None):
+        self.cache = cache or llm_cache
+        self.prompt_builder = prompt_builder or PromptBuilder()
         try:
             # Check if API key exists
             if not settings.GROQ_API_KEY or settings.GROQ_API_KEY == "":
                 logger.error("Groq API key not found in environment variables")
                 raise ValueError("Groq API key is required")
 
-            # Initialize Groq client
-            self.client = Groq(api_key=settings.GROQ_API_KEY)
+            # Async client so completions never block the event loop
+            self.client = AsyncGroq(api_key=settings.GROQ_API_KEY)
+            # AI_MODEL plus AI_FALLBACK_MODELS, hedged on slow completions
+            self.llm = llm or create_llm(self.client)
             self.model = settings.AI_MODEL
             self.max_tokens = settings.MAX_TOKENS
+            self.temperature = 0.7
             logger.info("Groq client initialized successfully")
 
         except Exception as e:
             logger.error(f"Failed to initialize Groq client: {str(e)}")
             raise
 
+    async def close(self):
+        """Release the Groq client's pooled connections"""
+        await self.llm.close()
+        await self.client.close()
+
+    def _prepare(self, trends_data: TrendingData, target_audience: str, niche: str):
+        """Validate input and return (prompt, sampling params, cache key)"""
+        # Log the input data
+        logger.info(f"Analyzing trends for {target_audience} in {niche} niche")
+        logger.info(f"Google trends count: {len(trends_data.google_trends)}")
+        logger.info(f"Reddit trends count: {len(trends_data.reddit_trends)}")
+        logger.info(f"News trends count: {len(trends_data.news_trends or [])}")
+
+        # Check if we have any data to analyze
+        if not trends_data.google_trends and not trends_data.reddit_trends and not trends_data.news_trends:
+            logger.error("No trending data available for analysis")
+            raise ValueError("No trending data available for analysis")
+
+        prompt = self._build_prompt(trends_data, target_audience, niche)
+        params = {"max_tokens": self.max_tokens, "temperature": self.temperature}
+        # Any provider in the chain may answer, so the chain (not just AI_MODEL) is part of the key
+        chain = [provider.name for provider in self.llm.providers]
+        return prompt, params, self.cache.make_key(chain, prompt, params)
+
     async def analyze_trends(self, trends_data: TrendingData, target_audience: str = "Gen Z", niche: str = "General") -> StrategyResponse:
         try:
-            # Log the input data
-            logger.info(f"Analyzing trends for {target_audience} in {niche} niche")
-            logger.info(f"Google trends count: {len(trends_data.google_trends)}")
-            logger.info(f"Reddit trends count: {len(trends_data.reddit_trends)}")
-
-            # Check if we have any data to analyze
-            if not trends_data.google_trends and not trends_data.reddit_trends:
-                logger.error("No trending data available for analysis")
-                raise ValueError("No trending data available for analysis")
-
-            # Prepare prompt for Groq
-            prompt = f"""
-            Analyze these trending topics and create a content strategy:
-
-            GOOGLE TRENDS:
-            {', '.join([t.get('title', t) if isinstance(t, dict) else str(t) for t in trends_data.google_trends[:5]])}
-
-            REDDIT HOT TOPICS:
-            {', '.join([t.get('title', 'Unknown')[:100] for t in trends_data.reddit_trends[:5]])}
-
-            TARGET AUDIENCE: {target_audience}
-            NICHE: {niche}
-
-            Create a JSON response with exactly this structure:
-            {{
-              "top_trends": [
-                {{
-                  "title": "trend name",
-                  "platform": "google_trends or reddit",
-                  "engagement_score": 100,
-                  "url": "https://example.com",
-                  "metadata": {{"analysis": "why this trend works"}}
-                }}
-              ],
-              "content_strategy": [
-                {{
-                  "title": "Engaging Content Title",
-                  "format": "Reel/Short/Post/Story/Carousel",
-                  "platform": "Instagram/TikTok",
-                  "best_time": "7 PM IST",
-                  "hook": "Educational/Challenge/Tips/Tutorial",
-                  "description": "Detailed content description"
-                }}
-              ],
-              "analysis_summary": "Key insights and recommendations based on the trends"
-            }}
-
-            Return ONLY the JSON object, with no additional text or explanations. Do not wrap the JSON in markdown backticks. Ensure the JSON is well-formed.
-            """
-
-            logger.info("Sending request to Groq")
-
-            # Make request to Groq
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=self.max_tokens,
-                temperature=0.7
-            )
-
-            ai_response = response.choices[0].message.content
-            logger.info(f"Received response from Groq: {ai_response[:200]}...")
-
-            # Clean response (remove markdown and extract JSON)
-            clean_response = ai_response.strip().replace('`json', '').replace('`', '')
-
-            # More robust JSON extraction
-            json_start = clean_response.find('{')
-            json_end = clean_response.rfind('}') + 1
-
-            if json_start != -1 and json_end > json_start:
-                json_str = clean_response[json_start:json_end]
-                try:
-                    # Sanitize the JSON string by removing invalid control characters
-                    sanitized_json_str = CLEAN_JSON_REGEX.sub('', json_str)
-                    
-                    # Attempt to fix common JSON errors, like trailing commas
-                    fixed_json_str = re.sub(r",(\s*[\]}])", r"\1", sanitized_json_str)
-                    
-                    parsed_response = json.loads(fixed_json_str)
-                    return StrategyResponse(**parsed_response)
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse Groq JSON: {e}")
-                    logger.error(f"Raw response from Groq: {ai_response}")
-                    logger.error(f"Attempted to clean and parse this JSON string: {fixed_json_str}")
-                    raise ValueError(f"Failed to parse Groq response: {str(e)}")
-            else:
-                logger.error("No valid JSON found in Groq response")
-                logger.error(f"Raw response from Groq: {ai_response}")
-                raise ValueError("No valid JSON found in Groq response")
+            prompt, params, key = self._prepare(trends_data, target_audience, niche)
+
+            cached = await self.cache.get(key)
+            if cached is not None:
+                logger.info("📋 Returning cached Groq analysis")
+                return StrategyResponse(**cached)
+
+            return await self._flight.do(key, lambda: self._generate(prompt, params, key))
 
         except Exception as e:
             logger.error(f"Error in Groq analysis: {str(e)}")
             raise
+
+    async def analyze_batch(
+        self,
+        trends_data: TrendingData,
+        pairs: Sequence[Tuple[str, str]],
+        concurrency: Optional[int] = None,
+    ) -> List[Union[StrategyResponse, Exception]]:
+        """Analyze one snapshot for many (audience, niche) pairs
+
+        Identical pairs are analyzed once and at most `concurrency` completions run at
+        a time. Results follow the input order; a failed pair gets its exception.
+        """
+        semaphore = asyncio.Semaphore(concurrency or settings.BATCH_CONCURRENCY)
+
+        async def run(audience: str, niche: str):
+            async with semaphore:
+                return await self.analyze_trends(trends_data, audience, niche)
+
+        unique: Dict[Tuple[str, str], int] = {}
+        for pair in pairs:
+            unique.setdefault(tuple(pair), len(unique))
+        logger.info(f"Batch analysis: {len(pairs)} pairs, {len(unique)} unique")
+
+        results = await asyncio.gather(*(run(*pair) for pair in unique), return_exceptions=True)
+        return [results[unique[tuple(pair)]] for pair in pairs]
+
+    async def stream_analysis(
+        self, trends_data: TrendingData, target_audience: str = "Gen Z", niche: str = "General"
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Yield ("trend", TrendItem) and ("recommendation", ContentRecommendation) events as
+        the streamed completion produces them, then ("done", StrategyResponse)"""
+        prompt, params, key = self._prepare(trends_data, target_audience, niche)
+
+        cached = await self.cache.get(key)
+        if cached is not None:
+            logger.info("📋 Streaming cached Groq analysis")
+            strategy = StrategyResponse(**cached)
+            for trend in strategy.top_trends:
+                yield "trend", trend
+            for recommendation in strategy.content_strategy:
+                yield "recommendation", recommendation
+            yield "done", strategy
+            return
+
+        logger.info("Streaming request to Groq")
+        parser = StreamingJSONParser()
+        async for _, delta in self.llm.stream(prompt, params):
+            for section, item in parser.feed(delta):
+                event = self._stream_event(section, item)
+                if event is not None:
+                    yield event
+
+        parsed = parser.finish()
+        strategy = self._to_strategy(parsed)
+        if not parsed.truncated:
+            await self.cache.set(key, strategy.model_dump(mode="json"))
+        yield "done", strategy
+
+    @staticmethod
+    def _stream_event(section: str, item: Any) -> Optional[Tuple[str, Any]]:
+        """Validate one streamed array item into its response model"""
+        models = {"top_trends": ("trend", TrendItem), "content_strategy": ("recommendation", ContentRecommendation)}
+        if section not in models or not isinstance(item, dict):
+            return None
+        name, model = models[section]
+        try:
+            return name, model(**item)
+        except ValidationError as e:
+            logger.warning(f"Skipping invalid streamed {name}: {e}")
+            return None
+
+    def _build_prompt(self, trends_data: TrendingData, target_audience: str, niche: str) -> str:
+        """Build the analysis prompt from the highest-value trends that fit the token budget"""
+        return self.prompt_builder.build(trends_data, target_audience, niche).text
+
+    async def _generate(self, prompt: str, params: dict, key: str) -> StrategyResponse:
+        """Run the completion, parse it and cache the parsed strategy"""
+        logger.info("Sending request to Groq")
+
+        # Make request to Groq, hedged across the configured models
+        completion = await self.llm.complete(prompt, params)
+
+        ai_response = completion.text
+        logger.info(f"Received response from {completion.provider}: {ai_response[:200]}...")
+
+        parsed = self._parse_response(ai_response)
+        strategy = self._to_strategy(parsed)
+        if not parsed.truncated:
+            await self.cache.set(key, strategy.model_dump(mode="json"))
+        return strategy
+
+    def _parse_response(self, ai_response: str) -> ParsedJSON:
+        """Extract the strategy JSON from a raw completion, repairing LLM defects"""
+        try:
+            return parse_llm_json(ai_response)
+        except ValueError as e:
+            logger.error(f"Failed to parse Groq JSON: {e}")
+            logger.error(f"Raw response from Groq: {ai_response}")
+            raise ValueError(f"Failed to parse Groq response: {str(e)}")
+
+    def _to_strategy(self, parsed: ParsedJSON) -> StrategyResponse:
+        """Build a StrategyResponse, keeping every valid item of a repaired or truncated response"""
+        data = parsed.value
+        if not isinstance(data, dict):
+            raise ValueError("No valid JSON found in Groq response")
+        if not parsed.repaired:
+            return StrategyResponse(**data)
+
+        top_trends = [e[1] for e in (self._stream_event("top_trends", t) for t in data.get("top_trends") or []) if e]
+        content_strategy = [e[1] for e in (self._stream_event("content_strategy", c) for c in data.get("content_strategy") or []) if e]
+        summary = data.get("analysis_summary")
+        if not top_trends and not content_strategy and not summary:
+            raise ValueError("No usable strategy in Groq response")
+
+        logger.warning(
+            f"Recovered {'truncated' if parsed.truncated else 'malformed'} Groq response: "
+            f"{len(top_trends)} trends, {len(content_strategy)} recommendations"
+        )
+        return StrategyResponse(
+            top_trends=top_trends,
+            content_strategy=content_strategy,
+            analysis_summary=summary if isinstance(summary, str) else "",
+        )
@@ -0,0 +1,88 @@
+from typing import Any, Dict, Optional, Sequence, Union
+import hashlib
+import json
+import logging
+from app.config import settings
+from app.utils.cache import CacheBackend, MemoryCache, SQLiteCache
+
+logger = logging.getLogger(__name__)
+
+class LLMResponseCache:
+    """Content-addressed cache of LLM responses: bounded memory tier plus optional disk tier"""
+
+    def __init__(
+        self,
+        memory: Optional[CacheBackend] = None,
+        disk: Optional[CacheBackend] = None,
+        ttl: Optional[float] = None,
+        enabled: Optional[bool] = None,
+    ):
+        self.memory = memory or MemoryCache("llm", max_entries=settings.LLM_CACHE_MAX_ENTRIES)
+        self.disk = disk
+        self.ttl = ttl if ttl is not None else settings.LLM_CACHE_TTL
+        self.enabled = settings.LLM_CACHE_ENABLED if enabled is None else enabled
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model: Union[str, Sequence[str]], prompt: str, params: Dict[str, Any]) -> str:
+        """Canonical SHA-256 of model (or ordered provider chain), prompt and sampling parameters"""
+        canonical = json.dumps(
+            {"model": model if isinstance(model, str) else list(model), "prompt": prompt, "params": params},
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+
+        value = await self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = await self.disk.get(key)
+            if value is not None:
+                # Promote so the next hit is served from memory
+                self.disk_hits += 1
+                await self.memory.set(key, value, ttl=self.ttl)
+
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Any):
+        if not self.enabled:
+            return
+        await self.memory.set(key, value, ttl=self.ttl)
+        if self.disk is not None:
+            await self.disk.set(key, value, ttl=self.ttl)
+
+    async def clear(self):
+        await self.memory.clear()
+        if self.disk is not None:
+            await self.disk.clear()
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss metrics for both tiers"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "memory": await self.memory.get_stats(),
+            "disk": await self.disk.get_stats() if self.disk is not None else None,
+        }
+
+def create_llm_cache() -> LLMResponseCache:
+    """Build the process-wide LLM cache; the disk tier is enabled by LLM_CACHE_DISK_PATH"""
+    disk = None
+    if settings.LLM_CACHE_DISK_PATH:
+        disk = SQLiteCache("llm", path=settings.LLM_CACHE_DISK_PATH, max_entries=settings.LLM_CACHE_DISK_MAX_ENTRIES)
+    return LLMResponseCache(disk=disk)
+
+llm_cache = create_llm_cache()
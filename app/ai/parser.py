@@ -0,0 +1,287 @@
+from typing import Any, List, NamedTuple, Optional, Tuple
+import json
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Characters the scanner has to look at; everything between them is copied as one slice
+STRUCTURAL_REGEX = re.compile(r'["{}\[\],:\x00-\x08\x0b\x0c\x0e-\x1f]')
+STRING_SPECIAL_REGEX = re.compile(r'["\\]')
+# Group 1 is a run of strings and harmless text, kept by sub(r"\1"); the trailing comma
+# or control character ending the run matches outside it and is dropped. Runs keep the
+# matches (and their template expansions) down to the number of defects.
+QUICK_REPAIR_REGEX = re.compile(
+    r'((?:"[^"\\]*(?:\\.[^"\\]*)*"|[^",\x00-\x08\x0b\x0c\x0e-\x1f]+|,(?!\s*[\]}]))*)'
+    r'(?:,(?=\s*[\]}])|[\x00-\x08\x0b\x0c\x0e-\x1f])?',
+    re.S,
+)
+
+DECODER = json.JSONDecoder(strict=False)  # json.loads(strict=False) builds a new one per call
+
+CLOSERS = {"{": "}", "[": "]"}
+PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+JSON_LITERALS = ("true", "false", "null")
+
+class ParsedJSON(NamedTuple):
+    value: Any
+    truncated: bool  # input ended before the top-level value closed
+    repaired: bool   # defects were fixed along the way
+
+class StreamingJSONParser:
+    """Single-pass, incremental parser/repairer for LLM JSON output
+
+    Feeding chunks returns (key, item) events for every complete object inside a
+    top-level array, e.g. ("top_trends", {...}). Text before the first "{" and
+    after the top-level object closes (prose, markdown fences) is ignored.
+    Defects are repaired while scanning: control characters outside strings,
+    trailing/doubled/missing commas, Python literals, mismatched closers and
+    keys without values. finish() closes a truncated document at the last
+    complete value instead of failing.
+
+    The scan is pure Python, about one step per token, and the repaired text
+    is decoded by json at the end (streamed items also as they close). That
+    is some 30 times slower than json.loads on the same input, so
+    well-formed responses should not come through here (see parse_llm_json).
+    """
+
+    def __init__(self, emit_items: bool = True):
+        self.emit_items = emit_items  # off when only finish()'s value is wanted
+        self._pieces: List[str] = []
+        self._stack: List[str] = []
+        self._tail = ""  # unconsumed text between structural characters
+        self._started = False
+        self._done = False
+        self._in_string = False
+        self._escape = False
+        self._string_is_key = False
+        self._string_start = 0
+        self._expect_value = False
+        self._after_value = False
+        self._after_key = False
+        self._pending_comma = False
+        self._safe: Tuple[int, int] = (0, 0)  # (pieces, depth) at the last complete value
+        self._last_key: Optional[str] = None
+        self._array_key: Optional[str] = None
+        self._item_start: Optional[int] = None
+        self.repaired = False
+
+    @property
+    def text(self) -> str:
+        """The repaired JSON text so far"""
+        return "".join(self._pieces)
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        events = []
+        if self._done:
+            return events
+
+        pos = 0
+        if not self._started:
+            pos = chunk.find("{")
+            if pos == -1:
+                return events
+            self._started = True
+
+        end = len(chunk)
+        copy_from = pos
+        while pos < end:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    pos += 1
+                    continue
+                match = STRING_SPECIAL_REGEX.search(chunk, pos)
+                if match is None:
+                    pos = end
+                    break
+                pos = match.end()
+                if match.group() == "\\":
+                    self._escape = True
+                    continue
+                self._pieces.append(chunk[copy_from:pos])
+                copy_from = pos
+                self._end_string()
+                continue
+
+            match = STRUCTURAL_REGEX.search(chunk, pos)
+            if match is None:
+                break
+            pos = match.start()
+            char = match.group()
+            gap = self._tail + chunk[copy_from:pos] if self._tail else chunk[copy_from:pos]
+            self._tail = ""
+            copy_from = pos + 1
+
+            if char == '"':
+                self._open_value(gap)
+                self._string_is_key = bool(self._stack) and self._stack[-1] == "{" and not self._expect_value
+                self._string_start = len(self._pieces)
+                self._in_string = True
+                copy_from = pos
+            elif char in "{[":
+                self._open_value(gap)
+                self._pieces.append(char)
+                self._stack.append(char)
+                if char == "{" and len(self._stack) == 3 and self._stack[1] == "[" and self._array_key and self.emit_items:
+                    self._item_start = len(self._pieces) - 1
+                elif char == "[" and len(self._stack) == 2:
+                    self._array_key = self._last_key
+                self._expect_value = char == "["
+                self._after_value = False
+                self._mark_safe()
+            elif char in "}]":
+                self._emit_gap(gap, closing=True)
+                self._close(char, events)
+                if self._done:
+                    break
+            elif char == ",":
+                if self._pending_comma and (not gap or gap.isspace()):
+                    self.repaired = True  # doubled comma
+                else:
+                    self._emit_gap(gap, closing=True)
+                    if self._after_value:
+                        self._mark_safe()
+                        self._pending_comma = True
+                        self._after_value = False
+                        self._expect_value = self._stack[-1] == "["
+                    else:
+                        self.repaired = True  # comma with nothing before it
+            elif char == ":":
+                self._emit_gap(gap, closing=True)
+                self._pieces.append(":")
+                self._after_key = False
+                self._expect_value = True
+            else:
+                # Control character outside a string: drop it
+                self.repaired = True
+                self._tail = gap
+            pos += 1
+
+        if not self._done:
+            if self._in_string:
+                self._pieces.append(chunk[copy_from:end])
+            elif copy_from < end:
+                self._tail += chunk[copy_from:end]
+        return events
+
+    def _emit_gap(self, gap: str, closing: bool):
+        """Copy text between structural characters, resolving any pending comma"""
+        has_value = bool(gap) and not gap.isspace()
+        if self._pending_comma:
+            if has_value or not closing:
+                self._pieces.append(",")
+            else:
+                self.repaired = True  # trailing or doubled comma
+            self._pending_comma = False
+        if has_value:
+            token = gap.strip()
+            if token in PYTHON_LITERALS:
+                gap = PYTHON_LITERALS[token]
+                self.repaired = True
+            self._pieces.append(gap)
+            self._after_value = True
+            self._expect_value = False
+
+    def _open_value(self, gap: str):
+        self._emit_gap(gap, closing=False)
+        if self._after_value:
+            self._pieces.append(",")  # missing comma between values
+            self.repaired = True
+            self._after_value = False
+
+    def _end_string(self):
+        self._in_string = False
+        if self._string_is_key:
+            self._after_key = True
+            if len(self._stack) == 1:
+                self._last_key = DECODER.decode("".join(self._pieces[self._string_start:]))
+        else:
+            self._value_done()
+
+    def _value_done(self):
+        self._after_value = True
+        self._expect_value = False
+        self._mark_safe()
+
+    def _mark_safe(self):
+        self._safe = (len(self._pieces), len(self._stack))
+
+    def _close(self, char: str, events: List[Tuple[str, Any]]):
+        if not self._stack:
+            self.repaired = True
+            return
+        expected = CLOSERS[self._stack[-1]]
+        if char != expected:
+            self.repaired = True
+            char = expected
+        if self._after_key or (expected == "}" and self._expect_value):
+            # Key without a value
+            self._pieces.append("null" if self._expect_value else ":null")
+            self._after_key = False
+            self.repaired = True
+
+        self._pieces.append(char)
+        self._stack.pop()
+        if len(self._stack) == 2 and self._item_start is not None:
+            try:
+                events.append((self._array_key, DECODER.decode("".join(self._pieces[self._item_start:]))))
+            except json.JSONDecodeError as e:
+                logger.warning(f"Skipping malformed streamed item: {e}")
+            self._item_start = None
+        elif len(self._stack) == 1 and char == "]":
+            self._array_key = None
+
+        self._value_done()
+        self._done = not self._stack
+
+    def finish(self) -> ParsedJSON:
+        """Close the document (repairing truncation) and decode it"""
+        if not self._started:
+            raise ValueError("No JSON object found in response")
+
+        truncated = not self._done
+        if truncated:
+            tail = self._tail.strip()
+            if not self._in_string and not self._after_key and tail in JSON_LITERALS:
+                self._emit_gap(tail, closing=False)
+                self._mark_safe()
+            # Roll back to the last complete value; partial strings/numbers are not trusted
+            pieces, depth = self._safe
+            del self._pieces[pieces:]
+            for opener in reversed(self._stack[:depth]):
+                self._pieces.append(CLOSERS[opener])
+            self._stack = []
+            self._done = True
+
+        try:
+            value = DECODER.decode("".join(self._pieces))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Unrecoverable JSON in response: {e}")
+        return ParsedJSON(value, truncated, self.repaired or truncated)
+
+def parse_llm_json(text: str) -> ParsedJSON:
+    """Parse a complete LLM response, repairing common defects
+
+    Well-formed output costs one slice and one json.loads. The usual defects
+    (prose or fences around the object, trailing commas, stray control
+    characters) cost one regex substitution and a second json.loads. Only
+    truncated or structurally broken output reaches the repairing parser,
+    some 30 times slower, which then skips decoding items it would throw away.
+    """
+    start = text.find("{")
+    end = text.rfind("}")
+    if start != -1 and end > start:
+        candidate = text[start:end + 1]
+        try:
+            return ParsedJSON(DECODER.decode(candidate), False, False)
+        except json.JSONDecodeError:
+            pass
+        try:
+            return ParsedJSON(DECODER.decode(QUICK_REPAIR_REGEX.sub(r"\1", candidate)), False, True)
+        except json.JSONDecodeError:
+            pass
+
+    parser = StreamingJSONParser(emit_items=False)
+    parser.feed(text)
+    return parser.finish()
@@ -0,0 +1,130 @@
+from typing import Any, Dict, List, NamedTuple, Optional
+import logging
+import re
+from app.analytics.clustering import TrendClusterer
+from app.analytics.scoring import EngagementScorer, engagement_scorer
+from app.config import settings
+from app.models import TrendingData
+from app.utils.helper import truncate_text
+from .prompts import ANALYSIS_PROMPT
+
+logger = logging.getLogger(__name__)
+
+# Rough BPE approximation: words split into 4-character pieces, punctuation counts alone
+TOKEN_REGEX = re.compile(r"\w{1,4}|[^\w\s]")
+WHITESPACE_REGEX = re.compile(r"\s+")
+
+SOURCES = {"google_trends": "google_trends", "reddit_trends": "reddit", "news_trends": "news"}
+TITLE_MAX_LENGTH = 100
+SAFETY_MARGIN_TOKENS = 64  # slack for the estimate and the chat message framing
+
+def estimate_tokens(text: str) -> int:
+    """Estimate how many tokens a text costs without a model tokenizer"""
+    return len(TOKEN_REGEX.findall(text))
+
+def compact_prompt(text: str) -> str:
+    """Strip indentation and blank lines, which are sent (and billed) as tokens"""
+    return "\n".join(line.strip() for line in text.strip().splitlines() if line.strip())
+
+class BuiltPrompt(NamedTuple):
+    text: str
+    tokens: int    # estimated
+    included: int  # trends packed into the prompt
+    dropped: int   # candidates left out by the budget
+
+class PromptBuilder:
+    """Pack the most engaging trends from every source into a token budget"""
+
+    def __init__(
+        self,
+        template: str = ANALYSIS_PROMPT,
+        context_window: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+        trend_tokens: Optional[int] = None,
+        clusterer: Optional[TrendClusterer] = None,
+        scorer: Optional[EngagementScorer] = None,
+    ):
+        self.template = compact_prompt(template)
+        self.context_window = context_window or settings.MODEL_CONTEXT_WINDOW
+        self.max_tokens = max_tokens or settings.MAX_TOKENS
+        self.trend_tokens = trend_tokens or settings.PROMPT_TREND_TOKENS
+        self.scorer = scorer or engagement_scorer
+        self.clusterer = clusterer or (TrendClusterer() if settings.TREND_CLUSTER_ENABLED else None)
+
+    def rank(self, trends_data: TrendingData) -> List[Dict[str, Any]]:
+        """Candidates from all sources, best first, with a comparable 0-1 "weight"
+
+        Weights come from the batch EngagementScorer: features are robust-z-scored
+        within each platform, so a typical Reddit post and a typical Google search
+        weigh about the same despite their raw scales; snapshots built by the
+        collector manager carry them already as "score". Near-duplicate stories
+        are then merged into one candidate per cluster.
+        """
+        candidates = []
+        for field, platform in SOURCES.items():
+            candidates.extend(
+                {**t, "platform": t.get("platform") or platform}
+                for t in getattr(trends_data, field) or [] if isinstance(t, dict) and t.get("title")
+            )
+        # Published snapshots are already scored (and corroboration-boosted) as a whole
+        weights = [t.get("score") for t in candidates]
+        if any(w is None for w in weights):
+            weights = self.scorer.score(candidates)
+        for item, weight in zip(candidates, weights):
+            item["weight"] = float(weight)
+
+        # Title breaks ties so the prompt (and its cache key) ignores arrival order
+        candidates.sort(key=lambda t: (-t["weight"], str(t["title"])))
+
+        if self.clusterer is not None:
+            # One line per story: near-duplicates across platforms merge, their weights combined
+            merged = [
+                {**trend.model_dump(), "weight": trend.metadata["weight"]}
+                for trend in self.clusterer.merge(candidates)
+            ]
+            merged.sort(key=lambda t: (-t["weight"], str(t["title"])))
+            return merged
+
+        seen, ranked = set(), []
+        for item in candidates:
+            key = WHITESPACE_REGEX.sub(" ", str(item["title"])).strip().lower()
+            if key not in seen:
+                seen.add(key)
+                ranked.append(item)
+        return ranked
+
+    @staticmethod
+    def format_trend(item: Dict[str, Any]) -> str:
+        title = truncate_text(WHITESPACE_REGEX.sub(" ", str(item["title"])).strip(), TITLE_MAX_LENGTH)
+        platforms = (item.get("metadata") or {}).get("platforms") or [item["platform"]]
+        return f"- {title} ({'+'.join(platforms)}, {item['weight']:.2f})"
+
+    def budget(self, target_audience: str, niche: str) -> int:
+        """Tokens left for trend lines once the template and the completion are reserved"""
+        fixed = estimate_tokens(self.template.format(trends_data="", target_audience=target_audience, niche=niche))
+        available = self.context_window - self.max_tokens - fixed - SAFETY_MARGIN_TOKENS
+        return min(available, self.trend_tokens)
+
+    def build(self, trends_data: TrendingData, target_audience: str, niche: str) -> BuiltPrompt:
+        ranked = self.rank(trends_data)
+        budget = self.budget(target_audience, niche)
+
+        lines, used = [], 0
+        for item in ranked:
+            line = self.format_trend(item)
+            cost = estimate_tokens(line)
+            # Greedy by value: a long line that does not fit may leave room for a shorter one
+            if used + cost <= budget:
+                lines.append(line)
+                used += cost
+
+        if ranked and not lines:
+            raise ValueError(f"Prompt budget of {budget} tokens cannot fit any trend")
+
+        text = self.template.format(trends_data="\n".join(lines), target_audience=target_audience, niche=niche)
+        prompt = BuiltPrompt(text, estimate_tokens(text), len(lines), len(ranked) - len(lines))
+        logger.info(
+            f"Built prompt: ~{prompt.tokens} tokens, {prompt.included} trends packed, "
+            f"{prompt.dropped} dropped by the budget"
+        )
+        return prompt
@@ -1,7 +1,7 @@
 ANALYSIS_PROMPT = """
 Analyze these trending topics and generate a content strategy:
 
-TRENDING DATA:
+TRENDING DATA (title, source, engagement normalized 0-1 across sources):
 {trends_data}
 
 TARGET AUDIENCE: {target_audience}
@@ -35,6 +35,7 @@ Return ONLY valid JSON with this structure:
   ],
   "analysis_summary": "key insights and patterns identified"
 }}
+Return ONLY the JSON object, with no additional text or explanations. Do not wrap the JSON in markdown backticks.
 """
 
 STRATEGY_PROMPT = """
@@ -0,0 +1,274 @@
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
+import asyncio
+import logging
+import time
+import groq
+from app.config import settings
+from app.utils.exceptions import AIAnalysisError, RateLimitError
+from app.utils.rate_limit import RateLimiter, get_rate_limiter, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+class LLMProviderError(AIAnalysisError):
+    """Raised when every provider in the chain failed"""
+    def __init__(self, errors: List[Tuple[str, BaseException]]):
+        self.errors = errors
+        details = "; ".join(f"{name}: {error}" for name, error in errors)
+        super().__init__(f"all LLM providers failed ({details})", details)
+
+class Completion(NamedTuple):
+    text: str
+    provider: str
+
+class LatencyTracker:
+    """Rolling window of completion latencies (seconds)"""
+
+    def __init__(self, window: Optional[int] = None):
+        self.samples = deque(maxlen=window or settings.LLM_LATENCY_WINDOW)
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+class LLMProvider(ABC):
+    """One model behind a chat-completion API"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latency = LatencyTracker()
+        self.calls = 0
+        self.errors = 0
+
+    @abstractmethod
+    async def complete(self, prompt: str, params: Dict[str, Any]) -> str:
+        pass
+
+    @abstractmethod
+    def stream(self, prompt: str, params: Dict[str, Any]) -> AsyncIterator[str]:
+        """Yield text deltas of a streamed completion"""
+        pass
+
+    async def close(self):
+        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        p50, p95 = self.latency.percentile(50), self.latency.percentile(95)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+class GroqProvider(LLMProvider):
+    """A Groq model; providers for different models can share one AsyncGroq client"""
+
+    def __init__(self, client, model: str, limiter: Optional[RateLimiter] = None):
+        super().__init__(f"groq:{model}")
+        self.client = client
+        self.model = model
+        # Groq limits each model separately
+        self.limiter = limiter or get_rate_limiter(self.name)
+
+    async def _create(self, prompt: str, params: Dict[str, Any], **extra):
+        await self.limiter.acquire(max_wait=settings.RATE_LIMIT_MAX_WAIT)
+        try:
+            response = await self.client.chat.completions.create(
+                model=self.model, messages=[{"role": "user", "content": prompt}], **params, **extra
+            )
+        except groq.RateLimitError as e:
+            delay = self.limiter.penalize(parse_retry_after(e.response.headers.get("retry-after")))
+            raise RateLimitError(self.name, retry_after=round(delay)) from e
+        self.limiter.record_success()
+        return response
+
+    async def complete(self, prompt: str, params: Dict[str, Any]) -> str:
+        response = await self._create(prompt, params)
+        return response.choices[0].message.content
+
+    async def stream(self, prompt: str, params: Dict[str, Any]) -> AsyncIterator[str]:
+        stream = await self._create(prompt, params, stream=True)
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+
+class LocalProvider(LLMProvider):
+    """Offline stand-in returning a canned response after a delay, or raising an error"""
+
+    def __init__(self, name: str = "local", response: str = "", delay: float = 0.0,
+                 error: Optional[BaseException] = None, chunk_size: int = 16):
+        super().__init__(name)
+        self.response = response
+        self.delay = delay
+        self.error = error
+        self.chunk_size = chunk_size
+
+    async def complete(self, prompt: str, params: Dict[str, Any]) -> str:
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+    async def stream(self, prompt: str, params: Dict[str, Any]) -> AsyncIterator[str]:
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        for i in range(0, len(self.response), self.chunk_size):
+            await asyncio.sleep(0)
+            yield self.response[i:i + self.chunk_size]
+
+class HedgedLLM:
+    """Run completions over an ordered chain of providers
+
+    If the running request has not answered within its provider's latency
+    percentile, a hedge starts on the next provider; the first success wins and
+    the rest are cancelled. A failed request hands over to the next provider
+    straight away.
+    """
+
+    def __init__(
+        self,
+        providers: List[LLMProvider],
+        hedge: Optional[bool] = None,
+        percentile: Optional[float] = None,
+        min_samples: Optional[int] = None,
+        default_delay: Optional[float] = None,
+        min_delay: Optional[float] = None,
+    ):
+        if not providers:
+            raise ValueError("At least one LLM provider is required")
+        self.providers = providers
+        self.hedge = settings.LLM_HEDGE_ENABLED if hedge is None else hedge
+        self.percentile = percentile or settings.LLM_HEDGE_PERCENTILE
+        self.min_samples = settings.LLM_HEDGE_MIN_SAMPLES if min_samples is None else min_samples
+        self.default_delay = default_delay or settings.LLM_HEDGE_DEFAULT_DELAY
+        self.min_delay = settings.LLM_HEDGE_MIN_DELAY if min_delay is None else min_delay
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.fallbacks = 0
+
+    @property
+    def primary(self) -> LLMProvider:
+        return self.providers[0]
+
+    def hedge_delay(self, provider: LLMProvider) -> float:
+        """How long to wait on a provider before hedging; its percentile once enough samples exist"""
+        if len(provider.latency.samples) < self.min_samples:
+            return self.default_delay
+        return max(provider.latency.percentile(self.percentile), self.min_delay)
+
+    async def _timed(self, provider: LLMProvider, prompt: str, params: Dict[str, Any]) -> str:
+        provider.calls += 1
+        started = time.monotonic()
+        try:
+            text = await provider.complete(prompt, params)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            provider.errors += 1
+            raise
+        # Only successes are recorded: failures return early and would drag the percentile down
+        provider.latency.record(time.monotonic() - started)
+        return text
+
+    async def complete(self, prompt: str, params: Dict[str, Any]) -> Completion:
+        chain = iter(self.providers)
+        pending: Dict[asyncio.Future, LLMProvider] = {}
+        errors: List[Tuple[str, BaseException]] = []
+        hedged = set()
+
+        def launch() -> Optional[asyncio.Future]:
+            provider = next(chain, None)
+            if provider is None:
+                return None
+            task = asyncio.ensure_future(self._timed(provider, prompt, params))
+            pending[task] = provider
+            return task
+
+        latest = launch()
+        try:
+            while pending:
+                can_hedge = self.hedge and len(pending) + len(errors) < len(self.providers)
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=self.hedge_delay(pending[latest]) if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+
+                if not done:
+                    logger.info(f"⏰ {pending[latest].name} slower than its p{self.percentile:g}, hedging")
+                    latest = launch()
+                    hedged.add(latest)
+                    self.hedges += 1
+                    continue
+
+                for task in done:
+                    provider = pending.pop(task)
+                    if task.exception() is None:
+                        if task in hedged:
+                            self.hedge_wins += 1
+                        if provider is not self.primary:
+                            logger.info(f"✅ Completion served by {provider.name}")
+                        return Completion(task.result(), provider.name)
+                    errors.append((provider.name, task.exception()))
+                    logger.warning(f"❌ {provider.name} failed: {task.exception()}")
+
+                    # Each failure is replaced by the next provider in the chain
+                    replacement = launch()
+                    if replacement is not None:
+                        latest = replacement
+                        self.fallbacks += 1
+                        logger.info(f"🔄 Falling back to {pending[latest].name}")
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise LLMProviderError(errors)
+
+    async def stream(self, prompt: str, params: Dict[str, Any]) -> AsyncIterator[Tuple[str, str]]:
+        """Yield (provider, delta); falls back only while no text has been sent yet"""
+        errors: List[Tuple[str, BaseException]] = []
+        for provider in self.providers:
+            provider.calls += 1
+            started = time.monotonic()
+            sent = False
+            try:
+                async for delta in provider.stream(prompt, params):
+                    sent = True
+                    yield provider.name, delta
+            except Exception as e:
+                provider.errors += 1
+                if sent:
+                    raise
+                errors.append((provider.name, e))
+                logger.warning(f"❌ {provider.name} stream failed: {e}")
+                continue
+            provider.latency.record(time.monotonic() - started)
+            return
+        raise LLMProviderError(errors)
+
+    async def close(self):
+        for provider in self.providers:
+            await provider.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "hedging": self.hedge,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "fallbacks": self.fallbacks,
+            "providers": {p.name: {**p.get_stats(), "hedge_delay_s": round(self.hedge_delay(p), 3)} for p in self.providers},
+        }
+
+def create_llm(client) -> HedgedLLM:
+    """Groq providers for AI_MODEL followed by AI_FALLBACK_MODELS, sharing one client"""
+    models = [settings.AI_MODEL] + [m for m in settings.AI_FALLBACK_MODELS if m != settings.AI_MODEL]
+    return HedgedLLM([GroqProvider(client, model) for model in models])
@@ -0,0 +1,18 @@
+from .velocity import VelocityEngine, velocity_engine
+from .clustering import MinHashLSH, TrendClusterer
+from .scoring import EngagementScorer, engagement_scorer
+from .top_k import TopKIndex, top_k_index
+from .search import TrendSearchIndex, trend_search_index
+
+__all__ = [
+    "VelocityEngine",
+    "velocity_engine",
+    "MinHashLSH",
+    "TrendClusterer",
+    "EngagementScorer",
+    "engagement_scorer",
+    "TopKIndex",
+    "top_k_index",
+    "TrendSearchIndex",
+    "trend_search_index"
+]
@@ -0,0 +1,169 @@
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+import logging
+import math
+import zlib
+import numpy as np
+from app.config import settings
+from app.models import TrendItem
+from app.utils.helper import STOP_WORDS, clean_text
+
+logger = logging.getLogger(__name__)
+
+STEM_LENGTH = 5  # crude stemming: "released" and "releases" both shingle as "relea"
+
+def shingles(title: str) -> Set[str]:
+    """Word shingles of a cleaned title, stop words dropped and words cut to STEM_LENGTH
+
+    Word shingles rather than character n-grams: short queries such as
+    "iphone 15" and "iphone 16" share most of their characters but are
+    different trends.
+    """
+    return {word[:STEM_LENGTH] for word in clean_text(title).lower().split() if word not in STOP_WORDS}
+
+class MinHashLSH:
+    """MinHash signatures and LSH banding over sets of shingles
+
+    Signatures are computed for all items at once (one vectorized pass per
+    permutation); items sharing any band become candidates, and candidates
+    whose signatures agree on at least `threshold` of the permutations are
+    grouped. Cost is near-linear in the number of items.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, threshold: float = 0.5, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hashing: odd 64-bit multipliers, top 32 bits of a*x + b (mod 2^64)
+        self.a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+
+    def signatures(self, shingle_sets: Sequence[Set[str]]) -> np.ndarray:
+        """(items x num_perm) signatures; every set must be non-empty"""
+        sizes = np.fromiter((len(s) for s in shingle_sets), dtype=np.int64, count=len(shingle_sets))
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode()) for s in shingle_sets for shingle in s),
+            dtype=np.uint64,
+            count=int(sizes.sum()),
+        )
+        starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        signatures = np.empty((len(shingle_sets), self.num_perm), dtype=np.uint64)
+        for p in range(self.num_perm):
+            signatures[:, p] = np.minimum.reduceat((self.a[p] * hashes + self.b[p]) >> np.uint64(32), starts)
+        return signatures
+
+    def groups(self, signatures: np.ndarray) -> List[List[int]]:
+        """Indices of near-duplicate items grouped together, each group in index order"""
+        n = len(signatures)
+        parent = list(range(n))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for band in range(self.bands):
+            block = signatures[:, band * self.rows:(band + 1) * self.rows]
+            _, bucket = np.unique(block, axis=0, return_inverse=True)
+            bucket = bucket.reshape(-1)
+            order = np.argsort(bucket, kind="stable")
+            same = bucket[order][1:] == bucket[order][:-1]
+            for i, j in zip(order[:-1][same].tolist(), order[1:][same].tolist()):
+                root_i, root_j = find(i), find(j)
+                if root_i != root_j and np.mean(signatures[i] == signatures[j]) >= self.threshold:
+                    parent[max(root_i, root_j)] = min(root_i, root_j)
+
+        grouped: Dict[int, List[int]] = {}
+        for i in range(n):
+            grouped.setdefault(find(i), []).append(i)
+        return list(grouped.values())
+
+class TrendClusterer:
+    """Merge the same story seen on several platforms into one TrendItem"""
+
+    def __init__(self, num_perm: Optional[int] = None, bands: Optional[int] = None, threshold: Optional[float] = None):
+        self.lsh = MinHashLSH(
+            num_perm=num_perm or settings.TREND_CLUSTER_NUM_PERM,
+            bands=bands or settings.TREND_CLUSTER_BANDS,
+            threshold=threshold or settings.TREND_CLUSTER_THRESHOLD,
+        )
+
+    def _groups(self, items: List[Dict[str, Any]]) -> List[List[int]]:
+        """Index groups of near-duplicate items, ordered by their first member"""
+        sets = [shingles(str(item.get("title") or "")) for item in items]
+        hashed = [i for i, s in enumerate(sets) if s]
+        groups = self.lsh.groups(self.lsh.signatures([sets[i] for i in hashed])) if hashed else []
+        clusters = [[hashed[i] for i in group] for group in groups]
+        # Titles with nothing to shingle (all stop words) stand alone
+        clusters += [[i] for i, s in enumerate(sets) if not s]
+        clusters.sort(key=lambda group: group[0])
+        return clusters
+
+    def cluster(self, items: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Groups of near-duplicate items, ordered by their first member; input order is kept within a group"""
+        return [[items[i] for i in group] for group in self._groups(items)]
+
+    def merge(self, items: List[Dict[str, Any]]) -> List[TrendItem]:
+        """One TrendItem per cluster; pass items best first, since the first member leads"""
+        return [self.merge_cluster(members) for members in self.cluster(items)]
+
+    def dedupe(self, items: List[Dict[str, Any]]) -> List[Tuple[int, Dict[str, Any]]]:
+        """(position, item) for each cluster's best-scored member, in input order
+
+        Each cluster is folded into that member: it gains the cluster metadata,
+        and its "score" (when the members have one) is raised by corroboration
+        the way merge combines weights.
+        """
+        kept = {}
+        for group in self._groups(items):
+            lead = max(group, key=lambda i: items[i].get("score") or 0)  # first of equals
+            kept[lead] = group
+        return [
+            (lead, self.fold(items[lead], [items[i] for i in group]) if len(group) > 1 else items[lead])
+            for lead, group in sorted(kept.items())
+        ]
+
+    @staticmethod
+    def cluster_metadata(lead: Dict[str, Any], members: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Lead metadata plus cluster_size, platforms and related_titles; members already folded count in full"""
+        platforms, related, size = set(), [], 0
+        for member in members:
+            metadata = member.get("metadata") or {}
+            platforms.update(metadata.get("platforms") or [member.get("platform") or "unknown"])
+            if member is not lead:
+                related.append(member["title"])
+            related.extend(metadata.get("related_titles") or [])
+            size += metadata.get("cluster_size") or 1
+        return {
+            **(lead.get("metadata") or {}),
+            "cluster_size": size,
+            "platforms": sorted(platforms),
+            "related_titles": related,
+        }
+
+    @classmethod
+    def fold(cls, lead: Dict[str, Any], members: List[Dict[str, Any]]) -> Dict[str, Any]:
+        folded = {**lead, "metadata": cls.cluster_metadata(lead, members)}
+        if all(m.get("score") is not None for m in members):
+            folded["score"] = round(1 - math.prod(1 - m["score"] for m in members), 4)
+        return folded
+
+    @classmethod
+    def merge_cluster(cls, members: List[Dict[str, Any]]) -> TrendItem:
+        lead = members[0]
+        scores = [m["engagement_score"] for m in members if m.get("engagement_score") is not None]
+        metadata = cls.cluster_metadata(lead, members)
+        if any("weight" in m for m in members):
+            # Corroboration raises the weight but keeps it within 0-1
+            metadata["weight"] = 1 - math.prod(1 - m.get("weight", 0.0) for m in members)
+        return TrendItem(
+            title=lead["title"],
+            platform=lead.get("platform") or metadata["platforms"][0],
+            engagement_score=int(sum(scores)) if scores else None,
+            url=lead.get("url"),
+            metadata=metadata,
+        )
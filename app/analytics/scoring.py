@@ -0,0 +1,88 @@
+from typing import Any, Dict, List, Mapping, Optional
+import logging
+import numpy as np
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+MAD_SCALE = 1.4826       # MAD of a normal distribution is 0.6745 sigma
+MEAN_AD_SCALE = 1.2533   # same for the mean absolute deviation, used when the MAD is 0
+LOGISTIC_SCALE = 1.702   # logistic(1.702 z) is within 0.01 of the normal CDF
+
+def robust_z(values: np.ndarray) -> np.ndarray:
+    """(x - median) / scaled MAD, ignoring NaNs; NaNs and constant columns score 0"""
+    z = np.zeros(len(values))
+    present = ~np.isnan(values)
+    if present.sum() < 2:
+        return z
+    x = values[present]
+    median = np.median(x)
+    deviation = np.abs(x - median)
+    spread = MAD_SCALE * np.median(deviation)
+    if spread == 0:
+        spread = MEAN_AD_SCALE * deviation.mean()
+    if spread > 0:
+        z[present] = (x - median) / spread
+    return z
+
+class EngagementScorer:
+    """One comparable 0-1 score for items from every platform, computed in batch
+
+    Each platform's features (log engagement, log comments, upvote ratio and
+    position in its list) are robust-z-scored within that platform, combined
+    with ENGAGEMENT_FEATURE_WEIGHTS and mapped through an approximate normal
+    CDF, so 0.5 is a typical item for its platform whatever its raw scale.
+    """
+
+    FEATURES = ("engagement", "comments", "upvote_ratio", "rank")
+
+    def __init__(self, weights: Optional[Mapping[str, Mapping[str, float]]] = None):
+        self.weights = weights or settings.ENGAGEMENT_FEATURE_WEIGHTS
+
+    def score_columns(self, platforms: np.ndarray, columns: Mapping[str, np.ndarray]) -> np.ndarray:
+        """Scores for columnar data: `platforms` plus one float array per feature (NaN = missing)"""
+        z = np.zeros(len(platforms))
+        names, groups = np.unique(platforms, return_inverse=True)
+        groups = groups.reshape(-1)
+        for code, platform in enumerate(names):
+            members = np.flatnonzero(groups == code)
+            weights = self.weights.get(platform) or self.weights.get("*", {})
+            for feature, weight in weights.items():
+                if weight and feature in columns:
+                    z[members] += weight * robust_z(columns[feature][members])
+        return 1.0 / (1.0 + np.exp(-LOGISTIC_SCALE * z))
+
+    def columns(self, items: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        """Item dicts to feature columns; rank is the 1-based position within the item's platform"""
+        n = len(items)
+        engagement, comments, ratio, rank = (np.full(n, np.nan) for _ in self.FEATURES)
+        positions: Dict[str, int] = {}
+        for i, item in enumerate(items):
+            platform = item.get("platform") or ""
+            positions[platform] = positions.get(platform, 0) + 1
+            rank[i] = -positions[platform]  # higher is better, like the other features
+            metadata = item.get("metadata") or {}
+            if item.get("engagement_score") is not None:
+                engagement[i] = max(item["engagement_score"], 0)
+            if metadata.get("comments") is not None:
+                comments[i] = max(metadata["comments"], 0)
+            if metadata.get("upvote_ratio") is not None:
+                ratio[i] = metadata["upvote_ratio"]
+        return {
+            "engagement": np.log1p(engagement),
+            "comments": np.log1p(comments),
+            "upvote_ratio": ratio,
+            "rank": rank,
+        }
+
+    def score(self, items: List[Dict[str, Any]]) -> np.ndarray:
+        if not items:
+            return np.zeros(0)
+        platforms = np.array([item.get("platform") or "" for item in items])
+        return self.score_columns(platforms, self.columns(items))
+
+    def annotate(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Copies of the items with their comparable "score" added"""
+        return [{**item, "score": round(float(s), 4)} for item, s in zip(items, self.score(items))]
+
+engagement_scorer = EngagementScorer()
@@ -0,0 +1,242 @@
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import math
+import time
+import numpy as np
+from app.config import settings
+from app.models import TRENDING_FIELDS, TrendingData
+from app.utils.helper import extract_keywords_batch, normalize_title
+
+logger = logging.getLogger(__name__)
+
+MIN_TERM_LENGTH = 2  # keeps "ai", "uk", "5g"
+TITLE_BOOST = 2      # a title word counts as this many metadata words
+UNINDEXED_METADATA = frozenset({"published", "url", "permalink", "thumbnail"})
+
+Key = Tuple[str, str]  # (platform, normalized title)
+
+def metadata_text(item: Dict[str, Any]) -> str:
+    """The searchable text of an item's metadata: its string values and lists of strings"""
+    parts = []
+    for name, value in (item.get("metadata") or {}).items():
+        if name in UNINDEXED_METADATA:
+            continue
+        if isinstance(value, str):
+            parts.append(value)
+        elif isinstance(value, (list, tuple)):
+            parts.extend(v for v in value if isinstance(v, str))
+    return " ".join(parts)
+
+class TrendSearchIndex:
+    """BM25 search over every collected trend's title and metadata, updated incrementally
+
+    Documents are keyed by (platform, normalized title) like the top-K index,
+    so a trend seen again replaces its earlier document, and one whose text
+    has not changed leaves the postings alone. Postings are term -> {doc: tf}
+    dicts, cheap to update a document at a time; a query turns its terms'
+    postings into arrays of BM25 term-frequency factors (cached until the
+    term's postings or the average document length change, i.e. until the
+    next refresh) and combines them vectorized, so its cost follows the
+    query terms' postings rather than the size of the index.
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, max_docs: Optional[int] = None):
+        self.max_docs = max_docs or settings.TREND_SEARCH_MAX_DOCS
+        self.keys: Dict[Key, int] = {}
+        self.docs: List[Optional[Dict[str, Any]]] = []
+        self.free: List[int] = []  # slots of removed documents, reused first
+        self.lengths = np.zeros(1024, dtype=np.float64)
+        self.platforms = np.full(1024, -1, dtype=np.int32)
+        self.platform_codes: Dict[str, int] = {}
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray, float]] = {}
+        self._observed: Dict[str, Any] = {}  # source -> refreshed_at last indexed
+        self.total_length = 0.0
+        self.updates = 0
+        self.evicted = 0
+
+    def add(self, items: List[Dict[str, Any]], at: Optional[float] = None) -> int:
+        """Index or re-index items observed at `at` (unix time, default now); returns the documents changed"""
+        at = at if at is not None else time.time()
+        titles = extract_keywords_batch((str(item.get("title") or "") for item in items), min_length=MIN_TERM_LENGTH)
+        metadata = extract_keywords_batch((metadata_text(item) for item in items), min_length=MIN_TERM_LENGTH)
+        changed = sum(
+            self._upsert(item, Counter(title_terms * TITLE_BOOST + metadata_terms), at)
+            for item, title_terms, metadata_terms in zip(items, titles, metadata)
+        )
+        if len(self.keys) > self.max_docs:
+            self._evict()
+        return changed
+
+    def observe(self, snapshot: TrendingData):
+        """Index the items of the snapshot's freshly collected sources"""
+        sources = snapshot.sources or {}
+        items = []
+        for source, field in TRENDING_FIELDS.items():
+            status = sources.get(source, {})
+            if status.get("stale"):
+                continue
+            refreshed_at = status.get("refreshed_at")
+            if refreshed_at is not None:
+                if self._observed.get(source) == refreshed_at:
+                    continue  # republished after another source's refresh; not seen again
+                self._observed[source] = refreshed_at
+            items.extend(getattr(snapshot, field) or [])
+        changed = self.add(items, snapshot.timestamp.timestamp())
+        logger.debug(f"🔎 Search index updated {changed} of {len(items)} trends")
+
+    def _upsert(self, item: Dict[str, Any], terms: Counter, at: float) -> int:
+        title = str(item.get("title") or "")
+        key = (item.get("platform") or "unknown", normalize_title(title))
+        if not key[1] or not terms:
+            return 0
+        fields = {"title": title, "platform": key[0], "url": item.get("url"), "updated_at": at}
+        doc = self.keys.get(key)
+        if doc is not None:
+            if self.docs[doc]["terms"] == terms:
+                self.docs[doc].update(fields)
+                return 0
+            self._remove(doc)
+
+        doc = self.free.pop() if self.free else self._grow()
+        self.docs[doc] = {**fields, "key": key, "terms": terms}
+        self.keys[key] = doc
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[doc] = tf
+            self._arrays.pop(term, None)
+        length = sum(terms.values())
+        self.lengths[doc] = length
+        self.total_length += length
+        self.platforms[doc] = self.platform_codes.setdefault(key[0], len(self.platform_codes))
+        self.updates += 1
+        return 1
+
+    def _grow(self) -> int:
+        doc = len(self.docs)
+        self.docs.append(None)
+        if doc >= len(self.lengths):
+            self.lengths = np.concatenate((self.lengths, np.zeros_like(self.lengths)))
+            self.platforms = np.concatenate((self.platforms, np.full_like(self.platforms, -1)))
+        return doc
+
+    def _remove(self, doc: int):
+        entry = self.docs[doc]
+        for term in entry["terms"]:
+            postings = self.postings[term]
+            del postings[doc]
+            if not postings:
+                del self.postings[term]
+            self._arrays.pop(term, None)
+        self.total_length -= self.lengths[doc]
+        self.lengths[doc] = 0
+        self.platforms[doc] = -1
+        del self.keys[entry["key"]]
+        self.docs[doc] = None
+        self.free.append(doc)
+
+    def _evict(self):
+        """Keep the most recently seen 90% of max_docs"""
+        live = sorted(self.keys.values(), key=lambda doc: self.docs[doc]["updated_at"])
+        stale = live[:len(live) - int(self.max_docs * 0.9)]
+        for doc in stale:
+            self._remove(doc)
+        self.evicted += len(stale)
+        logger.info(f"🗑️ Search index evicted {len(stale)} old trends")
+
+    def _term_scores(self, term: str, average_length: float) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """(doc ids, BM25 term-frequency factors, platform codes) of a term, cached until its postings or the average length change"""
+        cached = self._arrays.get(term)
+        if cached is None or cached[3] != average_length:
+            postings = self.postings.get(term)
+            if not postings:
+                return None
+            docs = np.fromiter(postings.keys(), dtype=np.int64, count=len(postings))
+            tf = np.fromiter(postings.values(), dtype=np.float64, count=len(postings))
+            norm = self.K1 * (1 - self.B + self.B * self.lengths[docs] / average_length)
+            factors = tf * (self.K1 + 1) / (tf + norm)
+            order = np.argsort(-factors, kind="stable")  # impact order: a one-term query is a slice
+            docs = docs[order]
+            cached = (docs, factors[order], self.platforms[docs], average_length)
+            self._arrays[term] = cached
+        return cached[:3]
+
+    def _combine(self, idf: List[float], postings: List[Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Documents matching any of the terms, with their summed BM25 scores"""
+        size = sum(len(docs) for docs, _ in postings)
+        if size * 8 < len(self.docs):
+            # Few postings: sort them by document and sum runs
+            docs = np.concatenate([docs for docs, _ in postings])
+            score = np.concatenate([weight * factors for weight, (_, factors) in zip(idf, postings)])
+            order = np.argsort(docs, kind="stable")
+            docs, score = docs[order], score[order]
+            starts = np.flatnonzero(np.r_[True, docs[1:] != docs[:-1]])
+            return docs[starts], np.add.reduceat(score, starts)
+        # Many postings: accumulate over every slot; a term holds each document once,
+        # so plain fancy-index adds are enough
+        score = np.zeros(len(self.docs))
+        matched = np.zeros(len(self.docs), dtype=bool)
+        for weight, (docs, factors) in zip(idf, postings):
+            score[docs] += weight * factors
+            matched[docs] = True
+        docs = np.flatnonzero(matched)
+        return docs, score[docs]
+
+    def search(self, query: str, limit: Optional[int] = None, platform: Optional[str] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """Best `limit` documents for the query by BM25, and how many documents matched it"""
+        limit = limit or settings.TREND_SEARCH_LIMIT
+        n = len(self.keys)
+        terms = set(extract_keywords_batch([query], min_length=MIN_TERM_LENGTH)[0])
+        if not n or not terms:
+            return [], 0
+        average_length = self.total_length / n
+
+        postings = [p for p in (self._term_scores(term, average_length) for term in terms) if p is not None]
+        if not postings:
+            return [], 0
+        idf = [math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5)) for docs, _, _ in postings]
+        code = self.platform_codes.get(platform, -2) if platform is not None else None
+        if len(postings) == 1:
+            # Already in impact order: the best matches come first
+            docs, factors, platforms = postings[0]
+            if code is None:
+                matched, best = len(docs), slice(0, limit)
+            else:
+                keep = platforms == code
+                matched, best = int(np.count_nonzero(keep)), np.flatnonzero(keep)[:limit]
+            docs, score = docs[best], idf[0] * factors[best]
+        else:
+            docs, score = self._combine(idf, [(docs, factors) for docs, factors, _ in postings])
+            if code is not None:
+                keep = self.platforms[docs] == code
+                docs, score = docs[keep], score[keep]
+            matched = len(docs)
+            if matched > limit:
+                best = np.argpartition(-score, limit - 1)[:limit]
+                docs, score = docs[best], score[best]
+        order = np.argsort(-score, kind="stable")
+        hits = []
+        for i in order.tolist():
+            entry = self.docs[docs[i]]
+            hits.append({
+                "title": entry["title"],
+                "platform": entry["platform"],
+                "url": entry["url"],
+                "score": round(float(score[i]), 4),
+                "updated_at": datetime.fromtimestamp(entry["updated_at"]),
+            })
+        return hits, matched
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "documents": len(self.keys),
+            "terms": len(self.postings),
+            "updates": self.updates,
+            "evicted": self.evicted,
+        }
+
+trend_search_index = TrendSearchIndex()
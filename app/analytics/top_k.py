@@ -0,0 +1,160 @@
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import heapq
+import itertools
+import logging
+import math
+import time
+from app.config import settings
+from app.models import TRENDING_FIELDS, TrendingData
+from app.utils.helper import normalize_title
+from .scoring import engagement_scorer
+
+logger = logging.getLogger(__name__)
+
+MIN_SCORE = 1e-6         # log() needs a positive score
+COMPACT_SLACK = 1024     # superseded heap entries tolerated before a rebuild
+
+Key = Tuple[str, str]                # (platform, normalized title)
+HeapEntry = Tuple[float, int, Key]   # (-priority, sequence, key)
+
+class TopKIndex:
+    """Top trends by decayed score, maintained incrementally across refreshes
+
+    Scores halve every TREND_TOPK_HALF_LIFE_HOURS. Instead of rescoring every
+    entry as time passes, each one is keyed by log(score) + rate * updated_at:
+    its decayed score at time t is exp(key - rate * t), so the order of the
+    keys never changes and the heaps stay valid. An update pushes a new heap
+    entry and the superseded one is skipped when met (lazy deletion). Queries
+    walk a heap in order from the root, touching only the entries they return
+    or filter out, never sorting the whole index.
+    """
+
+    def __init__(self, half_life_hours: Optional[float] = None, max_entries: Optional[int] = None):
+        self.rate = math.log(2) / ((half_life_hours or settings.TREND_TOPK_HALF_LIFE_HOURS) * 3600)
+        self.max_entries = max_entries or settings.TREND_TOPK_MAX_ENTRIES
+        self.entries: Dict[Key, Dict[str, Any]] = {}
+        self.heaps: Dict[Optional[str], List[HeapEntry]] = {None: []}  # None: every platform
+        self._observed: Dict[str, Any] = {}  # source -> refreshed_at last upserted
+        self._sequence = itertools.count()
+        self.updates = 0
+        self.evicted = 0
+
+    def upsert(self, item: Dict[str, Any], score: float, at: Optional[float] = None):
+        """Insert or replace an item's score as observed at `at` (unix time, default now)"""
+        title = str(item.get("title") or "")
+        key = (item.get("platform") or "unknown", normalize_title(title))
+        if not key[1]:
+            return
+        at = at if at is not None else time.time()
+        priority = math.log(max(score, MIN_SCORE)) + self.rate * at
+        sequence = next(self._sequence)
+        metadata = item.get("metadata") or {}
+        self.entries[key] = {
+            "title": title,
+            "platform": key[0],
+            "url": item.get("url"),
+            "base_score": score,
+            "updated_at": at,
+            "priority": priority,
+            "sequence": sequence,
+            "keywords": frozenset(key[1].split()) | {str(metadata.get("subreddit") or "").lower()},
+        }
+        entry = (-priority, sequence, key)
+        heapq.heappush(self.heaps[None], entry)
+        heapq.heappush(self.heaps.setdefault(key[0], []), entry)
+        self.updates += 1
+
+        if len(self.entries) > self.max_entries:
+            self._evict()
+        elif len(self.heaps[None]) > 2 * len(self.entries) + COMPACT_SLACK:
+            self._rebuild()
+
+    def observe(self, snapshot: TrendingData):
+        """Upsert every item of the snapshot's freshly collected sources"""
+        at = snapshot.timestamp.timestamp()
+        sources = snapshot.sources or {}
+        for source, field in TRENDING_FIELDS.items():
+            status = sources.get(source, {})
+            if status.get("stale"):
+                continue  # last-good items re-served; let them keep decaying
+            refreshed_at = status.get("refreshed_at")
+            if refreshed_at is not None:
+                if self._observed.get(source) == refreshed_at:
+                    continue  # republished after another source's refresh; not seen again
+                self._observed[source] = refreshed_at
+            items = getattr(snapshot, field) or []
+            if any("score" not in item for item in items):
+                items = engagement_scorer.annotate(items)
+            for item in items:
+                self.upsert(item, item["score"], at)
+
+    def _rebuild(self):
+        """Drop superseded heap entries"""
+        self.heaps = {None: []}
+        for key, entry in self.entries.items():
+            heap_entry = (-entry["priority"], entry["sequence"], key)
+            self.heaps[None].append(heap_entry)
+            self.heaps.setdefault(key[0], []).append(heap_entry)
+        for heap in self.heaps.values():
+            heapq.heapify(heap)
+
+    def _evict(self):
+        """Keep the best 90% of max_entries by decayed score"""
+        keep = heapq.nlargest(int(self.max_entries * 0.9), self.entries.items(), key=lambda kv: kv[1]["priority"])
+        self.evicted += len(self.entries) - len(keep)
+        self.entries = dict(keep)
+        self._rebuild()
+
+    @staticmethod
+    def _ordered(heap: List[HeapEntry]) -> Iterator[HeapEntry]:
+        """Heap entries best first, without popping: a frontier of candidate children"""
+        frontier = [(heap[0], 0)] if heap else []
+        while frontier:
+            entry, i = heapq.heappop(frontier)
+            yield entry
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+
+    def top(
+        self,
+        n: int = 10,
+        platform: Optional[str] = None,
+        keyword: Optional[str] = None,
+        since: Optional[float] = None,
+        now: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """Best `n` items by decayed score, optionally for one platform, keyword(s) or time window"""
+        now = now if now is not None else time.time()
+        words = set(normalize_title(keyword).split()) if keyword else set()
+        results = []
+        for neg_priority, sequence, key in self._ordered(self.heaps.get(platform, [])):
+            entry = self.entries.get(key)
+            if entry is None or entry["sequence"] != sequence:
+                continue  # superseded by a later update
+            if since is not None and entry["updated_at"] < since:
+                continue
+            if not words <= entry["keywords"]:
+                continue
+            results.append({
+                "title": entry["title"],
+                "platform": entry["platform"],
+                "url": entry["url"],
+                "score": math.exp(-neg_priority - self.rate * now),
+                "base_score": entry["base_score"],
+                "updated_at": datetime.fromtimestamp(entry["updated_at"]),
+            })
+            if len(results) >= n:
+                break
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self.entries),
+            "heap_entries": len(self.heaps[None]),
+            "updates": self.updates,
+            "evicted": self.evicted,
+        }
+
+top_k_index = TopKIndex()
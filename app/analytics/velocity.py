@@ -0,0 +1,137 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+import logging
+import numpy as np
+from app.config import settings
+from app.models import TRENDING_FIELDS, TrendingData
+from app.utils.helper import normalize_title
+
+logger = logging.getLogger(__name__)
+
+MIN_VELOCITY = 1e-3  # log score per hour; anything slower counts as flat
+
+class VelocityEngine:
+    """Rolling per-topic score series with velocity, acceleration and momentum
+
+    Each published snapshot adds one column to a (topics x window) ring
+    buffer of log1p(engagement) values; topics missing from a snapshot score
+    0 there. metrics() fits a quadratic over time to every row in a single
+    least-squares solve: velocity is the slope at the latest snapshot (log
+    score per hour), acceleration its rate of change, and momentum the
+    velocity z-scored across all tracked topics.
+    """
+
+    def __init__(self, window: Optional[int] = None, max_topics: Optional[int] = None):
+        self.window = window or settings.TREND_VELOCITY_WINDOW
+        self.max_topics = max_topics or settings.TREND_VELOCITY_MAX_TOPICS
+        self.values = np.zeros((min(1024, self.max_topics), self.window), dtype=np.float32)
+        self.times = np.zeros(self.window, dtype=np.float64)
+        self.head = 0   # column the next snapshot is written to
+        self.count = 0  # columns filled so far
+        self.index: Dict[str, int] = {}
+        self.titles: List[str] = []
+        self.platforms: List[Set[str]] = []
+        self.evicted = 0
+
+    def _row(self, key: str, title: str) -> int:
+        row = self.index.get(key)
+        if row is None:
+            if len(self.titles) >= self.max_topics:
+                self._evict()
+            row = len(self.titles)
+            if row >= len(self.values):
+                grown = np.zeros((min(len(self.values) * 2, self.max_topics), self.window), dtype=np.float32)
+                grown[:len(self.values)] = self.values
+                self.values = grown
+            self.index[key] = row
+            self.titles.append(title)
+            self.platforms.append(set())
+        return row
+
+    def _evict(self):
+        """Drop the quieter half of the topics (by score summed over the window)"""
+        n = len(self.titles)
+        totals = self.values[:n].sum(axis=1)
+        keep = np.sort(np.argsort(totals, kind="stable")[n // 2:])
+        self.values[:len(keep)] = self.values[keep]
+        self.values[len(keep):] = 0
+        self.titles = [self.titles[i] for i in keep]
+        self.platforms = [self.platforms[i] for i in keep]
+        self.index = {normalize_title(title): row for row, title in enumerate(self.titles)}
+        self.evicted += n - len(keep)
+        logger.info(f"🗑️ Velocity engine evicted {n - len(keep)} quiet topics")
+
+    def observe(self, snapshot: TrendingData):
+        """Add the snapshot as the newest column of every topic's series"""
+        column = self.head
+        self.values[:, column] = 0
+        self.times[column] = snapshot.timestamp.timestamp()
+        for field in TRENDING_FIELDS.values():
+            for item in getattr(snapshot, field) or []:
+                title = item.get("title")
+                key = normalize_title(title or "")
+                if not key:
+                    continue
+                row = self._row(key, title)
+                # The same topic on several platforms adds up
+                self.values[row, column] += np.log1p(max(item.get("engagement_score") or 0, 0))
+                self.platforms[row].add(item.get("platform") or field)
+        self.head = (self.head + 1) % self.window
+        self.count = min(self.count + 1, self.window)
+
+    def metrics(self) -> Dict[str, np.ndarray]:
+        """score, velocity, acceleration and momentum arrays, one entry per tracked topic"""
+        n = len(self.titles)
+        order = (self.head - self.count + np.arange(self.count)) % self.window  # oldest first
+        series = self.values[:n][:, order].astype(np.float64)
+        hours = (self.times[order] - self.times[order][-1]) / 3600.0 if self.count else np.zeros(0)
+
+        velocity = np.zeros(n)
+        acceleration = np.zeros(n)
+        if n and self.count >= 2 and np.ptp(hours) > 0:
+            degree = 2 if self.count >= 3 else 1
+            # Columns are topics; hours are relative to the latest snapshot, so the
+            # linear coefficient is the slope there
+            coefficients = np.polynomial.polynomial.polyfit(hours, series.T, degree)
+            velocity = coefficients[1]
+            if degree == 2:
+                acceleration = 2 * coefficients[2]
+
+        std = velocity.std() if n else 0.0
+        momentum = (velocity - velocity.mean()) / std if std > 0 else np.zeros(n)
+        latest = series[:, -1] if self.count else np.zeros(n)
+        return {"score": latest, "velocity": velocity, "acceleration": acceleration, "momentum": momentum}
+
+    def emerging(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Topics in the latest snapshot that are rising and still speeding up, by momentum"""
+        limit = limit or settings.TREND_EMERGING_LIMIT
+        if not self.titles or self.count < 2:
+            return []
+        m = self.metrics()
+        candidates = np.flatnonzero((m["score"] > 0) & (m["velocity"] > MIN_VELOCITY) & (m["acceleration"] >= 0))
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-m["momentum"][candidates], limit - 1)[:limit]]
+        candidates = candidates[np.argsort(-m["momentum"][candidates], kind="stable")]
+        return [
+            {
+                "title": self.titles[row],
+                "platforms": sorted(self.platforms[row]),
+                "score": round(float(m["score"][row]), 3),
+                "velocity": round(float(m["velocity"][row]), 4),
+                "acceleration": round(float(m["acceleration"][row]), 4),
+                "momentum": round(float(m["momentum"][row]), 3),
+            }
+            for row in candidates
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "tracked_topics": len(self.titles),
+            "snapshots": self.count,
+            "window": self.window,
+            "evicted": self.evicted,
+            "since": datetime.fromtimestamp(self.times[(self.head - self.count) % self.window]).isoformat()
+            if self.count else None,
+        }
+
+velocity_engine = VelocityEngine()
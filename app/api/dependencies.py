@@ -1,14 +1,25 @@
 from fastapi import Depends, HTTPException
 from app.ai.analyzer import AIAnalyzer
+from app.analytics.clustering import TrendClusterer
+from app.analytics.scoring import engagement_scorer
 from app.collectors import GoogleTrendsCollector, RedditCollector, NewsAPICollector
+from app.collectors.context import collection_context
+from app.config import settings
+from app.models import TRENDING_FIELDS, TrendingData
+from app.utils.circuit_breaker import CircuitBreaker
+from app.utils.exceptions import CircuitOpenError, RateLimitError
+from datetime import datetime
 from functools import lru_cache
+from typing import Any, Dict, Optional
+import asyncio
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 @lru_cache()
 def get_ai_analyzer() -> AIAnalyzer:
-    """Dependency to get Gemini AI analyzer instance"""
+    """Dependency to get the process-wide AI analyzer instance"""
     try:
         return AIAnalyzer()
     except Exception as e:
@@ -16,12 +27,17 @@ def get_ai_analyzer() -> AIAnalyzer:
         raise HTTPException(status_code=500, detail=f"AI service unavailable: {str(e)}")
 
 class CollectorManager:
+    TRENDING_FIELDS = TRENDING_FIELDS
+
     def __init__(self):
         self.collectors = {
             'google_trends': GoogleTrendsCollector(),
             'reddit': RedditCollector(),
             'news': NewsAPICollector(),
         }
+        # Dead upstreams fail fast instead of costing a full timeout on every refresh
+        self.breakers = {platform: CircuitBreaker(platform) for platform in self.collectors}
+        self.clusterer = TrendClusterer() if settings.TREND_CLUSTER_ENABLED else None
     
     def get_collector(self, platform: str):
         """Get specific platform collector"""
@@ -36,6 +52,105 @@ class CollectorManager:
         """Get all available collectors"""
         return self.collectors
 
+    async def collect_source(self, platform: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Collect one source under its own deadline; failures are reported, never raised"""
+        collector = self.get_collector(platform)
+        if timeout is None:
+            timeout = settings.COLLECTOR_TIMEOUTS.get(platform, settings.DEFAULT_COLLECTOR_TIMEOUT)
+
+        breaker = self.get_breaker(platform)
+
+        started = time.perf_counter()
+        items, error, substitute = [], None, None
+        try:
+            breaker.allow()
+        except CircuitOpenError as e:
+            status, error = "circuit_open", str(e)
+            logger.warning(f"❌ {platform} skipped: {error}")
+        else:
+            try:
+                # Fetches are shared across the refresh, so a fallback never repeats one
+                with collection_context() as context:
+                    items = await asyncio.wait_for(collector.collect_once(), timeout=timeout)
+                    substitute = context.substitutions.get(collector.memo_key())
+                status = "substituted" if substitute else "ok"
+                if substitute:
+                    # The source itself failed; a fallback's data does not make it healthy
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                logger.info(f"✅ {platform}: collected {len(items)} trends" + (f" from {substitute}" if substitute else ""))
+            except asyncio.TimeoutError:
+                status, error = "timeout", f"timed out after {timeout}s"
+                breaker.record_failure()
+                logger.warning(f"⏰ {platform} timed out")
+            except RateLimitError as e:
+                # Throttling is the rate limiter's business, not a sign the upstream is down
+                status, error = "rate_limited", str(e)
+                breaker.release()
+                logger.warning(f"⏰ {platform} rate limited: {error}")
+            except Exception as e:
+                status, error = "error", str(e)
+                breaker.record_failure()
+                logger.warning(f"❌ {platform} failed: {error}")
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+
+        result = {
+            "items": items,
+            "status": status,
+            "count": len(items),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            "error": error,
+        }
+        if substitute:
+            result["substituted_by"] = substitute
+        return result
+
+    def get_breaker(self, platform: str) -> CircuitBreaker:
+        if platform not in self.breakers:
+            self.breakers[platform] = CircuitBreaker(platform)
+        return self.breakers[platform]
+
+    def get_breaker_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {platform: breaker.get_stats() for platform, breaker in self.breakers.items()}
+
+    async def collect_all(self) -> Dict[str, Dict[str, Any]]:
+        """Run every registered collector concurrently and return per-source results"""
+        platforms = list(self.collectors)
+        with collection_context():
+            results = await asyncio.gather(*(self.collect_source(p) for p in platforms))
+        return dict(zip(platforms, results))
+
+    def build_trending_data(self, results: Dict[str, Dict[str, Any]], timestamp: Optional[datetime] = None) -> TrendingData:
+        """Assemble a TrendingData snapshot (with per-source status) from collect_all results"""
+        fields = {field: [] for field in self.TRENDING_FIELDS.values()}
+        for platform, result in results.items():
+            field = self.TRENDING_FIELDS.get(platform)
+            substitute = results.get(result.get("substituted_by"))
+            if field and not (substitute and substitute["items"]):
+                # Substituted data is only published when its own source has nothing to show
+                fields[field] = result["items"]
+
+        # One comparable score across platforms, computed over the whole snapshot at once
+        items = engagement_scorer.annotate([item for items in fields.values() for item in items])
+        field_of = [field for field, field_items in fields.items() for _ in field_items]
+        # The same story on several platforms is published once, under its best-scored member
+        kept = self.clusterer.dedupe(items) if self.clusterer is not None else enumerate(items)
+        fields = {field: [] for field in fields}
+        for position, item in kept:
+            fields[field_of[position]].append(item)
+
+        return TrendingData(
+            **fields,
+            sources={
+                platform: {k: v for k, v in result.items() if k != "items"}
+                for platform, result in results.items()
+            },
+            timestamp=timestamp or datetime.now(),
+        )
+
 @lru_cache()
 def get_collector_manager() -> CollectorManager:
     """Dependency to get collector manager instance"""
@@ -0,0 +1,203 @@
+from fastapi import HTTPException
+from app.api.dependencies import get_collector_manager
+from app.collectors.context import collection_context
+from app.config import settings
+from app.models import TrendingData
+from app.utils.cache import CacheBackend, create_cache
+from app.utils.singleflight import SingleFlight
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_KEY = "snapshot"
+LOCK_RETRY_SECONDS = 5.0
+
+def _source_key(platform: str) -> str:
+    return f"source:{platform}"
+
+def _lock_key(platform: str) -> str:
+    return f"lock:{platform}"
+
+class TrendingRefresher:
+    """Keeps the trending snapshot warm and serves it stale-while-revalidate"""
+
+    def __init__(
+        self,
+        cache: Optional[CacheBackend] = None,
+        intervals: Optional[Dict[str, float]] = None,
+        max_age: Optional[timedelta] = None,
+    ):
+        # Per-source results and the snapshot live in the cache so workers share them
+        self.cache = cache or create_cache("trending")
+        self.intervals = intervals if intervals is not None else settings.REFRESH_INTERVALS
+        self.max_age = max_age or timedelta(seconds=settings.TRENDING_MAX_AGE)
+        self.flight = SingleFlight()
+        self.worker_id = f"{os.getpid()}:{id(self)}"
+        self._decoded: Optional[Tuple[str, TrendingData]] = None
+        self._tasks: List[asyncio.Task] = []
+        self._refreshing: Set[asyncio.Task] = set()
+        self.listeners: List[Callable[[TrendingData], None]] = []
+
+    def add_listener(self, listener: Callable[[TrendingData], None]):
+        """Call `listener` with every snapshot this worker publishes; it must not block"""
+        if listener not in self.listeners:
+            self.listeners.append(listener)
+
+    async def _load_snapshot(self) -> Optional[Tuple[datetime, TrendingData]]:
+        entry = await self.cache.get(SNAPSHOT_KEY)
+        if entry is None:
+            return None
+        # Only re-validate the model when another refresh replaced the snapshot
+        if self._decoded is None or self._decoded[0] != entry["updated_at"]:
+            self._decoded = (entry["updated_at"], TrendingData(**entry["data"]))
+        return datetime.fromisoformat(entry["updated_at"]), self._decoded[1]
+
+    async def get_snapshot(self) -> TrendingData:
+        """Return the current snapshot; a stale one is served while a refresh runs"""
+        loaded = await self._load_snapshot()
+        if loaded is None:
+            return await self.refresh()
+
+        updated_at, snapshot = loaded
+        if datetime.now() - updated_at < self.max_age:
+            logger.info("📋 Returning cached trending data")
+            return snapshot
+
+        if not self.flight.in_flight("trending_data"):
+            # The loop only keeps weak references to tasks; hold this one until it finishes
+            task = asyncio.ensure_future(self._refresh_quietly())
+            self._refreshing.add(task)
+            task.add_done_callback(self._refreshing.discard)
+        logger.info("📋 Returning stale trending data while refreshing")
+        return snapshot.model_copy(update={"stale": True})
+
+    async def refresh(self, platforms: Optional[List[str]] = None) -> TrendingData:
+        """Refresh the given sources (all by default) and rebuild the snapshot"""
+        if platforms is None:
+            return await self.flight.do("trending_data", self._refresh_all)
+        with collection_context():
+            await asyncio.gather(*(self.flight.do(p, lambda p=p: self._refresh_source(p)) for p in platforms))
+        return await self._publish()
+
+    async def _refresh_all(self) -> TrendingData:
+        logger.info("🔄 Collecting fresh trending data from real APIs")
+        platforms = list(get_collector_manager().get_all_collectors())
+        # One context per refresh: a fallback reuses any fetch another source already made
+        with collection_context():
+            await asyncio.gather(*(self.flight.do(p, lambda p=p: self._refresh_source(p)) for p in platforms))
+        return await self._publish()
+
+    async def _refresh_source(self, platform: str):
+        attempted_at = datetime.now().isoformat()
+        result = await get_collector_manager().collect_source(platform)
+        result["refreshed_at"] = datetime.now().isoformat()
+
+        previous = await self.cache.get(_source_key(platform))
+        if not result["items"] and previous and previous["items"]:
+            # Keep serving the last good items for this source, flagged stale
+            result = {**previous, "stale": True, "last_error": result["error"] or result["status"]}
+        result["attempted_at"] = attempted_at
+        await self.cache.set(_source_key(platform), result, ttl=settings.TRENDING_STALE_TTL)
+
+    async def _publish(self) -> TrendingData:
+        manager = get_collector_manager()
+        platforms = list(manager.get_all_collectors())
+        entries = await asyncio.gather(*(self.cache.get(_source_key(p)) for p in platforms))
+        results = {p: entry for p, entry in zip(platforms, entries) if entry is not None}
+
+        if not any(result["items"] for result in results.values()):
+            raise HTTPException(
+                status_code=503,
+                detail="No trending data available from any real API source"
+            )
+
+        now = datetime.now()
+        snapshot = manager.build_trending_data(results, timestamp=now)
+        await self.cache.set(
+            SNAPSHOT_KEY,
+            {"updated_at": now.isoformat(), "data": snapshot.model_dump(mode="json")},
+            ttl=settings.TRENDING_STALE_TTL,
+        )
+        self._decoded = (now.isoformat(), snapshot)
+        for listener in self.listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logger.warning(f"⚠️ Snapshot listener failed: {str(e)}")
+        logger.info("✅ Real data collected and cached")
+        return snapshot
+
+    async def _refresh_quietly(self, platforms: Optional[List[str]] = None):
+        try:
+            await self.refresh(platforms)
+        except Exception as e:
+            logger.warning(f"⚠️ Background refresh failed: {str(e)}")
+
+    async def _run_source(self, platform: str, interval: float):
+        """Refresh one source on its own interval, ahead of the snapshot expiring"""
+        while True:
+            entry = await self.cache.get(_source_key(platform))
+            if entry is not None:
+                elapsed = (datetime.now() - datetime.fromisoformat(entry["attempted_at"])).total_seconds()
+                if elapsed < interval:
+                    await asyncio.sleep(interval - elapsed)
+                    continue
+
+            # Lease so only one worker sharing the cache refreshes this source; with the
+            # cache unreachable nobody holds it and requests refresh on demand instead
+            lease = settings.COLLECTOR_TIMEOUTS.get(platform, settings.DEFAULT_COLLECTOR_TIMEOUT) + LOCK_RETRY_SECONDS
+            if await self.cache.add(_lock_key(platform), self.worker_id, ttl=lease):
+                try:
+                    await self._refresh_quietly([platform])
+                finally:
+                    await self.cache.delete(_lock_key(platform))
+            else:
+                await asyncio.sleep(min(interval, LOCK_RETRY_SECONDS))
+
+    def start(self):
+        """Start the background refresh loops (one per source)"""
+        if self._tasks:
+            return
+        for platform in get_collector_manager().get_all_collectors():
+            interval = self.intervals.get(platform, settings.DEFAULT_REFRESH_INTERVAL)
+            self._tasks.append(asyncio.create_task(self._run_source(platform, interval)))
+        logger.info(f"⏱️ Background refresh started for {len(self._tasks)} sources")
+
+    async def stop(self):
+        """Cancel the background refresh loops and wait for refreshes started by stale reads"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Cancelling these would only abandon the shielded collection, not stop it
+        await asyncio.gather(*self._refreshing, return_exceptions=True)
+
+    async def clear(self):
+        """Drop cached data so the next request collects fresh data"""
+        await self.cache.clear()
+        self._decoded = None
+
+    async def get_status(self) -> Dict[str, Any]:
+        """Snapshot freshness, per-source refresh state and cache statistics"""
+        loaded = await self._load_snapshot()
+        return {
+            "cache_status": "cached" if loaded else "empty",
+            "last_update": loaded[0].isoformat() if loaded else None,
+            "background_refresh": bool(self._tasks),
+            "sources": {
+                platform: {
+                    "status": source["status"],
+                    "refreshed_at": source.get("refreshed_at"),
+                    "stale": source.get("stale", False),
+                    "substituted_by": source.get("substituted_by"),
+                }
+                for platform, source in (loaded[1].sources or {}).items()
+            } if loaded else {},
+            "cache": await self.cache.get_stats(),
+        }
+
+trending_refresher = TrendingRefresher()
@@ -1,92 +1,39 @@
-from fastapi import APIRouter, HTTPException, Depends
-from app.models import TrendingData, StrategyResponse, AnalysisRequest
-from app.collectors.reddit import RedditCollector
-from app.collectors.google_trends import GoogleTrendsCollector
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
+from app.models import (
+    TrendingData, StrategyResponse, AnalysisRequest,
+    BatchAnalysisRequest, BatchAnalysisResponse, BatchAnalysisResult,
+    TrendHistoryResponse, EmergingTrendsResponse, TopTrendsResponse, TrendSearchResponse,
+)
 from app.collectors.competitor import CompetitorCollector
+from app.collectors.http_cache import http_cache
+from app.collectors.pytrends_pool import pytrends_pool
 from app.ai.analyzer import AIAnalyzer
+from app.analytics.search import trend_search_index
+from app.analytics.top_k import top_k_index
+from app.analytics.velocity import velocity_engine
+from app.ai.cache import llm_cache
+from app.api.dependencies import get_ai_analyzer, get_collector_manager
+from app.api.refresher import trending_refresher
+from app.config import settings
+from app.storage.trend_store import trend_store
+from app.utils.helper import normalize_title
+from app.utils.rate_limit import get_rate_limit_stats
 from datetime import datetime, timedelta
-import asyncio
+import json
 import logging
-from typing import Dict, Any, List
+import time
+from typing import Dict, Any, List, Optional
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# Cache to prevent repeated API calls
-cache = {
-    "trending_data": None,
-    "last_update": None,
-    "cache_duration": timedelta(minutes=15)
-}  # ← Fixed: Added missing closing bracket
-
-def get_ai_analyzer():
-    return AIAnalyzer()
-
 @router.get("/trending", response_model=TrendingData)
 async def get_trending_data():
     """Collect REAL trending data from APIs only"""
     try:
-        # Check cache first
-        now = datetime.now()
-        if (cache["trending_data"] and cache["last_update"] and 
-            now - cache["last_update"] < cache["cache_duration"]):
-            logger.info("📋 Returning cached trending data")
-            return cache["trending_data"]
-
-        logger.info("🔄 Collecting fresh trending data from real APIs")
-
-        # Initialize collectors
-        google_collector = GoogleTrendsCollector()
-        reddit_collector = RedditCollector()
-
-        # Collect from real APIs with timeout
-        google_trends = []
-        reddit_trends = []
-
-        try:
-            # Google Trends with timeout
-            google_trends = await asyncio.wait_for(
-                google_collector.collect(), 
-                timeout=15.0
-            )  # ← Fixed: Added missing closing bracket
-            logger.info(f"✅ Google Trends: collected {len(google_trends)} trends")
-        except asyncio.TimeoutError:
-            logger.warning("⏰ Google Trends timed out")
-        except Exception as e:
-            logger.warning(f"❌ Google Trends failed: {str(e)}")
-
-        try:
-            # Reddit with timeout
-            reddit_trends = await asyncio.wait_for(
-                reddit_collector.collect(), 
-                timeout=10.0
-            )  # ← Fixed: Added missing closing bracket
-            logger.info(f"✅ Reddit: collected {len(reddit_trends)} trends")
-        except asyncio.TimeoutError:
-            logger.warning("⏰ Reddit timed out")
-        except Exception as e:
-            logger.warning(f"❌ Reddit failed: {str(e)}")
-
-        # Check if we got any real data
-        if not google_trends and not reddit_trends:
-            raise HTTPException(
-                status_code=503, 
-                detail="No trending data available from any real API source"
-            )  # ← Fixed: Added missing closing bracket
-
-        # Create response with only real API data
-        trending_data = TrendingData(
-            google_trends=google_trends,  # ← Now passes full objects
-            reddit_trends=reddit_trends,
-            timestamp=now
-        )  # ← Fixed: Added missing closing bracket
-
-        # Cache the real result
-        cache["trending_data"] = trending_data
-        cache["last_update"] = now
-
-        logger.info("✅ Real data collected and cached")
-        return trending_data
+        # Served from the warm snapshot; stale data is returned while a refresh runs
+        return await trending_refresher.get_snapshot()
 
     except HTTPException:
         # Re-raise HTTP exceptions
@@ -95,6 +42,69 @@ async def get_trending_data():
         logger.error(f"❌ Data collection failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Data collection failed: {str(e)}")
 
+@router.get("/trends/history", response_model=TrendHistoryResponse)
+async def get_trend_history(
+    title: str = Query(..., min_length=1),
+    hours: float = Query(24.0, gt=0, le=24 * 365),
+    platform: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=10000),
+):
+    """How one topic moved (rank and score per snapshot) over the last `hours`"""
+    if not settings.TREND_STORE_ENABLED:
+        # Nothing is recorded, so don't open (and create) the store's database
+        raise HTTPException(status_code=404, detail="Trend history is disabled (TREND_STORE_ENABLED is false)")
+    until = datetime.now()
+    since = until - timedelta(hours=hours)
+    points = await trend_store.history(title, since=since, until=until, platform=platform, limit=limit)
+    return TrendHistoryResponse(
+        title=title,
+        normalized_title=normalize_title(title),
+        since=since,
+        until=until,
+        points=points,
+    )
+
+@router.get("/trends/emerging", response_model=EmergingTrendsResponse)
+async def get_emerging_trends(limit: Optional[int] = Query(None, ge=1, le=500)):
+    """Topics rising fastest across recent snapshots, before they peak"""
+    stats = velocity_engine.get_stats()
+    return EmergingTrendsResponse(
+        trends=velocity_engine.emerging(limit),
+        tracked_topics=stats["tracked_topics"],
+        snapshots=stats["snapshots"],
+    )
+
+@router.get("/trends/top", response_model=TopTrendsResponse)
+async def get_top_trends(
+    limit: int = Query(10, ge=1, le=500),
+    platform: Optional[str] = None,
+    keyword: Optional[str] = None,
+    hours: Optional[float] = Query(None, gt=0),
+):
+    """Best trends by decayed score, optionally for one platform, niche keyword or recent window"""
+    since = (datetime.now() - timedelta(hours=hours)).timestamp() if hours else None
+    return TopTrendsResponse(
+        trends=top_k_index.top(limit, platform=platform, keyword=keyword, since=since),
+        indexed=len(top_k_index.entries),
+    )
+
+@router.get("/trends/search", response_model=TrendSearchResponse)
+async def search_trends(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    platform: Optional[str] = None,
+):
+    """Collected trends matching the query, ranked by BM25 over titles and metadata"""
+    started = time.perf_counter()
+    hits, matched = trend_search_index.search(q, limit=limit, platform=platform)
+    return TrendSearchResponse(
+        query=q,
+        hits=hits,
+        matched=matched,
+        indexed=len(trend_search_index.keys),
+        took_ms=round((time.perf_counter() - started) * 1000, 3),
+    )
+
 @router.post("/analyze", response_model=StrategyResponse)
 async def analyze_trends(
     request: AnalysisRequest,
@@ -117,6 +127,40 @@ async def analyze_trends(
         logger.error(f"❌ Analysis failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
+@router.post("/analyze/batch", response_model=BatchAnalysisResponse)
+async def analyze_batch(
+    request: BatchAnalysisRequest,
+    analyzer: AIAnalyzer = Depends(get_ai_analyzer)
+):
+    """Analyze one trends snapshot for many audience/niche pairs, reporting errors per pair"""
+    if len(request.pairs) > settings.BATCH_MAX_PAIRS:
+        raise HTTPException(status_code=422, detail=f"At most {settings.BATCH_MAX_PAIRS} pairs per batch")
+
+    # Every pair is analyzed against the same snapshot
+    trending_data = request.trends_data or await get_trending_data()
+    pairs = [(p.target_audience, p.niche) for p in request.pairs]
+    logger.info(f"🧠 Batch analysis of {len(pairs)} audience/niche pairs")
+
+    outcomes = await analyzer.analyze_batch(trending_data, pairs)
+
+    results = []
+    for (audience, niche), outcome in zip(pairs, outcomes):
+        if isinstance(outcome, BaseException):
+            logger.error(f"❌ Batch analysis failed for {audience} in {niche}: {str(outcome)}")
+            results.append(BatchAnalysisResult(
+                target_audience=audience, niche=niche, status="error",
+                error=f"Analysis failed: {str(outcome)}"
+            ))
+        else:
+            results.append(BatchAnalysisResult(target_audience=audience, niche=niche, status="ok", strategy=outcome))
+
+    logger.info(f"✅ Batch analysis completed: {sum(r.status == 'ok' for r in results)}/{len(results)} succeeded")
+    return BatchAnalysisResponse(
+        results=results,
+        unique_pairs=len(set(pairs)),
+        trends_timestamp=trending_data.timestamp,
+    )
+
 @router.get("/strategy", response_model=StrategyResponse)
 async def get_complete_strategy(
     target_audience: str = "Gen Z",
@@ -140,22 +184,53 @@ async def get_complete_strategy(
         logger.error(f"❌ Strategy generation failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Strategy generation failed: {str(e)}")
 
+@router.get("/strategy/stream")
+async def stream_complete_strategy(
+    target_audience: str = "Gen Z",
+    niche: str = "General",
+    analyzer: AIAnalyzer = Depends(get_ai_analyzer)
+):
+    """Stream the strategy as NDJSON, sending each trend and recommendation as soon as it parses"""
+    logger.info(f"🎯 Streaming strategy from real data for {target_audience} in {niche}")
+    trending_data = await get_trending_data()
+
+    async def events():
+        try:
+            async for event, payload in analyzer.stream_analysis(trending_data, target_audience, niche):
+                yield json.dumps({"event": event, "data": payload.model_dump(mode="json")}) + "\n"
+            logger.info("✅ Streamed strategy completed")
+        except Exception as e:
+            logger.error(f"❌ Streaming strategy failed: {str(e)}")
+            yield json.dumps({"event": "error", "detail": f"Strategy generation failed: {str(e)}"}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
 @router.get("/health")
 async def health_check():
     """Health check - shows real API status"""
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "cache_status": "cached" if cache["trending_data"] else "empty",
-        "last_update": cache["last_update"].isoformat() if cache["last_update"] else None,
+        **await trending_refresher.get_status(),
+        "refresh_coalescing": trending_refresher.flight.get_stats(),
+        "llm_cache": await llm_cache.get_stats(),
+        # Only once the analyzer exists; /health must not need a Groq key
+        "llm": get_ai_analyzer().llm.get_stats() if get_ai_analyzer.cache_info().currsize else None,
+        "rate_limits": get_rate_limit_stats(),
+        "pytrends_pool": pytrends_pool.get_stats(),
+        "http_cache": http_cache.get_stats(),
+        "trend_store": trend_store.get_stats(),
+        "trend_velocity": velocity_engine.get_stats(),
+        "top_k_index": top_k_index.get_stats(),
+        "search_index": trend_search_index.get_stats(),
+        "circuit_breakers": get_collector_manager().get_breaker_stats() if get_collector_manager.cache_info().currsize else {},
         "data_source": "real_apis_only"
     }
 
 @router.get("/cache/clear")
 async def clear_cache():
     """Clear cache to force fresh API calls"""
-    cache["trending_data"] = None
-    cache["last_update"] = None
+    await trending_refresher.clear()
     logger.info("🗑️ Cache cleared - next request will hit real APIs")
     return {"message": "Cache cleared - next request will fetch fresh data from real APIs"}
 
@@ -167,41 +242,31 @@ async def test_real_apis():
         "testing": "real_apis_only"
     }
 
-    # Test Google Trends
-    try:
-        google_collector = GoogleTrendsCollector()
-        google_data = await asyncio.wait_for(google_collector.collect(), timeout=10.0)
-        test_results["google_trends"] = {
-            "status": "✅ Working",
-            "count": len(google_data),
-            "sample": google_data[0] if google_data else None
-        }
-    except Exception as e:
-        test_results["google_trends"] = {
-            "status": f"❌ Failed: {str(e)}"
-        }
+    manager = get_collector_manager()
 
-    # Test Reddit
-    try:
-        reddit_collector = RedditCollector()
-        reddit_data = await asyncio.wait_for(reddit_collector.collect(), timeout=10.0)
-        test_results["reddit"] = {
-            "status": "✅ Working",
-            "count": len(reddit_data),
-            "sample": reddit_data[0] if reddit_data else None
-        }
-    except Exception as e:
-        test_results["reddit"] = {
-            "status": f"❌ Failed: {str(e)}"
-        }
+    # Test Google Trends and Reddit; an open circuit answers at once instead of waiting out the timeout
+    for platform in ('google_trends', 'reddit'):
+        result = await manager.collect_source(platform, timeout=10.0)
+        if result["status"] == "ok":
+            test_results[platform] = {
+                "status": "✅ Working",
+                "count": result["count"],
+                "sample": result["items"][0] if result["items"] else None
+            }
+        else:
+            test_results[platform] = {
+                "status": f"❌ Failed: {result['error']}"
+            }
 
     # Test AI Analyzer
     try:
-        analyzer = AIAnalyzer()
+        get_ai_analyzer()
         test_results["ai_analyzer"] = "✅ Initialized"
     except Exception as e:
         test_results["ai_analyzer"] = f"❌ Failed: {str(e)}"
 
+    return test_results
+
 @router.post("/competitors", response_model=List[Dict[str, Any]])
 async def get_competitor_data(request: AnalysisRequest):
     """Collect competitor data"""
@@ -212,5 +277,3 @@ async def get_competitor_data(request: AnalysisRequest):
     except Exception as e:
         logger.error(f"❌ Competitor data collection failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Competitor data collection failed: {str(e)}")
-
-    return test_results
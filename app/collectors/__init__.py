@@ -3,9 +3,21 @@ from .reddit import RedditCollector
 from .news_api import NewsAPICollector
 from .competitor import CompetitorCollector
 from .base import BaseCollector
+from .http_client import HTTPClient, http_client
+from .http_cache import HTTPCache, http_cache
+from .pytrends_pool import PyTrendsPool, pytrends_pool
+from .context import CollectionContext, collection_context
 
 __all__ = [
     "BaseCollector",
+    "HTTPClient",
+    "http_client",
+    "HTTPCache",
+    "http_cache",
+    "PyTrendsPool",
+    "pytrends_pool",
+    "CollectionContext",
+    "collection_context",
     "GoogleTrendsCollector", 
     "RedditCollector",
     "NewsAPICollector",
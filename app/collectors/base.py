@@ -1,20 +1,120 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Awaitable, Callable, Hashable, Optional, Tuple
 import logging
+import aiohttp
+from app.config import settings
+from app.utils.exceptions import RateLimitError
+from app.utils.rate_limit import get_rate_limiter, parse_retry_after
+from .context import current_context
+from .http_cache import http_cache
+from .http_client import http_client
 
 logger = logging.getLogger(__name__)
 
 class BaseCollector(ABC):
     """Base class for all data collectors"""
+
+    # Upstream name in settings.RATE_LIMITS; defaults to platform_name
+    rate_limit_key: Optional[str] = None
     
-    def __init__(self, limit: int = 10):
+    def __init__(self, limit: int = 10, session: Optional[aiohttp.ClientSession] = None):
         self.limit = limit
+        self.session = session
         self.platform_name = self.__class__.__name__.replace('Collector', '').lower()
-    
+
+    def http_session(self):
+        """Async context yielding the injected or process-wide pooled HTTP session"""
+        return http_client.acquire(self.session)
+
+    @property
+    def rate_limiter(self):
+        return get_rate_limiter(self.rate_limit_key or self.platform_name)
+
+    @asynccontextmanager
+    async def request(self, url: str, limiter=None, **kwargs):
+        """Rate-limited GET yielding the response, so callers can stream the body
+
+        429s, and 503s that carry Retry-After, slow the limiter down and are
+        retried up to RATE_LIMIT_RETRIES times; RateLimitError is raised once
+        retries run out or the wait would exceed RATE_LIMIT_MAX_WAIT.
+        """
+        limiter = limiter or self.rate_limiter
+        error = None
+        for _ in range(settings.RATE_LIMIT_RETRIES + 1):
+            await limiter.acquire(max_wait=settings.RATE_LIMIT_MAX_WAIT)
+            async with self.http_session() as session:
+                async with session.get(url, **kwargs) as response:
+                    if response.status == 429 or (response.status == 503 and 'Retry-After' in response.headers):
+                        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                        delay = limiter.penalize(retry_after)
+                        error = RateLimitError(limiter.name, retry_after=round(delay))
+                        continue
+                    response.raise_for_status()
+                    limiter.record_success(response.headers)
+                    yield response
+                    return
+        raise error
+
+    async def fetch(
+        self,
+        url: str,
+        as_text: bool = False,
+        parse: Optional[Callable[[aiohttp.ClientResponse], Awaitable[Any]]] = None,
+        cache_key: Optional[Hashable] = None,
+        **kwargs
+    ) -> Any:
+        """GET a URL under the upstream's rate limit and return its JSON, text or `parse(response)`
+
+        Goes through the HTTP cache: a fresh entry skips the request and a 304
+        returns the stored value. Pass `cache_key` when `parse` keeps only part
+        of the body, so differently-parsed fetches of one URL do not collide.
+        """
+        if parse is None:
+            parse = self._read_text if as_text else self._read_json
+        if not settings.HTTP_CACHE_ENABLED:
+            async with self.request(url, **kwargs) as response:
+                return await parse(response)
+
+        key = (url, repr(kwargs.get('params')), cache_key if cache_key is not None else as_text)
+        entry = http_cache.get(key)
+        if entry is not None and entry.fresh():
+            http_cache.hits += 1
+            return entry.value
+        if entry is not None:
+            kwargs['headers'] = {**(kwargs.get('headers') or {}), **entry.validators()}
+        async with self.request(url, **kwargs) as response:
+            if response.status == 304 and entry is not None:
+                http_cache.refresh(entry, response.headers)
+                return entry.value
+            http_cache.misses += 1
+            value = await parse(response)
+            http_cache.store(key, response.headers, value)
+            return value
+
+    @staticmethod
+    async def _read_json(response: aiohttp.ClientResponse) -> Any:
+        return await response.json()
+
+    @staticmethod
+    async def _read_text(response: aiohttp.ClientResponse) -> str:
+        return await response.text()
+
     @abstractmethod
     async def collect(self) -> List[Dict[str, Any]]:
         """Collect trending data from the platform"""
         pass
+
+    def memo_key(self) -> Tuple:
+        """Identifies an equivalent fetch within one refresh"""
+        return (self.platform_name, self.limit)
+
+    async def collect_once(self) -> List[Dict[str, Any]]:
+        """collect(), shared with every other caller of the same fetch in the current refresh"""
+        context = current_context()
+        if context is None:
+            return await self.collect()
+        return await context.fetch(self.memo_key(), self.collect)
     
     def validate_data(self, data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Validate and clean collected data"""
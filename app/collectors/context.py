@@ -0,0 +1,58 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterator, Optional
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+_current: ContextVar[Optional["CollectionContext"]] = ContextVar("collection_context", default=None)
+
+class CollectionContext:
+    """Memo of collector fetches for one refresh, keyed by source and parameters
+
+    Every caller asking for the same key during the refresh shares one fetch,
+    whether it is still in flight or already done. Fallbacks record which
+    source they substituted so the snapshot can label it.
+    """
+
+    def __init__(self):
+        self._fetches: Dict[Hashable, asyncio.Future] = {}
+        self.substitutions: Dict[Hashable, str] = {}
+        self.fetches = 0
+        self.reused = 0
+
+    async def fetch(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._fetches.get(key)
+        if future is None:
+            self.fetches += 1
+            future = asyncio.ensure_future(fn())
+            # Retrieve the exception even if every caller gave up waiting
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            self._fetches[key] = future
+        else:
+            self.reused += 1
+            logger.info(f"📋 Reusing {key} fetched earlier in this refresh")
+        # One caller timing out must not cancel the fetch for the others
+        return await asyncio.shield(future)
+
+    def substitute(self, key: Hashable, source: str):
+        """Record that the collector behind `key` served `source`'s data instead of its own"""
+        self.substitutions[key] = source
+
+@contextmanager
+def collection_context() -> Iterator[CollectionContext]:
+    """Enter the current refresh's context, starting one if none is active"""
+    context = _current.get()
+    if context is not None:
+        yield context
+        return
+    context = CollectionContext()
+    token = _current.set(context)
+    try:
+        yield context
+    finally:
+        _current.reset(token)
+
+def current_context() -> Optional[CollectionContext]:
+    return _current.get()
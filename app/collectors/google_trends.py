@@ -1,13 +1,17 @@
 from typing import List, Dict, Any
 import logging
 from .base import BaseCollector
+from .context import current_context
+from .pytrends_pool import PyTrendsPool, pytrends_pool
 from .reddit import RedditCollector
-import asyncio
+from app.config import settings
+from app.utils.exceptions import RateLimitError
+from app.utils.rate_limit import parse_retry_after
 
 logger = logging.getLogger(__name__)
 
 try:
-    from pytrends.request import TrendReq
+    from pytrends.exceptions import TooManyRequestsError
     PYTRENDS_AVAILABLE = True
 except ImportError:
     PYTRENDS_AVAILABLE = False
@@ -16,23 +20,32 @@ except ImportError:
 logger = logging.getLogger(__name__)
 
 class GoogleTrendsCollector(BaseCollector):
-    def __init__(self, limit: int = 10):
+    rate_limit_key = 'google_trends'
+
+    def __init__(self, limit: int = 10, pool: PyTrendsPool = None):
         super().__init__(limit)
-        self.pytrends = TrendReq(hl='en-US', tz=360, timeout=(10, 25)) if PYTRENDS_AVAILABLE else None
+        # Warm TrendReq sessions are borrowed per call; constructing one costs a cookie round trip
+        self.pool = pool or pytrends_pool
 
     async def collect(self) -> List[Dict[str, Any]]:
-        if not PYTRENDS_AVAILABLE or not self.pytrends:
+        if not PYTRENDS_AVAILABLE:
             logger.info("Using Reddit data (pytrends unavailable)")
-            return await RedditCollector(self.limit).collect()
+            return await self._fallback()
             
         try:
-            loop = asyncio.get_event_loop()
-            
-            def get_trends():
-                trending = self.pytrends.trending_searches(pn='india')
+            def get_trends(pytrends):
+                trending = pytrends.trending_searches(pn='india')
                 return trending.head(self.limit).values.flatten().tolist()
             
-            trends_list = await loop.run_in_executor(None, get_trends)
+            await self.rate_limiter.acquire(max_wait=settings.RATE_LIMIT_MAX_WAIT)
+            try:
+                async with self.pool.session() as pytrends:
+                    trends_list = await self.pool.run(get_trends, pytrends)
+            except TooManyRequestsError as e:
+                headers = e.response.headers if e.response is not None else {}
+                delay = self.rate_limiter.penalize(parse_retry_after(headers.get('Retry-After')))
+                raise RateLimitError('google_trends', retry_after=round(delay))
+            self.rate_limiter.record_success()
             
             # Generate dynamic engagement scores based on trend position
             formatted_data = [
@@ -52,7 +65,17 @@ class GoogleTrendsCollector(BaseCollector):
             
             return self.validate_data(formatted_data)
             
+        except RateLimitError:
+            # Throttling is reported as such, not papered over with Reddit data
+            raise
         except Exception as e:
             logger.error(f"Error collecting Google Trends: {str(e)}")
             logger.info("Falling back to Reddit data due to API issues")
-            return await RedditCollector(self.limit).collect()
+            return await self._fallback()
+
+    async def _fallback(self) -> List[Dict[str, Any]]:
+        """Reddit data in place of Google's, reusing this refresh's Reddit fetch if there is one"""
+        context = current_context()
+        if context is not None:
+            context.substitute(self.memo_key(), 'reddit')
+        return await RedditCollector(self.limit).collect_once()
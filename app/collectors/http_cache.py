@@ -0,0 +1,102 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Mapping, Optional
+import logging
+import time
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+def freshness_lifetime(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds a response stays fresh per Cache-Control (max-age minus Age); None for no-store"""
+    directives = {}
+    for part in headers.get('Cache-Control', '').split(','):
+        name, _, value = part.strip().partition('=')
+        directives[name.lower()] = value.strip('"')
+    if 'no-store' in directives:
+        return None
+    if 'no-cache' in directives:
+        return 0.0
+    try:
+        max_age = float(directives.get('max-age', 0))
+        age = float(headers.get('Age', 0))
+    except ValueError:
+        return 0.0
+    return max(max_age - age, 0.0)
+
+class CachedResponse:
+    """Parsed payload of a response plus the validators to revalidate it with"""
+
+    __slots__ = ('value', 'etag', 'last_modified', 'expires')
+
+    def __init__(self, value: Any, etag: Optional[str], last_modified: Optional[str], expires: float):
+        self.value = value
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires = expires  # monotonic deadline
+
+    def fresh(self) -> bool:
+        return time.monotonic() < self.expires
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers: a 304 answer means `value` is still current"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+class HTTPCache:
+    """Process-wide LRU of parsed collector responses keyed by request
+
+    Fresh entries (Cache-Control max-age) are served without a request;
+    stale ones are revalidated with If-None-Match / If-Modified-Since and a
+    304 serves the stored value without downloading or parsing the body.
+    Cached values are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or settings.HTTP_CACHE_MAX_ENTRIES
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def store(self, key: Hashable, headers: Mapping[str, str], value: Any):
+        """Keep a 200 response's parsed value if it can be reused or revalidated later"""
+        lifetime = freshness_lifetime(headers)
+        etag, last_modified = headers.get('ETag'), headers.get('Last-Modified')
+        if lifetime is None or not (lifetime or etag or last_modified):
+            self._entries.pop(key, None)
+            return
+        self._entries[key] = CachedResponse(value, etag, last_modified, time.monotonic() + lifetime)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def refresh(self, entry: CachedResponse, headers: Mapping[str, str]):
+        """Apply a 304's headers: new freshness lifetime and, if sent, new validators"""
+        self.revalidated += 1
+        entry.expires = time.monotonic() + (freshness_lifetime(headers) or 0.0)
+        entry.etag = headers.get('ETag', entry.etag)
+        entry.last_modified = headers.get('Last-Modified', entry.last_modified)
+
+    def clear(self):
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+        }
+
+http_cache = HTTPCache()
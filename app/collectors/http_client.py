@@ -0,0 +1,61 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+import logging
+import aiohttp
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+class HTTPClient:
+    """Process-wide pooled aiohttp session shared by every collector"""
+
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def session(self) -> Optional[aiohttp.ClientSession]:
+        """The shared session, or None outside the app lifespan"""
+        if self._session is None or self._session.closed:
+            return None
+        return self._session
+
+    def create_session(self) -> aiohttp.ClientSession:
+        """Build a session with pooled keep-alive connections and a DNS cache"""
+        connector = aiohttp.TCPConnector(
+            limit=settings.HTTP_POOL_LIMIT,
+            limit_per_host=settings.HTTP_POOL_LIMIT_PER_HOST,
+            ttl_dns_cache=settings.HTTP_DNS_CACHE_TTL,
+            keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=settings.HTTP_TOTAL_TIMEOUT,
+            connect=settings.HTTP_CONNECT_TIMEOUT,
+            sock_read=settings.HTTP_READ_TIMEOUT,
+        )
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    async def start(self):
+        """Open the shared session (called from the FastAPI lifespan)"""
+        if self.session is None:
+            self._session = self.create_session()
+            logger.info("🌐 Shared HTTP session opened")
+
+    async def close(self):
+        """Close the shared session and its pooled connections"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+            logger.info("🌐 Shared HTTP session closed")
+
+    @asynccontextmanager
+    async def acquire(self, session: Optional[aiohttp.ClientSession] = None) -> AsyncIterator[aiohttp.ClientSession]:
+        """Yield the given or shared session; fall back to a short-lived one when neither is open"""
+        if session is not None and not session.closed:
+            yield session
+        elif self.session is not None:
+            yield self.session
+        else:
+            async with self.create_session() as temporary:
+                yield temporary
+
+http_client = HTTPClient()
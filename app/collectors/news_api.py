@@ -1,141 +1,125 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urlparse
+import asyncio
 import logging
 import random
+import xml.etree.ElementTree as ET
 import aiohttp
+from app.config import settings
+from app.utils.exceptions import DataCollectionError
+from app.utils.rate_limit import get_rate_limiter
 from .base import BaseCollector
 
 logger = logging.getLogger(__name__)
 
+CHUNK_SIZE = 8192
+
+def _local_name(tag: str) -> str:
+    """Tag without its XML namespace ("{http://www.w3.org/2005/Atom}entry" -> "entry")"""
+    return tag.rsplit('}', 1)[-1]
+
 class NewsAPICollector(BaseCollector):
-    """Free news collector using RSS feeds and mock data as fallback"""
+    """Free news collector using RSS feeds"""
+
+    rate_limit_key = 'news'
     
-    def __init__(self, limit: int = 10):
+    def __init__(
+        self,
+        limit: int = 10,
+        feeds: Optional[List[str]] = None,
+        items_per_feed: Optional[int] = None,
+        concurrency: Optional[int] = None,
+    ):
         super().__init__(limit)
-        self.rss_feeds = [
-            "https://feeds.bbci.co.uk/news/rss.xml",
-            "https://rss.cnn.com/rss/edition.rss",
-            "https://feeds.reuters.com/reuters/topNews",
-            "https://feeds.npr.org/1001/rss.xml"
-        ]
+        self.rss_feeds = list(feeds or settings.NEWS_FEEDS)
+        self.items_per_feed = items_per_feed or settings.NEWS_ITEMS_PER_FEED
+        self.concurrency = concurrency or settings.NEWS_FEED_CONCURRENCY
+
+    def memo_key(self) -> Tuple:
+        return (self.platform_name, self.limit, tuple(self.rss_feeds))
     
     async def collect(self) -> List[Dict[str, Any]]:
+        all_news = await self._collect_feeds()
+        if not all_news:
+            # ← NO FALLBACK - made-up news would be published as real trends
+            raise DataCollectionError('news', f"no items from any of {len(self.rss_feeds)} feeds")
+        return self.validate_data(all_news[:self.limit])
+
+    async def _collect_feeds(self) -> List[Dict[str, Any]]:
+        """Fetch feeds concurrently, at most `concurrency` at once, until `limit` items are in
+
+        Feeds still queued once enough items arrived are skipped and those in
+        flight are cancelled. Items come back in feed order.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        found: Dict[int, List[Dict[str, Any]]] = {}
+
+        def enough() -> bool:
+            return sum(len(items) for items in found.values()) >= self.limit
+
+        async def fetch(index: int, feed_url: str):
+            async with semaphore:
+                if enough():
+                    return
+                try:
+                    found[index] = await self._fetch_feed(feed_url)
+                except Exception as e:
+                    logger.warning(f"Failed to fetch from {feed_url}: {str(e)}")
+
+        pending = {asyncio.ensure_future(fetch(i, url)) for i, url in enumerate(self.rss_feeds)}
         try:
-            # Try to fetch from RSS feeds
-            async with aiohttp.ClientSession() as session:
-                all_news = []
-                for feed_url in self.rss_feeds:
-                    try:
-                        async with session.get(feed_url, timeout=10) as response:
-                            if response.status == 200:
-                                content = await response.text()
-                                # Simple RSS parsing - extract titles and links
-                                import xml.etree.ElementTree as ET
-                                root = ET.fromstring(content)
-                                items = root.findall('.//item')
-                                
-                                for item in items[:3]:  # Take 3 from each feed
-                                    title_elem = item.find('title')
-                                    link_elem = item.find('link')
-                                    
-                                    if title_elem is not None and link_elem is not None:
-                                        all_news.append({
-                                            'title': title_elem.text,
-                                            'platform': 'news',
-                                            'engagement_score': random.randint(500, 2000),
-                                            'url': link_elem.text,
-                                            'metadata': {
-                                                'source': feed_url.split('/')[2],
-                                                'type': 'news_article',
-                                                'published': item.find('pubDate').text if item.find('pubDate') is not None else None
-                                            }
-                                        })
-                                
-                                if len(all_news) >= self.limit:
-                                    break
-                    except Exception as e:
-                        logger.warning(f"Failed to fetch from {feed_url}: {str(e)}")
-                        continue
-                
-                if all_news:
-                    return self.validate_data(all_news[:self.limit])
-                
-        except Exception as e:
-            logger.error(f"Error collecting news data: {str(e)}")
-        
-        logger.info("Falling back to mock news data")
-        return self._get_mock_news_data()
-    
-    def _get_mock_news_data(self) -> List[Dict[str, Any]]:
-        """Provide mock news data when RSS feeds fail"""
-        mock_news = [
-            {
-                'title': 'AI Revolution: How Machine Learning is Transforming Content Creation',
-                'platform': 'news',
-                'engagement_score': 1850,
-                'url': 'https://example.com/ai-content-creation',
-                'metadata': {
-                    'source': 'TechNewsDaily',
-                    'type': 'technology',
-                    'published': '2024-01-15T12:00:00Z',
-                    'source': 'mock_data'
-                }
-            },
-            {
-                'title': 'Remote Work Trends 2024: Companies Embrace Hybrid Models',
-                'platform': 'news',
-                'engagement_score': 1420,
-                'url': 'https://example.com/remote-work-trends',
-                'metadata': {
-                    'source': 'BusinessWeekly',
-                    'type': 'business',
-                    'published': '2024-01-15T11:30:00Z',
-                    'source': 'mock_data'
-                }
-            },
-            {
-                'title': 'Gen Z Mental Health Crisis: New Study Reveals Alarming Statistics',
-                'platform': 'news',
-                'engagement_score': 2300,
-                'url': 'https://example.com/gen-z-mental-health',
-                'metadata': {
-                    'source': 'HealthJournal',
-                    'type': 'health',
-                    'published': '2024-01-15T10:15:00Z',
-                    'source': 'mock_data'
-                }
-            },
-            {
-                'title': 'Cryptocurrency Market Sees Surge as Bitcoin Hits New Highs',
-                'platform': 'news',
-                'engagement_score': 1680,
-                'url': 'https://example.com/crypto-surge',
-                'metadata': {
-                    'source': 'FinanceToday',
-                    'type': 'finance',
-                    'published': '2024-01-15T09:45:00Z',
-                    'source': 'mock_data'
-                }
-            },
-            {
-                'title': 'Climate Change Solutions: Tech Giants Lead Sustainability Efforts',
-                'platform': 'news',
-                'engagement_score': 1950,
-                'url': 'https://example.com/climate-tech',
-                'metadata': {
-                    'source': 'EcoWatch',
-                    'type': 'environment',
-                    'published': '2024-01-15T08:30:00Z',
-                    'source': 'mock_data'
-                }
+            while pending and not enough():
+                _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        return [item for index in sorted(found) for item in found[index]]
+
+    async def _fetch_feed(self, feed_url: str) -> List[Dict[str, Any]]:
+        host = urlparse(feed_url).netloc
+        return await self.fetch(
+            feed_url,
+            parse=lambda response: self._parse_feed(response, host),
+            # The parsed value holds only the first items_per_feed items
+            cache_key=('feed', self.items_per_feed),
+            # Feeds live on different hosts, so each host gets its own bucket
+            limiter=get_rate_limiter(f'news:{host}'),
+            timeout=aiohttp.ClientTimeout(total=settings.NEWS_FEED_TIMEOUT),
+        )
+
+    async def _parse_feed(self, response: aiohttp.ClientResponse, host: str) -> List[Dict[str, Any]]:
+        """Parse a feed as it streams in and stop reading once `items_per_feed` items are found"""
+        parser = ET.XMLPullParser(events=('end',))
+        items = []
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            parser.feed(chunk)
+            for _, elem in parser.read_events():
+                if _local_name(elem.tag) not in ('item', 'entry'):
+                    continue
+                item = self._parse_item(elem, host)
+                elem.clear()
+                if item is not None:
+                    items.append(item)
+                if len(items) >= self.items_per_feed:
+                    return items
+        return items
+
+    def _parse_item(self, elem: ET.Element, host: str) -> Optional[Dict[str, Any]]:
+        """RSS <item> or Atom <entry> to a trend dict; None without a title and link"""
+        fields = {_local_name(child.tag): child for child in elem}
+        title, link = fields.get('title'), fields.get('link')
+        if title is None or link is None:
+            return None
+        published = fields.get('pubDate', fields.get('published', fields.get('updated')))
+        return {
+            'title': title.text,
+            'platform': 'news',
+            'engagement_score': random.randint(500, 2000),
+            'url': link.text or link.get('href'),
+            'metadata': {
+                'source': host,
+                'type': 'news_article',
+                'published': published.text if published is not None else None
             }
-        ]
-        
-        # Randomly select and shuffle mock news
-        selected_news = random.sample(mock_news, min(self.limit, len(mock_news)))
-        random.shuffle(selected_news)
-        
-        # Add some variation to engagement scores
-        for news in selected_news:
-            news['engagement_score'] += random.randint(-200, 200)
-        
-        return self.validate_data(selected_news)
\ No newline at end of file
+        }
@@ -0,0 +1,151 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+import asyncio
+import logging
+import time
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    from pytrends.request import TrendReq
+    PYTRENDS_AVAILABLE = True
+except ImportError:
+    PYTRENDS_AVAILABLE = False
+
+def _keeps_session(error: BaseException) -> bool:
+    """Google answered with a 4xx: the connection and cookie still work
+
+    401/403 may mean the cookie itself was refused, and anything without a
+    response (transport errors, cancellation mid-call) leaves the session in
+    an unknown state.
+    """
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    return isinstance(error, Exception) and isinstance(status, int) and 400 <= status < 500 and status not in (401, 403)
+
+def _new_trendreq():
+    # The constructor fetches Google's NID cookie: a blocking network round trip
+    return TrendReq(hl='en-US', tz=360, timeout=(10, 25))
+
+class PyTrendsPool:
+    """Process-wide pool of warmed TrendReq sessions plus a dedicated executor
+
+    Sessions are bootstrapped (cookie fetched) in the background and handed
+    out exclusively, so collection latency does not include the bootstrap.
+    Cookies older than half of PYTRENDS_COOKIE_TTL are renewed by the
+    maintenance loop. A session whose call failed is discarded, except after
+    an ordinary 4xx such as a 429: the session is fine and discarding it
+    would drain the pool into inline bootstraps while Google keeps refusing.
+    """
+
+    def __init__(
+        self,
+        size: Optional[int] = None,
+        workers: Optional[int] = None,
+        cookie_ttl: Optional[float] = None,
+        factory: Optional[Callable[[], Any]] = None,
+    ):
+        self.size = size or settings.PYTRENDS_POOL_SIZE
+        self.workers = workers or settings.PYTRENDS_WORKERS
+        self.cookie_ttl = cookie_ttl or settings.PYTRENDS_COOKIE_TTL
+        self.factory = factory or _new_trendreq
+        self._idle: Deque[Tuple[float, Any]] = deque()  # (created, session)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._task: Optional[asyncio.Task] = None
+        self.created = 0
+        self.reused = 0
+        self.cold_starts = 0
+        self.discarded = 0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Small executor so blocking pytrends calls never queue behind (or starve) the default one"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pytrends")
+        return self._executor
+
+    async def run(self, fn: Callable, *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def _create(self) -> Tuple[float, Any]:
+        session = await self.run(self.factory)
+        self.created += 1
+        return time.monotonic(), session
+
+    def _age(self, entry: Tuple[float, Any]) -> float:
+        return time.monotonic() - entry[0]
+
+    @asynccontextmanager
+    async def session(self):
+        """Check out a warm session; bootstraps one inline only when the pool is empty"""
+        entry = None
+        while self._idle:
+            candidate = self._idle.popleft()
+            if self._age(candidate) < self.cookie_ttl:
+                entry = candidate
+                break
+        if entry is None:
+            self.cold_starts += 1
+            logger.info("pytrends pool empty, bootstrapping a session inline")
+            entry = await self._create()
+        else:
+            self.reused += 1
+
+        try:
+            yield entry[1]
+        except BaseException as e:
+            if not _keeps_session(e):
+                # The cookie may be what Google rejected; do not hand it out again
+                self.discarded += 1
+                raise
+            if len(self._idle) < self.size:
+                self._idle.append(entry)
+            raise
+        if len(self._idle) < self.size:
+            self._idle.append(entry)
+
+    async def warm(self):
+        """Renew ageing cookies and top the pool up to its size"""
+        self._idle = deque(e for e in self._idle if self._age(e) < self.cookie_ttl / 2)
+        while len(self._idle) < self.size:
+            try:
+                entry = await self._create()
+            except Exception as e:
+                logger.warning(f"⚠️ pytrends session bootstrap failed: {str(e)}")
+                return
+            self._idle.append(entry)
+
+    async def _maintain(self):
+        while True:
+            await self.warm()
+            await asyncio.sleep(self.cookie_ttl / 4)
+
+    def start(self):
+        """Warm the pool in the background and keep its cookies fresh"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._maintain())
+            logger.info(f"⏱️ pytrends pool warming {self.size} sessions")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self._idle.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "idle": len(self._idle),
+            "size": self.size,
+            "created": self.created,
+            "reused": self.reused,
+            "cold_starts": self.cold_starts,
+            "discarded": self.discarded,
+        }
+
+pytrends_pool = PyTrendsPool()
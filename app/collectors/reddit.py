@@ -1,43 +1,150 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
+import asyncio
+import heapq
+import itertools
 import logging
-import aiohttp
 from .base import BaseCollector
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+MAX_PAGE_SIZE = 100  # Reddit ignores larger `limit` values
+
 class RedditCollector(BaseCollector):
-    def __init__(self, limit: int = 10):
+    base_url = 'https://www.reddit.com'
+
+    def __init__(
+        self,
+        limit: int = 10,
+        subreddits: Optional[List[str]] = None,
+        listings: Optional[List[str]] = None,
+        posts_per_listing: Optional[int] = None,
+        concurrency: Optional[int] = None,
+    ):
         super().__init__(limit)
         self.headers = {'User-agent': getattr(settings, 'REDDIT_USER_AGENT', 'AIContentEngine/1.0')}
+        self.subreddits = list(subreddits or settings.REDDIT_SUBREDDITS)
+        self.listings = list(listings or settings.REDDIT_LISTINGS)
+        # 0 means "as many as the collector returns"
+        self.posts_per_listing = posts_per_listing or settings.REDDIT_POSTS_PER_LISTING or limit
+        self.concurrency = concurrency or settings.REDDIT_CONCURRENCY
+
+    def memo_key(self) -> Tuple:
+        return (
+            self.platform_name, self.limit, tuple(self.subreddits),
+            tuple(self.listings), self.posts_per_listing,
+        )
 
     async def collect(self) -> List[Dict[str, Any]]:
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f'https://www.reddit.com/r/all/hot.json?limit={self.limit}',
-                    headers=self.headers
-                ) as response:
-                    data = await response.json()
-                    
-                    posts = data['data']['children']
-                    formatted_data = [
-                        {
-                            'title': post['data']['title'],
-                            'platform': 'reddit',
-                            'engagement_score': post['data']['score'],
-                            'url': f"https://reddit.com{post['data']['permalink']}",
-                            'metadata': {
-                                'subreddit': post['data']['subreddit'],
-                                'comments': post['data']['num_comments'],
-                                'upvote_ratio': post['data'].get('upvote_ratio', 0)
-                            }
-                        }
-                        for post in posts
-                    ]
-                    
-                    return self.validate_data(formatted_data)
-                    
+            # Only the top `limit` posts by score are kept, however many pages stream past
+            top: List[Tuple[int, int, Dict[str, Any]]] = []
+            seen = set()
+            order = itertools.count()
+            async for post in self.iter_posts():
+                if post['url'] in seen:  # the same post in several listings
+                    continue
+                seen.add(post['url'])
+                entry = (post['engagement_score'] or 0, -next(order), post)
+                if len(top) < self.limit:
+                    heapq.heappush(top, entry)
+                elif entry > top[0]:
+                    heapq.heapreplace(top, entry)
+
+            formatted_data = [post for _, _, post in sorted(top, reverse=True)]
+            return self.validate_data(formatted_data)
+
         except Exception as e:
             logger.error(f"Error collecting Reddit trends: {str(e)}")
             raise  # ← NO FALLBACK - Fail honestly
+
+    async def iter_posts(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yield posts from every subreddit/listing pair as their pages arrive
+
+        Each pair is paginated with Reddit's `after` cursor; at most
+        `concurrency` page requests are in flight and as many pages unconsumed,
+        so pagination pauses while the consumer is busy. A failed pair is
+        logged and skipped; the first error is raised only if nothing was yielded.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        # Pages wait for a slot, so at most `concurrency` sit unconsumed; the queue
+        # itself is unbounded so end-of-pair markers never block, even on cancellation
+        slots = asyncio.Semaphore(self.concurrency)
+        queue: asyncio.Queue = asyncio.Queue()
+        errors: List[Exception] = []
+
+        async def paginate(subreddit: str, listing: str):
+            try:
+                async for page in self._pages(subreddit, listing, semaphore):
+                    await slots.acquire()
+                    queue.put_nowait(page)
+            except Exception as e:
+                logger.warning(f"⚠️ r/{subreddit}/{listing} failed: {str(e)}")
+                errors.append(e)
+
+        def finished(task: asyncio.Future):
+            if not task.cancelled():
+                queue.put_nowait(None)
+
+        tasks = [
+            asyncio.ensure_future(paginate(subreddit, listing))
+            for subreddit in self.subreddits
+            for listing in self.listings
+        ]
+        for task in tasks:
+            task.add_done_callback(finished)
+        yielded = 0
+        try:
+            remaining = len(tasks)
+            while remaining:
+                page = await queue.get()
+                if page is None:
+                    remaining -= 1
+                    continue
+                slots.release()
+                for post in page:
+                    yielded += 1
+                    yield post
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if errors and not yielded:
+            raise errors[0]
+
+    async def _pages(self, subreddit: str, listing: str, semaphore: asyncio.Semaphore) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Follow the `after` cursor until posts_per_listing posts or the listing runs out"""
+        wanted = self.posts_per_listing
+        after = None
+        while wanted > 0:
+            params = {'limit': min(wanted, MAX_PAGE_SIZE)}
+            if after:
+                params['after'] = after
+            if listing == 'top':
+                params['t'] = settings.REDDIT_TOP_WINDOW
+            async with semaphore:
+                data = await self.fetch(
+                    f'{self.base_url}/r/{subreddit}/{listing}.json',
+                    params=params,
+                    headers=self.headers
+                )
+
+            posts = data['data']['children']
+            yield [self._format_post(post['data']) for post in posts]
+            wanted -= len(posts)
+            after = data['data'].get('after')
+            if not posts or not after:
+                break
+
+    def _format_post(self, post: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'title': post['title'],
+            'platform': 'reddit',
+            'engagement_score': post['score'],
+            'url': f"https://reddit.com{post['permalink']}",
+            'metadata': {
+                'subreddit': post['subreddit'],
+                'comments': post['num_comments'],
+                'upvote_ratio': post.get('upvote_ratio', 0)
+            }
+        }
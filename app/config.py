@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List, Optional
 
 class Settings(BaseSettings):
     # API Settings
@@ -11,13 +11,141 @@ class Settings(BaseSettings):
     GROQ_API_KEY: str = ""
     AI_MODEL: str = "llama3-8b-8192"  # or "mixtral-8x7b-32768"
     MAX_TOKENS: int = 1500
+    MODEL_CONTEXT_WINDOW: int = 8192
+    PROMPT_TREND_TOKENS: int = 600  # cap on tokens spent listing trends
+
+    # LLM providers: AI_MODEL first, then fallbacks; hedge when a request outlives the percentile
+    AI_FALLBACK_MODELS: List[str] = []
+    LLM_HEDGE_ENABLED: bool = True
+    LLM_HEDGE_PERCENTILE: float = 95.0
+    LLM_HEDGE_MIN_SAMPLES: int = 20  # below this, LLM_HEDGE_DEFAULT_DELAY is used
+    LLM_HEDGE_DEFAULT_DELAY: float = 4.0
+    LLM_HEDGE_MIN_DELAY: float = 0.5
+    LLM_LATENCY_WINDOW: int = 200
+
+    # LLM response cache (disk tier is off unless a path is set)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_TTL: int = 3600
+    LLM_CACHE_MAX_ENTRIES: int = 256
+    LLM_CACHE_DISK_PATH: str = ""
+    LLM_CACHE_DISK_MAX_ENTRIES: int = 5000
+
+    # Batch analysis
+    BATCH_MAX_PAIRS: int = 50
+    BATCH_CONCURRENCY: int = 4  # LLM calls in flight per batch request
     
     # CORS
     ALLOWED_ORIGINS: List[str] = ["http://localhost:3000", "http://127.0.0.1:3000"]
     
     # Data Collection
     REDDIT_USER_AGENT: str = "AIContentEngine/1.0"
+    # Reddit listings paginated per subreddit; the top TRENDS_LIMIT posts by score are kept
+    REDDIT_SUBREDDITS: List[str] = ["all"]
+    REDDIT_LISTINGS: List[str] = ["hot"]  # any of hot, rising, new, top
+    REDDIT_POSTS_PER_LISTING: int = 0  # 0: the collector's limit; above 100 pages with `after`
+    REDDIT_CONCURRENCY: int = 4
+    REDDIT_TOP_WINDOW: str = "day"
     TRENDS_LIMIT: int = 10
+    # Per-source deadline (seconds) for a single collection run
+    COLLECTOR_TIMEOUTS: Dict[str, float] = {"google_trends": 15.0, "reddit": 10.0, "news": 10.0}
+    DEFAULT_COLLECTOR_TIMEOUT: float = 10.0
+
+    # RSS feeds for the news collector, fetched concurrently; each stops after NEWS_ITEMS_PER_FEED items
+    NEWS_FEEDS: List[str] = [
+        "https://feeds.bbci.co.uk/news/rss.xml",
+        "https://rss.cnn.com/rss/edition.rss",
+        "https://feeds.reuters.com/reuters/topNews",
+        "https://feeds.npr.org/1001/rss.xml",
+    ]
+    NEWS_ITEMS_PER_FEED: int = 3
+    NEWS_FEED_CONCURRENCY: int = 8
+    NEWS_FEED_TIMEOUT: float = 10.0
+
+    # Warm pytrends sessions (each holds a Google cookie) and their executor
+    PYTRENDS_POOL_SIZE: int = 2
+    PYTRENDS_WORKERS: int = 2
+    PYTRENDS_COOKIE_TTL: float = 1800.0
+
+    # Per-collector circuit breaker: open when this share of the last CIRCUIT_WINDOW calls failed
+    CIRCUIT_FAILURE_THRESHOLD: float = 0.5
+    CIRCUIT_WINDOW: int = 10
+    CIRCUIT_MIN_CALLS: int = 3
+    CIRCUIT_COOLDOWN: float = 120.0  # seconds open before a half-open probe
+
+    # Trending snapshot freshness and background refresh (seconds)
+    TRENDING_MAX_AGE: int = 900
+    BACKGROUND_REFRESH: bool = True
+    REFRESH_INTERVALS: Dict[str, float] = {"google_trends": 600.0, "reddit": 300.0, "news": 600.0}
+    DEFAULT_REFRESH_INTERVAL: float = 600.0
+    TRENDING_STALE_TTL: int = 86400  # how long last-good data may still be served
+
+    # Cache backend: "memory" (per worker), "sqlite" (per host) or "redis" (shared)
+    CACHE_BACKEND: str = "memory"
+    CACHE_MAX_ENTRIES: int = 1024
+    CACHE_MAX_BYTES: Optional[int] = None
+    CACHE_SQLITE_PATH: str = "cache.db"
+    CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+
+    # Append-only trend history (SQLite); snapshots are written in batches by a background task
+    TREND_STORE_ENABLED: bool = True
+    TREND_STORE_PATH: str = "trends.db"
+    TREND_STORE_BATCH_SIZE: int = 500
+    TREND_STORE_FLUSH_INTERVAL: float = 5.0
+    TREND_STORE_MAX_PENDING: int = 50000  # oldest unwritten rows are dropped past this
+    TREND_HISTORY_MAX_POINTS: int = 1000
+
+    # Trend velocity: per-topic score series over the last TREND_VELOCITY_WINDOW snapshots
+    TREND_VELOCITY_WINDOW: int = 24
+    TREND_VELOCITY_MAX_TOPICS: int = 50000
+    TREND_EMERGING_LIMIT: int = 20
+
+    # Decaying top-K trend index: scores halve every TREND_TOPK_HALF_LIFE_HOURS without a fresh observation
+    TREND_TOPK_HALF_LIFE_HOURS: float = 6.0
+    TREND_TOPK_MAX_ENTRIES: int = 100000
+
+    # Trend search: BM25 over the titles and metadata of every collected trend
+    TREND_SEARCH_MAX_DOCS: int = 300000
+    TREND_SEARCH_LIMIT: int = 20
+
+    # Cross-platform engagement score: weights of each feature's robust z-score within its platform
+    ENGAGEMENT_FEATURE_WEIGHTS: Dict[str, Dict[str, float]] = {
+        "reddit": {"engagement": 0.6, "comments": 0.3, "upvote_ratio": 0.1},
+        "google_trends": {"rank": 1.0},  # its scores are derived from list position
+        "news": {"rank": 1.0},           # RSS has no engagement; its scores are placeholders
+        "*": {"engagement": 0.7, "rank": 0.3},
+    }
+
+    # Near-duplicate trend clustering (MinHash/LSH over title shingles) before prompting
+    TREND_CLUSTER_ENABLED: bool = True
+    TREND_CLUSTER_NUM_PERM: int = 64
+    TREND_CLUSTER_BANDS: int = 16  # 16 bands of 4 rows: pairs above ~0.5 similarity become candidates
+    TREND_CLUSTER_THRESHOLD: float = 0.5
+
+    # Upstream rate limits: token-bucket rate (requests/s) and burst per upstream
+    RATE_LIMITS: Dict[str, Dict[str, float]] = {
+        "reddit": {"rate": 1.0, "burst": 5},  # Reddit's documented cap is 100 requests/min
+        "news": {"rate": 2.0, "burst": 4},
+        "google_trends": {"rate": 0.2, "burst": 2},
+        "groq": {"rate": 0.5, "burst": 5},  # applied per model
+    }
+    DEFAULT_RATE_LIMIT: float = 1.0
+    DEFAULT_RATE_BURST: float = 2
+    RATE_LIMIT_BASE_BACKOFF: float = 1.0
+    RATE_LIMIT_MAX_BACKOFF: float = 60.0
+    RATE_LIMIT_MAX_WAIT: float = 5.0  # longer waits raise RateLimitError instead of sleeping
+    RATE_LIMIT_RETRIES: int = 2
+
+    # Shared HTTP connection pool
+    HTTP_POOL_LIMIT: int = 100
+    HTTP_POOL_LIMIT_PER_HOST: int = 10
+    HTTP_KEEPALIVE_TIMEOUT: float = 30.0
+    HTTP_DNS_CACHE_TTL: int = 300
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP_READ_TIMEOUT: float = 10.0
+    HTTP_TOTAL_TIMEOUT: float = 20.0
+    # Conditional-request cache of parsed collector responses (ETag / Last-Modified / max-age)
+    HTTP_CACHE_ENABLED: bool = True
+    HTTP_CACHE_MAX_ENTRIES: int = 512
     
     class Config:
         env_file = ".env"
@@ -2,11 +2,44 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse, JSONResponse
+from contextlib import asynccontextmanager
 from pathlib import Path
+from app.analytics.search import trend_search_index
+from app.analytics.top_k import top_k_index
+from app.analytics.velocity import velocity_engine
+from app.api.dependencies import get_ai_analyzer
+from app.api.refresher import trending_refresher
 from app.api.routes import router
+from app.collectors.http_client import http_client
+from app.collectors.pytrends_pool import PYTRENDS_AVAILABLE, pytrends_pool
 from app.config import settings
+from app.storage.trend_store import trend_store
 
-app = FastAPI(title="AI Content Strategy Engine")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled HTTP session per process, shared by all collectors
+    await http_client.start()
+    if PYTRENDS_AVAILABLE:
+        pytrends_pool.start()
+    if settings.TREND_STORE_ENABLED:
+        trend_store.start()
+        trending_refresher.add_listener(trend_store.record)
+    trending_refresher.add_listener(velocity_engine.observe)
+    trending_refresher.add_listener(top_k_index.observe)
+    trending_refresher.add_listener(trend_search_index.observe)
+    if settings.BACKGROUND_REFRESH:
+        trending_refresher.start()
+    try:
+        yield
+    finally:
+        await trending_refresher.stop()
+        await trend_store.close()
+        if get_ai_analyzer.cache_info().currsize:
+            await get_ai_analyzer().close()
+        await pytrends_pool.stop()
+        await http_client.close()
+
+app = FastAPI(title="AI Content Strategy Engine", lifespan=lifespan)
 
 # Middleware
 app.add_middleware(
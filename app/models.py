@@ -9,10 +9,19 @@ class TrendItem(BaseModel):
     url: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
 
+# TrendingData field each collector's items are published under
+TRENDING_FIELDS = {
+    'google_trends': 'google_trends',
+    'reddit': 'reddit_trends',
+    'news': 'news_trends',
+}
+
 class TrendingData(BaseModel):
     google_trends: List[Dict[str, Any]]  # ← Fixed: Changed from List[str] to List[Dict[str, Any]]
     reddit_trends: List[Dict[str, Any]]
     news_trends: Optional[List[Dict[str, Any]]] = None
+    sources: Optional[Dict[str, Dict[str, Any]]] = None  # per-source status: ok / timeout / error
+    stale: bool = False  # served past its max age while a refresh runs
     timestamp: datetime = Field(default_factory=datetime.now)
 
 class ContentRecommendation(BaseModel):
@@ -35,6 +44,83 @@ class AnalysisRequest(BaseModel):
     niche: Optional[str] = "General"
     days: Optional[int] = 7
 
+class AudienceNiche(BaseModel):
+    target_audience: str = "Gen Z"
+    niche: str = "General"
+
+class BatchAnalysisRequest(BaseModel):
+    pairs: List[AudienceNiche] = Field(..., min_length=1)
+    trends_data: Optional[TrendingData] = None  # defaults to the current trending snapshot
+
+class BatchAnalysisResult(BaseModel):
+    target_audience: str
+    niche: str
+    status: str  # "ok" or "error"
+    strategy: Optional[StrategyResponse] = None
+    error: Optional[str] = None
+
+class BatchAnalysisResponse(BaseModel):
+    results: List[BatchAnalysisResult]  # in request order
+    unique_pairs: int
+    trends_timestamp: datetime
+
+class TrendObservation(BaseModel):
+    observed_at: datetime
+    platform: str
+    title: str
+    rank: int  # 1-based position within its source
+    score: Optional[float] = None
+    url: Optional[str] = None
+
+class TrendHistoryResponse(BaseModel):
+    title: str
+    normalized_title: str
+    since: datetime
+    until: datetime
+    points: List[TrendObservation]  # oldest first
+
+class EmergingTrend(BaseModel):
+    title: str
+    platforms: List[str]
+    score: float         # log1p(engagement) in the latest snapshot, summed over platforms
+    velocity: float      # change in score per hour at the latest snapshot
+    acceleration: float  # change in velocity per hour
+    momentum: float      # velocity z-scored across every tracked topic
+
+class EmergingTrendsResponse(BaseModel):
+    trends: List[EmergingTrend]  # highest momentum first
+    tracked_topics: int
+    snapshots: int
+    generated_at: datetime = Field(default_factory=datetime.now)
+
+class TopTrend(BaseModel):
+    title: str
+    platform: str
+    url: Optional[str] = None
+    score: float       # base_score decayed to now
+    base_score: float  # cross-platform engagement score when last observed
+    updated_at: datetime
+
+class TopTrendsResponse(BaseModel):
+    trends: List[TopTrend]  # highest score first
+    indexed: int
+    generated_at: datetime = Field(default_factory=datetime.now)
+
+class TrendSearchHit(BaseModel):
+    title: str
+    platform: str
+    url: Optional[str] = None
+    score: float  # BM25 relevance to the query
+    updated_at: datetime
+
+class TrendSearchResponse(BaseModel):
+    query: str
+    hits: List[TrendSearchHit]  # most relevant first
+    matched: int
+    indexed: int
+    took_ms: float
+    generated_at: datetime = Field(default_factory=datetime.now)
+
 class CompetitorData(BaseModel):
     username: str
     platform: str
@@ -0,0 +1,6 @@
+from .trend_store import TrendStore, trend_store
+
+__all__ = [
+    "TrendStore",
+    "trend_store"
+]
@@ -0,0 +1,203 @@
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import sqlite3
+from app.config import settings
+from app.models import TRENDING_FIELDS, TrendingData
+from app.utils.helper import normalize_title
+from app.utils.sqlite import SQLiteConnection
+
+logger = logging.getLogger(__name__)
+
+# (observed_at, platform, title, title_key, rank, score, url)
+Row = Tuple[float, str, str, str, int, Optional[float], Optional[str]]
+
+class TrendStore:
+    """Append-only SQLite log of every trend item in each published snapshot
+
+    record() only queues rows; a background task writes them in batches of
+    TREND_STORE_BATCH_SIZE (or every TREND_STORE_FLUSH_INTERVAL seconds) in
+    one transaction each. History queries hit the (title_key, observed_at)
+    index, so their cost follows the rows returned, not the table size.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_pending: Optional[int] = None,
+    ):
+        self.path = path or settings.TREND_STORE_PATH
+        self.batch_size = batch_size or settings.TREND_STORE_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.TREND_STORE_FLUSH_INTERVAL
+        self.max_pending = max_pending or settings.TREND_STORE_MAX_PENDING
+        self._pending: Deque[Row] = deque()
+        self._recorded: Dict[str, Any] = {}  # source -> refreshed_at last queued
+        self._db = SQLiteConnection(self.path, schema=(
+            "CREATE TABLE IF NOT EXISTS trend_observations ("
+            " id INTEGER PRIMARY KEY, observed_at REAL NOT NULL, platform TEXT NOT NULL,"
+            " title TEXT NOT NULL, title_key TEXT NOT NULL, rank INTEGER NOT NULL,"
+            " score REAL, url TEXT)",
+            "CREATE INDEX IF NOT EXISTS idx_trend_title_time ON trend_observations (title_key, observed_at)",
+            "CREATE INDEX IF NOT EXISTS idx_trend_time ON trend_observations (observed_at)",
+        ))
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+
+    def record(self, snapshot: TrendingData):
+        """Queue the snapshot's newly refreshed sources for writing; never blocks"""
+        observed_at = snapshot.timestamp.timestamp()
+        sources = snapshot.sources or {}
+        for source, field in TRENDING_FIELDS.items():
+            status = sources.get(source, {})
+            if status.get("stale"):
+                continue  # last-good items re-served, not a new observation
+            refreshed_at = status.get("refreshed_at")
+            if refreshed_at is not None:
+                if self._recorded.get(source) == refreshed_at:
+                    continue  # republished after another source's refresh
+                self._recorded[source] = refreshed_at
+            for rank, item in enumerate(getattr(snapshot, field) or [], start=1):
+                title = item.get("title")
+                if title:
+                    self._pending.append((
+                        observed_at, item.get("platform") or source, title, normalize_title(title),
+                        rank, item.get("engagement_score"), item.get("url"),
+                    ))
+
+        overflow = len(self._pending) - self.max_pending
+        for _ in range(max(overflow, 0)):
+            self._pending.popleft()
+        if overflow > 0:
+            self.dropped += overflow
+            logger.warning(f"⚠️ Trend store backlog full, dropped {overflow} rows")
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+
+    def _insert(self, conn: sqlite3.Connection, rows: List[Row]):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO trend_observations (observed_at, platform, title, title_key, rank, score, url)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    async def flush(self) -> int:
+        """Write every queued row now; returns how many were written"""
+        written = 0
+        while self._pending:
+            rows = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            try:
+                await self._db.run(self._insert, rows)
+            except Exception:
+                self._pending.extendleft(reversed(rows))  # retried on the next flush
+                raise
+            written += len(rows)
+            self.batches += 1
+        self.written += written
+        return written
+
+    async def _writer(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning(f"⚠️ Trend store write failed: {str(e)}")
+
+    def start(self):
+        """Start the background batch writer"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._writer())
+
+    async def stop(self):
+        """Stop the writer after flushing what is queued"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.warning(f"⚠️ Trend store final flush failed: {str(e)}")
+
+    def _history(
+        self,
+        conn: sqlite3.Connection,
+        title_key: str,
+        since: float,
+        until: float,
+        platform: Optional[str],
+        limit: int,
+    ) -> List[Dict[str, Any]]:
+        query = (
+            "SELECT observed_at, platform, title, rank, score, url FROM trend_observations"
+            " WHERE title_key = ? AND observed_at >= ? AND observed_at <= ?"
+        )
+        params: List[Any] = [title_key, since, until]
+        if platform:
+            query += " AND platform = ?"
+            params.append(platform)
+        # Newest `limit` points, returned oldest first
+        query += " ORDER BY observed_at DESC LIMIT ?"
+        params.append(limit)
+        rows = conn.execute(query, params).fetchall()
+        return [
+            {
+                "observed_at": datetime.fromtimestamp(observed_at),
+                "platform": row_platform,
+                "title": title,
+                "rank": rank,
+                "score": score,
+                "url": url,
+            }
+            for observed_at, row_platform, title, rank, score, url in reversed(rows)
+        ]
+
+    async def history(
+        self,
+        title: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        platform: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Observations of one topic (matched on its normalized title) between since and until"""
+        return await self._db.run(
+            self._history,
+            normalize_title(title),
+            since.timestamp() if since else 0.0,
+            (until or datetime.now()).timestamp(),
+            platform,
+            limit or settings.TREND_HISTORY_MAX_POINTS,
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "writer_running": self._task is not None,
+        }
+
+    async def close(self):
+        await self.stop()
+        self._db.close()
+
+trend_store = TrendStore()
@@ -1,11 +1,23 @@
-from .helpers import format_timestamp, clean_text, calculate_engagement_score
-from .exceptions import DataCollectionError, AIAnalysisError, ValidationError
+from .helper import format_timestamp, clean_text, normalize_title, calculate_engagement_score, extract_keywords, extract_keywords_batch
+from .exceptions import DataCollectionError, AIAnalysisError, ValidationError, RateLimitError, CircuitOpenError
+from .singleflight import SingleFlight
+from .rate_limit import RateLimiter, get_rate_limiter
+from .circuit_breaker import CircuitBreaker
 
 __all__ = [
     "format_timestamp",
     "clean_text", 
+    "normalize_title",
     "calculate_engagement_score",
+    "extract_keywords",
+    "extract_keywords_batch",
     "DataCollectionError",
     "AIAnalysisError",
-    "ValidationError"
+    "ValidationError",
+    "RateLimitError",
+    "CircuitOpenError",
+    "SingleFlight",
+    "RateLimiter",
+    "get_rate_limiter",
+    "CircuitBreaker"
 ]
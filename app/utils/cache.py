@@ -0,0 +1,397 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from app.config import settings
+from app.utils.sqlite import SQLiteConnection
+
+logger = logging.getLogger(__name__)
+
+def _dumps(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":"), default=str).encode("utf-8")
+
+def _loads(payload: bytes) -> Any:
+    return json.loads(payload)
+
+class CacheBackend(ABC):
+    """Async key/value cache with TTLs; values must be JSON-serialisable"""
+
+    name = "base"
+
+    def __init__(self, namespace: str = "default"):
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired"""
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a value, optionally expiring after ttl seconds"""
+
+    @abstractmethod
+    async def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Store a value only if the key is absent; returns whether it was stored"""
+
+    @abstractmethod
+    async def delete(self, key: str):
+        """Remove a key"""
+
+    @abstractmethod
+    async def clear(self):
+        """Remove every key in this namespace"""
+
+    @abstractmethod
+    async def _usage(self) -> Dict[str, Any]:
+        """Backend-specific entry count and bytes used"""
+
+    def _record(self, value: Optional[Any]) -> Optional[Any]:
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """Hit rate, evictions and bytes used"""
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.name,
+            "namespace": self.namespace,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            **await self._usage(),
+        }
+
+class MemoryCache(CacheBackend):
+    """In-process cache with per-key TTL and LRU eviction"""
+
+    name = "memory"
+
+    def __init__(self, namespace: str = "default", max_entries: int = 1024, max_bytes: Optional[int] = None):
+        super().__init__(namespace)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Optional[float], bytes]]" = OrderedDict()
+        self._bytes = 0
+
+    def _live_payload(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, payload = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        return payload
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+    def _store(self, key: str, value: Any, ttl: Optional[float]):
+        payload = _dumps(value)
+        self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl if ttl else None, payload)
+        self._bytes += len(payload)
+        self._evict()
+
+    def _evict(self):
+        over = lambda: len(self._entries) > self.max_entries or (self.max_bytes and self._bytes > self.max_bytes)
+        if not over():
+            return
+        now = time.monotonic()
+        for key in [k for k, (expires_at, _) in self._entries.items() if expires_at is not None and expires_at <= now]:
+            self._remove(key)
+        while over() and len(self._entries) > 1:
+            key, (_, payload) = self._entries.popitem(last=False)
+            self._bytes -= len(payload)
+            self.evictions += 1
+
+    async def get(self, key: str) -> Optional[Any]:
+        payload = self._live_payload(key)
+        if payload is not None:
+            self._entries.move_to_end(key)
+        return self._record(None if payload is None else _loads(payload))
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self._store(key, value, ttl)
+
+    async def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        if self._live_payload(key) is not None:
+            return False
+        self._store(key, value, ttl)
+        return True
+
+    async def delete(self, key: str):
+        self._remove(key)
+
+    async def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    async def _usage(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "bytes_used": self._bytes}
+
+class SQLiteCache(CacheBackend):
+    """On-disk cache shared by every worker on the host; LRU-evicted past max_entries"""
+
+    name = "sqlite"
+
+    def __init__(self, namespace: str = "default", path: str = "cache.db", max_entries: int = 1024):
+        super().__init__(namespace)
+        self.path = path
+        self.max_entries = max_entries
+        self._db = SQLiteConnection(path, schema=(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            " namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL,"
+            " expires_at REAL, accessed_at REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))",
+            "CREATE INDEX IF NOT EXISTS idx_cache_entries_lru ON cache_entries (namespace, accessed_at)",
+        ))
+
+    def _get(self, conn: sqlite3.Connection, key: str) -> Optional[bytes]:
+        now = time.time()
+        row = conn.execute(
+            "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+            (self.namespace, key),
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] is not None and row[1] <= now:
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key))
+            return None
+        conn.execute(
+            "UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+            (now, self.namespace, key),
+        )
+        return row[0]
+
+    def _set(self, conn: sqlite3.Connection, key: str, payload: bytes, ttl: Optional[float], only_if_absent: bool) -> bool:
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if only_if_absent:
+                conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND key = ? AND expires_at <= ?",
+                    (self.namespace, key, now),
+                )
+                verb = "INSERT OR IGNORE"
+            else:
+                verb = "INSERT OR REPLACE"
+            cursor = conn.execute(
+                f"{verb} INTO cache_entries (namespace, key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, payload, expires_at, now),
+            )
+            stored = cursor.rowcount == 1
+            if stored:
+                self.evictions += self._evict(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return stored
+
+    def _evict(self, conn: sqlite3.Connection) -> int:
+        (count,) = conn.execute("SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)).fetchone()
+        excess = count - self.max_entries
+        if excess <= 0:
+            return 0
+        conn.execute(
+            "DELETE FROM cache_entries WHERE rowid IN ("
+            " SELECT rowid FROM cache_entries WHERE namespace = ? ORDER BY accessed_at LIMIT ?)",
+            (self.namespace, excess),
+        )
+        return excess
+
+    async def get(self, key: str) -> Optional[Any]:
+        payload = await self._db.run(self._get, key)
+        return self._record(None if payload is None else _loads(payload))
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        await self._db.run(self._set, key, _dumps(value), ttl, False)
+
+    async def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        return await self._db.run(self._set, key, _dumps(value), ttl, True)
+
+    async def delete(self, key: str):
+        await self._db.run(lambda conn: conn.execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key)
+        ))
+
+    async def clear(self):
+        await self._db.run(lambda conn: conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,)))
+
+    async def _usage(self) -> Dict[str, Any]:
+        entries, bytes_used = await self._db.run(lambda conn: conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM cache_entries WHERE namespace = ?",
+            (self.namespace,),
+        ).fetchone())
+        return {"entries": entries, "bytes_used": bytes_used}
+
+class RedisError(Exception):
+    """Error reply from a Redis-protocol server"""
+
+class RedisCache(CacheBackend):
+    """Cache on any Redis-protocol server, shared by every worker and host"""
+
+    name = "redis"
+
+    def __init__(self, namespace: str = "default", url: str = "redis://localhost:6379/0"):
+        super().__init__(namespace)
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.password = parsed.password
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    @staticmethod
+    def _encode(args: Tuple[Any, ...]) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    async def _read_reply(self) -> Any:
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        prefix, body = line[:1], line[1:-2]
+        if prefix == b"+":
+            return body.decode()
+        if prefix == b"-":
+            raise RedisError(body.decode())
+        if prefix == b":":
+            return int(body)
+        if prefix == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            return (await self._reader.readexactly(length + 2))[:-2]
+        if prefix == b"*":
+            length = int(body)
+            if length < 0:
+                return None
+            return [await self._read_reply() for _ in range(length)]
+        raise RedisError(f"Unexpected reply: {line!r}")
+
+    async def _send(self, *args: Any) -> Any:
+        self._writer.write(self._encode(args))
+        await self._writer.drain()
+        return await self._read_reply()
+
+    async def _command(self, *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Streams are bound to the loop that opened them
+            self._loop, self._lock, self._writer = loop, asyncio.Lock(), None
+
+        async with self._lock:
+            try:
+                if self._writer is None or self._writer.is_closing():
+                    self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+                    if self.password:
+                        await self._send("AUTH", self.password)
+                    if self.db:
+                        await self._send("SELECT", self.db)
+                return await self._send(*args)
+            except BaseException:
+                # A failed or cancelled command can leave its reply unread on the
+                # connection, where the next command would read it: start over
+                if self._writer is not None:
+                    self._writer.close()
+                self._writer = None
+                raise
+
+    async def _safe(self, default: Any, *args: Any) -> Any:
+        """Run a command, degrading to a cache miss if the server is unreachable"""
+        try:
+            return await self._command(*args)
+        except (OSError, asyncio.IncompleteReadError) as e:
+            logger.warning(f"Redis cache unavailable: {str(e)}")
+            return default
+
+    async def get(self, key: str) -> Optional[Any]:
+        payload = await self._safe(None, "GET", self._key(key))
+        return self._record(None if payload is None else _loads(payload))
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        args = ["SET", self._key(key), _dumps(value)]
+        if ttl:
+            args += ["PX", int(ttl * 1000)]
+        await self._safe(None, *args)
+
+    async def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        args = ["SET", self._key(key), _dumps(value), "NX"]
+        if ttl:
+            args += ["PX", int(ttl * 1000)]
+        # Unreachable counts as not stored: a lease nobody could record is not held
+        return await self._safe(None, *args) == "OK"
+
+    async def delete(self, key: str):
+        await self._safe(0, "DEL", self._key(key))
+
+    async def _scan_keys(self) -> List[bytes]:
+        keys, cursor = [], b"0"
+        while True:
+            cursor, batch = await self._command("SCAN", cursor, "MATCH", f"{self.namespace}:*", "COUNT", 500)
+            keys.extend(batch)
+            if cursor in (b"0", "0"):
+                return keys
+
+    async def clear(self):
+        cursor = b"0"
+        while True:
+            reply = await self._safe(None, "SCAN", cursor, "MATCH", f"{self.namespace}:*", "COUNT", 500)
+            if reply is None:
+                return
+            cursor, keys = reply
+            if keys:
+                await self._safe(0, "DEL", *keys)
+            if cursor in (b"0", "0"):
+                return
+
+    async def _usage(self) -> Dict[str, Any]:
+        try:
+            keys = await self._scan_keys()
+            info = (await self._command("INFO")).decode()
+        except (OSError, asyncio.IncompleteReadError, RedisError) as e:
+            return {"entries": None, "bytes_used": None, "error": str(e)}
+        fields = dict(line.split(":", 1) for line in info.splitlines() if ":" in line)
+        usage = {"entries": len(keys), "bytes_used": int(fields.get("used_memory", 0))}
+        if "evicted_keys" in fields:
+            # Server-wide evictions are what matter for a shared Redis
+            usage["server_evictions"] = int(fields["evicted_keys"])
+        return usage
+
+def create_cache(namespace: str, max_entries: Optional[int] = None) -> CacheBackend:
+    """Build the cache backend selected by Settings.CACHE_BACKEND"""
+    backend = settings.CACHE_BACKEND.lower()
+    max_entries = max_entries or settings.CACHE_MAX_ENTRIES
+    if backend == "memory":
+        return MemoryCache(namespace, max_entries=max_entries, max_bytes=settings.CACHE_MAX_BYTES)
+    if backend == "sqlite":
+        return SQLiteCache(namespace, path=settings.CACHE_SQLITE_PATH, max_entries=max_entries)
+    if backend == "redis":
+        return RedisCache(namespace, url=settings.CACHE_REDIS_URL)
+    raise ValueError(f"Unknown cache backend: {settings.CACHE_BACKEND}")
@@ -0,0 +1,112 @@
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+import logging
+import time
+from app.config import settings
+from .exceptions import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker driven by the failure rate of recent calls
+
+    Closed: calls run and their outcomes fill a sliding window; once it holds
+    `min_calls` outcomes and the failure rate reaches `failure_threshold`, the
+    circuit opens. Open: calls fail fast with CircuitOpenError until `cooldown`
+    has passed. Half-open: one probe call runs; success closes the circuit,
+    failure opens it for another cooldown.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: Optional[float] = None,
+        window: Optional[int] = None,
+        min_calls: Optional[int] = None,
+        cooldown: Optional[float] = None,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold or settings.CIRCUIT_FAILURE_THRESHOLD
+        self.min_calls = min_calls or settings.CIRCUIT_MIN_CALLS
+        self.cooldown = cooldown or settings.CIRCUIT_COOLDOWN
+        self.outcomes = deque(maxlen=window or settings.CIRCUIT_WINDOW)  # True = failure
+        self.state = CLOSED
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self.opens = 0
+        self.rejected = 0
+
+    @property
+    def failure_rate(self) -> float:
+        return sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+    def retry_in(self) -> float:
+        if self.state != OPEN:
+            return 0.0
+        return max(self.opened_at + self.cooldown - time.monotonic(), 0.0)
+
+    def allow(self):
+        """Admit a call or raise CircuitOpenError"""
+        if self.state == OPEN and self.retry_in() == 0:
+            self.state = HALF_OPEN
+            logger.info(f"🔄 {self.name} circuit half-open, probing")
+        if self.state == OPEN or (self.state == HALF_OPEN and self._probing):
+            self.rejected += 1
+            raise CircuitOpenError(self.name, retry_after=round(self.retry_in()))
+        if self.state == HALF_OPEN:
+            self._probing = True
+
+    def record_success(self):
+        self._probing = False
+        if self.state == HALF_OPEN:
+            logger.info(f"✅ {self.name} circuit closed")
+            self.state = CLOSED
+            self.outcomes.clear()
+        self.outcomes.append(False)
+
+    def record_failure(self):
+        self._probing = False
+        self.outcomes.append(True)
+        if self.state == HALF_OPEN or (
+            len(self.outcomes) >= self.min_calls and self.failure_rate >= self.failure_threshold
+        ):
+            self._open()
+
+    def release(self):
+        """End a call whose outcome says nothing about the upstream's health"""
+        self._probing = False
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.opens += 1
+        logger.warning(
+            f"❌ {self.name} circuit open for {self.cooldown:g}s "
+            f"(failure rate {self.failure_rate:.0%} over {len(self.outcomes)} calls)"
+        )
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        self.allow()
+        try:
+            result = await fn()
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "failure_rate": round(self.failure_rate, 3),
+            "window": len(self.outcomes),
+            "retry_in": round(self.retry_in(), 1),
+            "opens": self.opens,
+            "rejected": self.rejected,
+        }
@@ -32,3 +32,13 @@ class RateLimitError(AIContentEngineError):
         if retry_after:
             message += f". Retry after {retry_after} seconds"
         super().__init__(message)
+
+class CircuitOpenError(AIContentEngineError):
+    """Raised when a call is rejected because the upstream's circuit is open"""
+    def __init__(self, platform: str, retry_after: int = None):
+        self.platform = platform
+        self.retry_after = retry_after
+        message = f"Circuit open for {platform}"
+        if retry_after:
+            message += f". Retry after {retry_after} seconds"
+        super().__init__(message)
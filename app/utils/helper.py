@@ -1,10 +1,16 @@
 from datetime import datetime
 import re
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+_WHITESPACE = re.compile(r'\s+')
+_SPECIAL_CHARS = re.compile(r'[^\w\s\-\.\!\?]')
+_WORD = re.compile(r'\w+')
+
+STOP_WORDS = frozenset({'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were'})
+
 def format_timestamp(timestamp: datetime = None) -> str:
     """Format timestamp to ISO string"""
     if timestamp is None:
@@ -17,25 +23,29 @@ def clean_text(text: str) -> str:
         return ""
     
     # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text.strip())
+    text = _WHITESPACE.sub(' ', text.strip())
     
     # Remove special characters but keep basic punctuation
-    text = re.sub(r'[^\w\s\-\.\!\?]', '', text)
+    text = _SPECIAL_CHARS.sub('', text)
     
     return text
 
+def normalize_title(title: str) -> str:
+    """Lowercased, punctuation-free title used to match one topic across snapshots"""
+    return clean_text(title).lower().strip(' -.!?')
+
 def calculate_engagement_score(item: Dict[str, Any]) -> float:
     """Calculate normalized engagement score"""
     platform = item.get('platform', '')
-    metadata = item.get('metadata', {})
+    metadata = item.get('metadata') or {}
     
     if platform == 'reddit':
-        score = item.get('engagement_score', 0)
-        comments = metadata.get('comments', 0)
+        score = item.get('engagement_score') or 0
+        comments = metadata.get('comments') or 0
         return (score * 0.7) + (comments * 0.3)
     
     else:
-        return item.get('engagement_score', 0)
+        return item.get('engagement_score') or 0
 
 def truncate_text(text: str, max_length: int = 100) -> str:
     """Truncate text to specified length"""
@@ -43,10 +53,14 @@ def truncate_text(text: str, max_length: int = 100) -> str:
         return text
     return text[:max_length-3] + "..."
 
-def extract_keywords(text: str) -> List[str]:
+def extract_keywords(text: str, limit: int = 10) -> List[str]:
     """Extract potential keywords from text"""
-    words = clean_text(text.lower()).split()
-    # Filter out common words and short words
-    stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were'}
-    keywords = [word for word in words if len(word) > 3 and word not in stop_words]
-    return keywords[:10]  # Return top 10 keywords
+    return extract_keywords_batch([text], limit=limit)[0]
+
+def extract_keywords_batch(texts: Iterable[str], min_length: int = 4, limit: Optional[int] = None) -> List[List[str]]:
+    """Lowercased words of each text in order, stop words and words under min_length characters dropped"""
+    find_words = _WORD.findall
+    return [
+        [word for word in find_words((text or "").lower()) if len(word) >= min_length and word not in STOP_WORDS][:limit]
+        for text in texts
+    ]
@@ -0,0 +1,152 @@
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Mapping, Optional
+import asyncio
+import logging
+import math
+import random
+import time
+from app.config import settings
+from .exceptions import RateLimitError
+
+logger = logging.getLogger(__name__)
+
+MIN_RATE_FRACTION = 0.1  # throttling never slows an upstream below 10% of its configured rate
+RECOVERY_STEP = 0.05     # each success wins back 5% of the configured rate
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+class RateLimiter:
+    """Async token bucket for one upstream, with AIMD adaptation to throttling
+
+    Callers reserve tokens up front, so concurrent callers are spaced 1/rate
+    apart instead of waking together. A 429 halves the rate and blocks the
+    bucket for Retry-After (or an exponential backoff with jitter); each
+    success adds back a small step of the configured rate.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: float = 1,
+        base_backoff: Optional[float] = None,
+        max_backoff: Optional[float] = None,
+    ):
+        self.name = name
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.base_backoff = base_backoff or settings.RATE_LIMIT_BASE_BACKOFF
+        self.max_backoff = max_backoff or settings.RATE_LIMIT_MAX_BACKOFF
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()  # may lie in the future while blocked
+        self.strikes = 0
+        self.acquired = 0
+        self.waited = 0
+        self.throttled = 0
+        self.rejected = 0
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def reserve(self) -> float:
+        """Take a token and return how long the caller must wait before using it"""
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens -= 1
+        return max(self.updated - now, 0.0) + max(-self.tokens, 0.0) / self.rate
+
+    async def acquire(self, max_wait: Optional[float] = None):
+        """Wait for a token; raise RateLimitError instead if that takes longer than max_wait"""
+        wait = self.reserve()
+        if max_wait is not None and wait > max_wait:
+            self.tokens += 1  # hand the reservation back
+            self.rejected += 1
+            raise RateLimitError(self.name, retry_after=math.ceil(wait))
+        self.acquired += 1
+        if wait > 0:
+            self.waited += 1
+            await asyncio.sleep(wait)
+
+    def block(self, seconds: float):
+        """Hold every caller back for at least `seconds`"""
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens = min(self.tokens, 0.0)
+        self.updated = max(self.updated, now + seconds)
+
+    def penalize(self, retry_after: Optional[float] = None) -> float:
+        """Record a throttling response; returns the delay imposed on the bucket"""
+        self.throttled += 1
+        self.strikes += 1
+        self.rate = max(self.max_rate * MIN_RATE_FRACTION, self.rate / 2)
+        if retry_after is None:
+            ceiling = min(self.max_backoff, self.base_backoff * 2 ** (self.strikes - 1))
+            delay = random.uniform(ceiling / 2, ceiling)
+        else:
+            # A little jitter so workers honouring the same header do not return in lockstep
+            delay = retry_after + random.uniform(0, self.base_backoff)
+        self.block(delay)
+        logger.warning(f"⏰ {self.name} throttled: backing off {delay:.1f}s, rate now {self.rate:.2f}/s")
+        return delay
+
+    def record_success(self, headers: Optional[Mapping[str, str]] = None):
+        self.strikes = 0
+        self.rate = min(self.max_rate, self.rate + self.max_rate * RECOVERY_STEP)
+        if headers:
+            self._observe_quota(headers)
+
+    def _observe_quota(self, headers: Mapping[str, str]):
+        """Pause before the quota runs out when the upstream reports it (Reddit's x-ratelimit-*)"""
+        remaining, reset = headers.get("x-ratelimit-remaining"), headers.get("x-ratelimit-reset")
+        try:
+            if remaining is not None and reset is not None and float(remaining) < 1:
+                self.block(float(reset))
+        except ValueError:
+            pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "rate": round(self.rate, 3),
+            "configured_rate": self.max_rate,
+            "burst": self.burst,
+            "blocked_for": round(max(self.updated - time.monotonic(), 0.0), 1),
+            "acquired": self.acquired,
+            "waited": self.waited,
+            "throttled": self.throttled,
+            "rejected": self.rejected,
+        }
+
+_limiters: Dict[str, RateLimiter] = {}
+
+def get_rate_limiter(name: str) -> RateLimiter:
+    """Process-wide limiter for an upstream; "groq:<model>" falls back to the "groq" settings"""
+    if name not in _limiters:
+        config = settings.RATE_LIMITS.get(name) or settings.RATE_LIMITS.get(name.split(":")[0]) or {}
+        _limiters[name] = RateLimiter(
+            name,
+            rate=config.get("rate", settings.DEFAULT_RATE_LIMIT),
+            burst=config.get("burst", settings.DEFAULT_RATE_BURST),
+        )
+    return _limiters[name]
+
+def get_rate_limit_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: limiter.get_stats() for name, limiter in _limiters.items()}
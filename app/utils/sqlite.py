@@ -0,0 +1,38 @@
+from typing import Any, Callable, Optional, Sequence, TypeVar
+import asyncio
+import sqlite3
+import threading
+
+T = TypeVar("T")
+
+class SQLiteConnection:
+    """One lazily opened WAL-mode sqlite connection, used from worker threads one call at a time"""
+
+    def __init__(self, path: str, schema: Sequence[str] = ()):
+        self.path = path
+        self.schema = schema  # statements run once when the connection opens
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in self.schema:
+                conn.execute(statement)
+            self._conn = conn
+        return self._conn
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run a blocking sqlite call off the event loop"""
+        def locked():
+            with self._lock:
+                return fn(self.connect(), *args)
+        return await asyncio.to_thread(locked)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Benchmark: /health latency while LLM completions are in flight
+
+Runs the app in-process with a stand-in Groq client that takes LLM_DELAY
+seconds per completion, once blocking (the old synchronous client) and once
+async, and reports /health latency percentiles measured meanwhile.
+
+    python scripts/bench_event_loop.py
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+os.environ.setdefault("BACKGROUND_REFRESH", "false")
+
+import httpx
+from app.ai.analyzer import AIAnalyzer
+from app.ai.cache import LLMResponseCache
+from app.ai.providers import GroqProvider, HedgedLLM
+from app.main import app
+from app.models import TrendingData
+from app.utils.rate_limit import RateLimiter
+
+LLM_DELAY = 1.0
+CONCURRENT_CALLS = 4
+HEALTH_PROBES = 100
+PROBE_INTERVAL = 0.03
+
+RESPONSE = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(
+    content='{"top_trends": [], "content_strategy": [], "analysis_summary": "ok"}'
+))])
+
+class BlockingCompletions:
+    async def create(self, **kwargs):
+        time.sleep(LLM_DELAY)  # what the synchronous Groq client did inside async code
+        return RESPONSE
+
+class AsyncCompletions:
+    async def create(self, **kwargs):
+        await asyncio.sleep(LLM_DELAY)
+        return RESPONSE
+
+async def measure(completions) -> list:
+    analyzer = AIAnalyzer(cache=LLMResponseCache(enabled=False))
+    analyzer.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    analyzer.llm = HedgedLLM([GroqProvider(analyzer.client, analyzer.model, limiter=RateLimiter("groq", rate=1000, burst=1000))])
+    trends = [
+        TrendingData(google_trends=[], reddit_trends=[{"title": f"topic {i}", "platform": "reddit"}])
+        for i in range(CONCURRENT_CALLS)
+    ]
+
+    latencies = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def probe():
+            # Fixed schedule: latency counts from when the probe was due, so time
+            # spent waiting on a blocked event loop is included
+            started = time.perf_counter()
+            for i in range(HEALTH_PROBES):
+                due = started + i * PROBE_INTERVAL
+                await asyncio.sleep(max(due - time.perf_counter(), 0))
+                await client.get("/health")
+                latencies.append((time.perf_counter() - due) * 1000)
+
+        async def analyze(i: int, trending: TrendingData):
+            # Stagger the calls so they overlap the probes
+            await asyncio.sleep(0.1 + i * LLM_DELAY / 2)
+            await analyzer.analyze_trends(trending)
+
+        await asyncio.gather(probe(), *(analyze(i, t) for i, t in enumerate(trends)))
+    return latencies
+
+def report(label: str, latencies: list):
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"{label:<10} p50={statistics.median(ordered):8.2f} ms  p99={p99:8.2f} ms  max={ordered[-1]:8.2f} ms")
+
+async def main():
+    print(f"/health latency with {CONCURRENT_CALLS} LLM calls of {LLM_DELAY}s in flight")
+    report("blocking", await measure(BlockingCompletions()))
+    report("async", await measure(AsyncCompletions()))
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Microbenchmark: LLM JSON parsing, previous inline approach vs app.ai.parser
+
+    python scripts/bench_json_parser.py
+"""
+
+import json
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.ai.parser import StreamingJSONParser, parse_llm_json
+
+CLEAN_JSON_REGEX = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+def legacy_parse(ai_response: str):
+    """The parsing AIAnalyzer.analyze_trends used to do inline"""
+    clean_response = ai_response.strip().replace('`json', '').replace('`', '')
+    json_start = clean_response.find('{')
+    json_end = clean_response.rfind('}') + 1
+    if json_start == -1 or json_end <= json_start:
+        raise ValueError("No valid JSON found in Groq response")
+    json_str = clean_response[json_start:json_end]
+    sanitized_json_str = CLEAN_JSON_REGEX.sub('', json_str)
+    fixed_json_str = re.sub(r",(\s*[\]}])", r"\1", sanitized_json_str)
+    return json.loads(fixed_json_str)
+
+def build_response(items: int) -> str:
+    return json.dumps({
+        "top_trends": [
+            {"title": f"Trend {i}", "platform": "reddit", "engagement_score": i * 10,
+             "url": f"https://example.com/{i}", "metadata": {"analysis": "why this trend works " * 3}}
+            for i in range(items)
+        ],
+        "content_strategy": [
+            {"title": f"Idea {i}", "format": "Reel", "platform": "Instagram", "best_time": "7 PM IST",
+             "hook": "Tutorial", "description": "Detailed content description " * 4}
+            for i in range(items)
+        ],
+        "analysis_summary": "Key insights and recommendations based on the trends",
+    }, indent=2)
+
+def defective(text: str) -> str:
+    # Markdown fence, trailing commas and a stray control character
+    return "```json\n" + text.replace("\n  ]", ",\n  ]").replace('"Reel"', '"Reel"\x0b') + "\n```"
+
+def run(label: str, fn, text: str, number: int):
+    try:
+        fn(text)
+    except Exception as e:
+        print(f"  {label:<22} fails: {type(e).__name__}")
+        return
+    seconds = timeit.timeit(lambda: fn(text), number=number)
+    print(f"  {label:<22} {seconds / number * 1e6:10.1f} µs/parse")
+
+def streamed(text: str, chunk_size: int = 16):
+    parser = StreamingJSONParser()
+    for i in range(0, len(text), chunk_size):
+        parser.feed(text[i:i + chunk_size])
+    return parser.finish()
+
+def main():
+    for items in (10, 200):
+        clean = build_response(items)
+        cases = {
+            "clean": clean,
+            "fenced + defects": defective(clean),
+            "truncated at 70%": clean[:int(len(clean) * 0.7)],
+        }
+        for name, text in cases.items():
+            number = 2000 if items == 10 else 100
+            print(f"{items} items, {name} ({len(text) / 1024:.1f} KiB)")
+            run("legacy", legacy_parse, text, number)
+            run("parse_llm_json", lambda t: parse_llm_json(t).value, text, number)
+            run("streaming, 16-char", streamed, text, number // 4 or 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+import asyncio
+import json
+import re
+import pytest
+from types import SimpleNamespace
+from app.ai.analyzer import AIAnalyzer
+from app.ai.cache import LLMResponseCache
+from app.ai import parser as parser_module
+from app.ai.parser import StreamingJSONParser, parse_llm_json
+from app.ai.prompt_builder import PromptBuilder, estimate_tokens
+from app.ai.providers import GroqProvider, HedgedLLM, LLMProviderError, LocalProvider
+from app.config import settings
+from app.models import TrendingData, TrendItem
+from app.utils.cache import MemoryCache, SQLiteCache
+from app.utils.rate_limit import RateLimiter
+
+STRATEGY_JSON = json.dumps({
+    "top_trends": [{"title": "AI", "platform": "reddit", "engagement_score": 100}],
+    "content_strategy": [{
+        "title": "AI explained", "format": "Reel", "platform": "Instagram",
+        "best_time": "7 PM", "hook": "Tutorial", "description": "Short explainer"
+    }],
+    "analysis_summary": "AI is trending"
+})
+
+
+class FakeCompletions:
+    def __init__(self, content=STRATEGY_JSON, delay=0.0):
+        self.content = content
+        self.delay = delay
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self.content))])
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    monkeypatch.setattr(settings, "GROQ_API_KEY", "test-key")
+    analyzer = AIAnalyzer(cache=LLMResponseCache(memory=MemoryCache("llm-test"), enabled=True))
+    analyzer.completions = FakeCompletions()
+    analyzer.client = SimpleNamespace(chat=SimpleNamespace(completions=analyzer.completions))
+    analyzer.llm = HedgedLLM([GroqProvider(analyzer.client, analyzer.model, limiter=RateLimiter("groq", rate=1000, burst=1000))])
+    return analyzer
+
+
+def _trends(reddit_titles):
+    return TrendingData(
+        google_trends=[{"title": "Elections", "platform": "google_trends"}],
+        reddit_trends=[{"title": t, "platform": "reddit"} for t in reddit_titles],
+    )
+
+
+class TestLLMResponseCache:
+
+    def test_key_depends_on_model_prompt_and_params(self):
+        key = LLMResponseCache.make_key("m", "prompt", {"temperature": 0.7, "max_tokens": 10})
+        assert key == LLMResponseCache.make_key("m", "prompt", {"max_tokens": 10, "temperature": 0.7})
+        assert key != LLMResponseCache.make_key("m2", "prompt", {"temperature": 0.7, "max_tokens": 10})
+        assert key != LLMResponseCache.make_key("m", "prompt", {"temperature": 0.2, "max_tokens": 10})
+
+    @pytest.mark.asyncio
+    async def test_disk_tier_hit_is_promoted(self, tmp_path):
+        disk = SQLiteCache("llm", path=str(tmp_path / "llm.db"))
+        await LLMResponseCache(memory=MemoryCache("a"), disk=disk, enabled=True).set("k", {"v": 1})
+
+        cache = LLMResponseCache(memory=MemoryCache("b"), disk=disk, enabled=True)
+        assert await cache.get("k") == {"v": 1}
+        assert await cache.memory.get("k") == {"v": 1}
+        stats = await cache.get_stats()
+        assert stats["hits"] == 1 and stats["disk_hits"] == 1
+
+
+class TestAIAnalyzer:
+
+    @pytest.mark.asyncio
+    async def test_repeat_analysis_is_served_from_cache(self, analyzer):
+        first = await analyzer.analyze_trends(_trends(["Cats", "Dogs"]), "Gen Z", "Tech")
+        # Same trends in a different order hit the same entry
+        second = await analyzer.analyze_trends(_trends(["Dogs", "Cats"]), "Gen Z", "Tech")
+
+        assert analyzer.completions.calls == 1
+        assert second.content_strategy[0].title == first.content_strategy[0].title
+        stats = await analyzer.cache.get_stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_different_audience_misses(self, analyzer):
+        await analyzer.analyze_trends(_trends(["Cats"]), "Gen Z", "Tech")
+        await analyzer.analyze_trends(_trends(["Cats"]), "Millennials", "Tech")
+        assert analyzer.completions.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_cache_entry_belongs_to_the_provider_chain(self, analyzer):
+        await analyzer.analyze_trends(_trends(["Cats"]), "Gen Z", "Tech")
+        backup = LocalProvider("backup", STRATEGY_JSON)
+        analyzer.llm = HedgedLLM([LocalProvider("primary", error=RuntimeError("down")), backup], hedge=False)
+
+        # Same prompt, different chain: the earlier answer is not reused
+        await analyzer.analyze_trends(_trends(["Cats"]), "Gen Z", "Tech")
+        assert backup.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_unparseable_response_is_not_cached(self, analyzer):
+        analyzer.completions.content = "no json here"
+        with pytest.raises(ValueError):
+            await analyzer.analyze_trends(_trends(["Cats"]))
+        assert (await analyzer.cache.memory.get_stats())["entries"] == 0
+
+    @pytest.mark.asyncio
+    async def test_truncated_response_returns_partial_strategy_uncached(self, analyzer):
+        analyzer.completions.content = STRATEGY_JSON[:STRATEGY_JSON.index('"content_strategy"')]
+
+        strategy = await analyzer.analyze_trends(_trends(["Cats"]))
+
+        assert [t.title for t in strategy.top_trends] == ["AI"]
+        assert strategy.content_strategy == []
+        assert (await analyzer.cache.memory.get_stats())["entries"] == 0
+
+    @pytest.mark.asyncio
+    async def test_completions_do_not_block_the_event_loop(self, analyzer):
+        analyzer.completions.delay = 0.3
+        gaps = []
+
+        async def ticker():
+            loop = asyncio.get_running_loop()
+            last = loop.time()
+            for _ in range(15):
+                await asyncio.sleep(0.02)
+                now = loop.time()
+                gaps.append(now - last)
+                last = now
+
+        await asyncio.gather(
+            ticker(),
+            *(analyzer.analyze_trends(_trends([f"Topic {i}"])) for i in range(3)),
+        )
+
+        assert analyzer.completions.calls == 3
+        assert max(gaps) < 0.15
+
+    @pytest.mark.asyncio
+    async def test_batch_dedupes_bounds_concurrency_and_keeps_order(self, analyzer):
+        in_flight = peak = 0
+        create = analyzer.completions.create
+
+        async def tracking_create(**kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            try:
+                if "NICHE: Broken" in kwargs["messages"][0]["content"]:
+                    raise RuntimeError("upstream error")
+                return await create(**kwargs)
+            finally:
+                in_flight -= 1
+
+        analyzer.completions.delay = 0.02
+        analyzer.client.chat.completions = SimpleNamespace(create=tracking_create)
+        pairs = [("Gen Z", "Tech"), ("Gen Z", "Broken"), ("Gen Z", "Tech")] + [("Millennials", f"N{i}") for i in range(4)]
+
+        results = await analyzer.analyze_batch(_trends(["Cats"]), pairs, concurrency=2)
+
+        assert len(results) == len(pairs)
+        assert results[0] is results[2]
+        assert isinstance(results[1], LLMProviderError)
+        assert "upstream error" in str(results[1])
+        assert all(r.analysis_summary == "AI is trending" for i, r in enumerate(results) if i != 1)
+        assert analyzer.completions.calls == 5  # 6 unique pairs, one failed before calling
+        assert peak == 2
+
+
+class TestPromptBuilder:
+
+    def _data(self):
+        return TrendingData(
+            google_trends=[
+                {"title": f"Search {i}", "platform": "google_trends", "engagement_score": 1000 - i * 100}
+                for i in range(8)
+            ],
+            reddit_trends=[
+                {"title": "Huge post", "platform": "reddit", "engagement_score": 90000, "metadata": {"comments": 5000}},
+                {"title": "Small post", "platform": "reddit", "engagement_score": 40, "metadata": None},
+                {"title": "search 0", "platform": "reddit", "engagement_score": 10},
+            ],
+            news_trends=[{"title": "  Breaking\n   story  ", "platform": "news", "engagement_score": 1500}],
+        )
+
+    def test_ranks_by_normalized_engagement_across_sources(self):
+        ranked = PromptBuilder().rank(self._data())
+        titles = [t["title"] for t in ranked]
+
+        # Robust z-scores within each platform: the outlier post leads, list order ranks searches
+        assert titles[0] == "Huge post"
+        assert titles.index("Search 0") < titles.index("Search 1") < titles.index("Small post")
+        assert all(0 < t["weight"] < 1 for t in ranked)
+        # Duplicate titles across sources are listed once
+        assert sum(t.lower() == "search 0" for t in titles) == 1
+
+    def test_packs_best_trends_into_the_budget(self):
+        builder = PromptBuilder(trend_tokens=40)
+        prompt = builder.build(self._data(), "Gen Z", "Tech")
+
+        assert prompt.included + prompt.dropped == 11
+        assert 0 < prompt.included < 11
+        assert "Huge post" in prompt.text and "Small post" not in prompt.text
+        # A lone news item has nothing to be compared with: a typical 0.50
+        assert "- Breaking story (news, 0.50)" in prompt.text
+        assert "NICHE: Tech" in prompt.text
+        # No indentation or blank lines are sent
+        assert not any(line != line.strip() or not line for line in prompt.text.splitlines())
+
+    def test_near_duplicate_stories_share_one_line(self):
+        data = TrendingData(
+            google_trends=[{"title": "Taylor Swift Eras Tour", "platform": "google_trends", "engagement_score": 1000}],
+            reddit_trends=[
+                {"title": "Taylor Swift's Eras Tour breaks records", "platform": "reddit", "engagement_score": 50},
+                {"title": "Top post", "platform": "reddit", "engagement_score": 5000},
+            ],
+        )
+        prompt = PromptBuilder().build(data, "Gen Z", "Music")
+        assert re.search(r"- Taylor Swift Eras Tour \(google_trends\+reddit, 0\.\d\d\)", prompt.text)
+        assert "breaks records" not in prompt.text
+        assert prompt.included == 2
+
+    def test_budget_leaves_room_for_the_completion(self):
+        builder = PromptBuilder(context_window=2000, max_tokens=1500, trend_tokens=10000)
+        assert 0 < builder.budget("Gen Z", "Tech") < 2000 - 1500 - estimate_tokens(builder.template) // 2
+
+        with pytest.raises(ValueError):
+            PromptBuilder(context_window=1000, max_tokens=1000).build(self._data(), "Gen Z", "Tech")
+
+
+class TestHedgedLLM:
+
+    @pytest.mark.asyncio
+    async def test_fast_primary_is_not_hedged(self):
+        primary, backup = LocalProvider("primary", "a"), LocalProvider("backup", "b")
+        llm = HedgedLLM([primary, backup], hedge=True, default_delay=0.2)
+
+        assert await llm.complete("p", {}) == ("a", "primary")
+        assert backup.calls == 0 and llm.hedges == 0
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_is_hedged_and_cancelled(self):
+        primary = LocalProvider("primary", "slow", delay=0.3)
+        backup = LocalProvider("backup", "fast", delay=0.01)
+        llm = HedgedLLM([primary, backup], hedge=True, min_samples=3, min_delay=0.0)
+        for seconds in (0.02, 0.03, 0.04):
+            primary.latency.record(seconds)
+
+        started = asyncio.get_running_loop().time()
+        completion = await llm.complete("p", {})
+
+        assert completion == ("fast", "backup")
+        # Hedged after the primary's observed p95 (40 ms), not after its full 300 ms
+        assert asyncio.get_running_loop().time() - started < 0.15
+        assert llm.hedges == 1 and llm.hedge_wins == 1
+        assert len(primary.latency.samples) == 3  # the cancelled request recorded nothing
+
+    @pytest.mark.asyncio
+    async def test_errors_fall_back_along_the_chain(self):
+        llm = HedgedLLM([
+            LocalProvider("a", error=RuntimeError("down")),
+            LocalProvider("b", error=TimeoutError("timeout")),
+            LocalProvider("c", "ok"),
+        ], hedge=False)
+
+        assert await llm.complete("p", {}) == ("ok", "c")
+        assert llm.fallbacks == 2
+
+        llm.providers = llm.providers[:2]
+        with pytest.raises(LLMProviderError) as exc:
+            await llm.complete("p", {})
+        assert [name for name, _ in exc.value.errors] == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_stream_falls_back_before_any_text(self):
+        llm = HedgedLLM([LocalProvider("a", error=RuntimeError("down")), LocalProvider("b", "streamed text", chunk_size=4)])
+        chunks = [chunk async for chunk in llm.stream("p", {})]
+        assert {name for name, _ in chunks} == {"b"}
+        assert "".join(delta for _, delta in chunks) == "streamed text"
+
+
+class FakeStream:
+    def __init__(self, text, chunk_size=7):
+        self.chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for chunk in self.chunks:
+            await asyncio.sleep(0)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=chunk))])
+
+
+class TestStreamingJSONParser:
+
+    def test_emits_items_as_they_close(self):
+        parser = StreamingJSONParser()
+        text = "```json\n" + STRATEGY_JSON + "\n```"
+        events = []
+        emitted_at = []
+        for i, char in enumerate(text):
+            for event in parser.feed(char):
+                events.append(event)
+                emitted_at.append(i)
+
+        assert [key for key, _ in events] == ["top_trends", "content_strategy"]
+        assert events[0][1]["title"] == "AI"
+        # The first item is available long before the document ends
+        assert emitted_at[0] < len(text) // 2
+        assert parser.finish() == (json.loads(STRATEGY_JSON), False, False)
+
+    def test_braces_inside_strings_are_ignored(self):
+        parser = StreamingJSONParser()
+        events = parser.feed('{"top_trends": [{"title": "a } [ \\" {", "platform": "x"}]}')
+        assert events == [("top_trends", {"title": 'a } [ " {', "platform": "x"})]
+
+
+    def test_items_are_not_decoded_when_only_the_document_is_wanted(self):
+        parser = StreamingJSONParser(emit_items=False)
+        assert parser.feed(STRATEGY_JSON.replace("]", ",]", 1)) == []
+        value, truncated, repaired = parser.finish()
+        assert value == json.loads(STRATEGY_JSON) and not truncated and repaired
+
+class TestParseLLMJSON:
+
+    @pytest.mark.parametrize("raw, expected", [
+        ('Here you go:\n```json\n{"a": [1, 2,], "b": {"c": "x",},}\n```', {"a": [1, 2], "b": {"c": "x"}}),
+        ('{"a": 1,, "b": 2}', {"a": 1, "b": 2}),
+        ('{"a": {"x": 1} "b": ["y" "z"]}', {"a": {"x": 1}, "b": ["y", "z"]}),
+        ('{"a": True, "b": None}', {"a": True, "b": None}),
+        ('{"a": [1, 2}', {"a": [1, 2]}),
+        ('{"a": "tab\x01inside",\x0b "b": }', {"a": "tab\x01inside", "b": None}),
+    ])
+    def test_repairs_common_defects(self, raw, expected):
+        parsed = parse_llm_json(raw)
+        assert parsed.value == expected
+        assert parsed.repaired
+
+    def test_well_formed_input_takes_the_fast_path(self):
+        assert parse_llm_json(STRATEGY_JSON) == (json.loads(STRATEGY_JSON), False, False)
+
+    def test_trailing_commas_and_control_characters_skip_the_scanner(self, monkeypatch):
+        def no_scanner(*args, **kwargs):
+            raise AssertionError("the repairing parser should not be needed")
+
+        monkeypatch.setattr(parser_module, 'StreamingJSONParser', no_scanner)
+        raw = '```json\n{"a": "keep, ] and \x0b", "b": [1, 2,],\x0b "c": "q\\", }", "d": {"e": 1,},}\n```'
+        parsed = parse_llm_json(raw)
+
+        assert parsed.value == {"a": "keep, ] and \x0b", "b": [1, 2], "c": 'q", }', "d": {"e": 1}}
+        assert parsed.repaired and not parsed.truncated
+
+    def test_truncation_keeps_complete_values_only(self):
+        cut = STRATEGY_JSON[:STRATEGY_JSON.index('"description"') + 20]
+        parsed = parse_llm_json(cut)
+
+        assert parsed.truncated
+        assert parsed.value["top_trends"] == json.loads(STRATEGY_JSON)["top_trends"]
+        # The half-written description is dropped rather than invented
+        assert "description" not in parsed.value["content_strategy"][0]
+
+    def test_no_json_raises(self):
+        with pytest.raises(ValueError):
+            parse_llm_json("I cannot help with that")
+
+
+class TestStreamAnalysis:
+
+    @pytest.mark.asyncio
+    async def test_streams_items_then_done_and_caches(self, analyzer):
+        async def create(**kwargs):
+            assert kwargs["stream"] is True
+            analyzer.completions.calls += 1
+            return FakeStream(STRATEGY_JSON)
+
+        analyzer.completions.create = create
+        events = [event async for event in analyzer.stream_analysis(_trends(["Cats"]))]
+
+        assert [name for name, _ in events] == ["trend", "recommendation", "done"]
+        assert isinstance(events[0][1], TrendItem)
+        assert events[-1][1].analysis_summary == "AI is trending"
+
+        # Replayed from the cache without another completion
+        replay = [name async for name, _ in analyzer.stream_analysis(_trends(["Cats"]))]
+        assert replay == ["trend", "recommendation", "done"]
+        assert analyzer.completions.calls == 1
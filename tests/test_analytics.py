@@ -0,0 +1,409 @@
+import time
+import numpy as np
+import pytest
+from datetime import datetime, timedelta
+from app.analytics.clustering import TrendClusterer, shingles
+from app.analytics.search import TrendSearchIndex
+from app.analytics.scoring import EngagementScorer, robust_z
+from app.analytics.top_k import TopKIndex
+from app.analytics.velocity import VelocityEngine
+from app.models import TrendingData
+
+
+def _snapshot(timestamp, reddit=(), news=()):
+    return TrendingData(
+        google_trends=[],
+        reddit_trends=[{'title': t, 'platform': 'reddit', 'engagement_score': s} for t, s in reddit],
+        news_trends=[{'title': t, 'platform': 'news', 'engagement_score': s} for t, s in news],
+        timestamp=timestamp,
+    )
+
+
+class TestVelocityEngine:
+
+    def test_accelerating_topic_ranks_first_and_peaked_topics_are_excluded(self):
+        engine = VelocityEngine(window=6)
+        start = datetime(2024, 1, 15, 8)
+        rising = [10, 20, 60, 300, 2000]
+        peaked = [10, 500, 2000, 2500, 2600]  # still growing, but slowing down
+        falling = [5000, 3000, 1000, 400, 100]
+        for hour in range(5):
+            engine.observe(_snapshot(
+                start + timedelta(hours=hour),
+                reddit=[('Rising Topic', rising[hour]), ('Peaked', peaked[hour]), ('Falling', falling[hour]), ('Flat', 800)],
+                news=[('rising topic!', rising[hour])],
+            ))
+
+        emerging = engine.emerging()
+        assert [t['title'] for t in emerging] == ['Rising Topic']
+        assert emerging[0]['platforms'] == ['news', 'reddit']
+        assert emerging[0]['velocity'] > 0 and emerging[0]['acceleration'] > 0
+
+        metrics = engine.metrics()
+        flat = engine.index['flat']
+        assert abs(metrics['velocity'][flat]) < 1e-6
+        assert metrics['velocity'][engine.index['falling']] < 0
+
+    def test_series_roll_over_the_window(self):
+        engine = VelocityEngine(window=3)
+        start = datetime(2024, 1, 15)
+        for hour, score in enumerate([1000, 1000, 1000, 10, 100, 1000]):
+            engine.observe(_snapshot(start + timedelta(hours=hour), reddit=[('Topic', score)]))
+        # Only the last three snapshots (10, 100, 1000) remain
+        assert engine.get_stats()['snapshots'] == 3
+        assert engine.metrics()['velocity'][0] > 0
+        assert engine.emerging()[0]['title'] == 'Topic'
+
+    def test_topic_count_is_bounded_by_evicting_quiet_topics(self):
+        engine = VelocityEngine(window=4, max_topics=100)
+        now = datetime(2024, 1, 15)
+        engine.observe(_snapshot(now, reddit=[(f'topic {n}', n) for n in range(100)]))
+        engine.observe(_snapshot(now + timedelta(hours=1), reddit=[('newcomer', 50)]))
+        stats = engine.get_stats()
+        assert stats['tracked_topics'] == 51
+        assert stats['evicted'] == 50
+        assert 'topic 99' in engine.index and 'topic 0' not in engine.index
+        assert engine.titles[engine.index['newcomer']] == 'newcomer'
+
+    def test_metrics_for_tens_of_thousands_of_topics_in_one_pass(self):
+        engine = VelocityEngine(window=24, max_topics=50000)
+        rng = np.random.default_rng(0)
+        start = datetime(2024, 1, 15)
+        titles = [f'topic {n}' for n in range(20000)]
+        for hour in range(24):
+            scores = rng.integers(0, 5000, size=len(titles))
+            engine.observe(_snapshot(start + timedelta(hours=hour), reddit=list(zip(titles, scores.tolist()))))
+
+        started = time.perf_counter()
+        emerging = engine.emerging(limit=10)
+        elapsed = time.perf_counter() - started
+        assert len(emerging) == 10
+        assert [t['momentum'] for t in emerging] == sorted((t['momentum'] for t in emerging), reverse=True)
+        assert elapsed < 1.0
+
+
+class TestTrendClusterer:
+
+    def test_same_story_across_platforms_merges_into_one_item(self):
+        items = [
+            {'title': 'Taylor Swift Eras Tour', 'platform': 'google_trends', 'engagement_score': 1000, 'weight': 1.0},
+            {'title': 'iPhone 16 launch', 'platform': 'google_trends', 'engagement_score': 900, 'weight': 0.9},
+            {'title': "Taylor Swift's Eras Tour breaks records", 'platform': 'reddit', 'engagement_score': 52000,
+             'url': 'https://reddit.com/r/x/1', 'metadata': {'subreddit': 'music'}, 'weight': 0.8},
+            {'title': 'iPhone 15 price cut', 'platform': 'news', 'engagement_score': 700, 'weight': 0.5},
+            {'title': 'Eras Tour: Taylor Swift breaks box office records', 'platform': 'news',
+             'engagement_score': 1500, 'weight': 0.5},
+            {'title': 'The', 'platform': 'news', 'engagement_score': 1},
+        ]
+        merged = TrendClusterer().merge(items)
+
+        assert [t.title for t in merged] == ['Taylor Swift Eras Tour', 'iPhone 16 launch', 'iPhone 15 price cut', 'The']
+        swift = merged[0]
+        assert swift.platform == 'google_trends'
+        assert swift.engagement_score == 1000 + 52000 + 1500
+        assert swift.metadata['cluster_size'] == 3
+        assert swift.metadata['platforms'] == ['google_trends', 'news', 'reddit']
+        assert swift.metadata['related_titles'][0] == "Taylor Swift's Eras Tour breaks records"
+        assert swift.metadata['weight'] == 1.0
+        assert merged[2].metadata['weight'] == 0.5
+
+    def test_dedupe_folds_clusters_into_their_best_scored_member(self):
+        items = [
+            {'title': 'Taylor Swift Eras Tour', 'platform': 'google_trends', 'score': 0.5},
+            {'title': 'iPhone 16 launch', 'platform': 'google_trends', 'score': 0.4},
+            {'title': "Taylor Swift's Eras Tour breaks records", 'platform': 'reddit', 'score': 0.8,
+             'metadata': {'subreddit': 'music'}},
+            {'title': 'Eras Tour: Taylor Swift breaks box office records', 'platform': 'news', 'score': 0.5},
+        ]
+        kept = TrendClusterer().dedupe(items)
+
+        assert [position for position, _ in kept] == [1, 2]
+        swift = kept[1][1]
+        assert swift['title'] == "Taylor Swift's Eras Tour breaks records"
+        assert swift['score'] == pytest.approx(1 - 0.5 * 0.2 * 0.5)
+        assert swift['metadata']['subreddit'] == 'music'
+        assert swift['metadata']['platforms'] == ['google_trends', 'news', 'reddit']
+        assert swift['metadata']['cluster_size'] == 3
+        assert kept[0][1] is items[1]
+
+        # Merging an already folded item keeps what it stands for
+        merged = TrendClusterer().merge([swift, items[1]])
+        assert merged[0].metadata['platforms'] == ['google_trends', 'news', 'reddit']
+        assert merged[0].metadata['cluster_size'] == 3
+        assert len(merged[0].metadata['related_titles']) == 2
+
+    def test_shingles_ignore_stop_words_and_word_endings(self):
+        assert shingles('OpenAI releases GPT-5') == shingles('the openai released GPT-5!')
+        assert shingles('iphone 15') != shingles('iphone 16')
+
+    def test_thousands_of_items_cluster_in_near_linear_time(self):
+        rng = np.random.default_rng(7)
+        stories = [[f'w{n}' for n in rng.choice(5000, size=6, replace=False)] for _ in range(2000)]
+        items = []
+        for words in stories:
+            items.append({'title': ' '.join(words), 'platform': 'google_trends'})
+            items.append({'title': ' '.join(words[:-1]), 'platform': 'reddit'})
+            items.append({'title': ' '.join(words + ['today']), 'platform': 'news'})
+
+        started = time.perf_counter()
+        clusters = TrendClusterer().cluster(items)
+        elapsed = time.perf_counter() - started
+
+        assert abs(len(clusters) - 2000) <= 20
+        assert sum(len(c) == 3 for c in clusters) > 1950
+        assert elapsed < 3.0
+
+
+class TestEngagementScorer:
+
+    def test_scores_are_comparable_across_platform_scales(self):
+        reddit = [
+            {'title': f'post {n}', 'platform': 'reddit', 'engagement_score': 100 * 2 ** n,
+             'metadata': {'comments': 10 * 2 ** n, 'upvote_ratio': 0.5 + n * 0.05}}
+            for n in range(9)
+        ]
+        google = [{'title': f'search {n}', 'platform': 'google_trends', 'engagement_score': 1000 - n * 100} for n in range(9)]
+        scores = EngagementScorer().score(reddit + google)
+
+        # The median item of each platform scores 0.5 whatever its raw engagement
+        assert scores[4] == pytest.approx(0.5) and scores[9 + 4] == pytest.approx(0.5)
+        # Best Reddit post and first Google search are equally exceptional for their platform
+        assert scores[8] == pytest.approx(scores[9], abs=0.01)
+        assert list(np.argsort(-scores[9:])) == list(range(9))
+        assert np.all((scores > 0) & (scores < 1))
+
+    def test_missing_features_and_outliers(self):
+        assert list(robust_z(np.array([np.nan, 1.0]))) == [0.0, 0.0]
+        # MAD of 0 falls back to the mean absolute deviation
+        z = robust_z(np.array([5.0, 5.0, 5.0, 50.0]))
+        assert z[3] > 0 and z[0] == 0
+
+        scorer = EngagementScorer(weights={'*': {'engagement': 1.0}})
+        annotated = scorer.annotate([
+            {'title': 'a', 'platform': 'x', 'engagement_score': None},
+            {'title': 'b', 'platform': 'x', 'engagement_score': 10},
+            {'title': 'c', 'platform': 'x', 'engagement_score': 10000},
+        ])
+        assert annotated[0]['score'] == 0.5  # no engagement: neutral
+        assert annotated[2]['score'] > annotated[1]['score']
+        assert 'score' not in scorer.weights
+
+    def test_thousands_of_items_scored_in_one_batch(self):
+        rng = np.random.default_rng(3)
+        platforms = np.array(['reddit', 'google_trends', 'news'] * 20000)
+        columns = {
+            'engagement': np.log1p(rng.integers(0, 100000, size=len(platforms)).astype(float)),
+            'comments': np.log1p(rng.integers(0, 5000, size=len(platforms)).astype(float)),
+            'upvote_ratio': rng.random(len(platforms)),
+            'rank': -np.arange(len(platforms), dtype=float),
+        }
+        started = time.perf_counter()
+        scores = EngagementScorer().score_columns(platforms, columns)
+        assert time.perf_counter() - started < 0.5
+        assert scores.shape == (60000,)
+
+
+class TestTopKIndex:
+
+    def test_scores_decay_and_updates_replace_earlier_observations(self):
+        index = TopKIndex(half_life_hours=6)
+        t0 = 1_700_000_000.0
+        index.upsert({'title': 'Old news', 'platform': 'news'}, 0.9, at=t0)
+        index.upsert({'title': 'Fresh post', 'platform': 'reddit'}, 0.6, at=t0 + 6 * 3600)
+
+        top = index.top(5, now=t0 + 6 * 3600)
+        assert [t['title'] for t in top] == ['Fresh post', 'Old news']
+        assert top[1]['score'] == pytest.approx(0.45)
+
+        index.upsert({'title': 'old  NEWS', 'platform': 'news'}, 0.95, at=t0 + 6 * 3600)
+        top = index.top(5, now=t0 + 6 * 3600)
+        assert [(t['title'], t['base_score']) for t in top] == [('old  NEWS', 0.95), ('Fresh post', 0.6)]
+
+    def test_filters_by_platform_keyword_and_window(self):
+        index = TopKIndex()
+        now = 1_700_000_000.0
+        index.upsert({'title': 'AI agents everywhere', 'platform': 'reddit', 'metadata': {'subreddit': 'Technology'}}, 0.9, at=now - 7200)
+        index.upsert({'title': 'Cooking with AI', 'platform': 'news'}, 0.8, at=now)
+        index.upsert({'title': 'Football final', 'platform': 'google_trends'}, 0.7, at=now)
+
+        assert [t['title'] for t in index.top(5, platform='news', now=now)] == ['Cooking with AI']
+        assert [t['title'] for t in index.top(5, keyword='AI', now=now)] == ['Cooking with AI', 'AI agents everywhere']
+        assert [t['title'] for t in index.top(5, keyword='technology', now=now)] == ['AI agents everywhere']
+        assert [t['title'] for t in index.top(5, since=now - 3600, now=now)] == ['Cooking with AI', 'Football final']
+        assert index.top(5, platform='tiktok', now=now) == []
+
+    def test_ordered_walk_matches_a_full_sort(self):
+        rng = np.random.default_rng(11)
+        index = TopKIndex(max_entries=10**6)
+        for n, score in enumerate(rng.random(2000)):
+            index.upsert({'title': f'topic {n % 1500}', 'platform': 'reddit'}, float(score), at=1_700_000_000.0 + n)
+
+        expected = sorted(index.entries.values(), key=lambda e: -e['priority'])[:50]
+        assert [t['title'] for t in index.top(50, now=1_700_010_000.0)] == [e['title'] for e in expected]
+
+    def test_index_is_bounded_and_compacted(self):
+        index = TopKIndex(max_entries=1000)
+        for n in range(5000):
+            index.upsert({'title': f'topic {n}', 'platform': 'news'}, (n % 100 + 1) / 100, at=1_700_000_000.0)
+        assert len(index.entries) <= 1000
+        assert index.evicted >= 4000
+        assert len(index.heaps[None]) <= 2 * len(index.entries) + 1024
+        assert index.top(1, now=1_700_000_000.0)[0]['base_score'] == 1.0
+
+    def test_top_n_cost_stays_flat_as_the_index_grows(self):
+        index = TopKIndex(max_entries=10**6)
+        rng = np.random.default_rng(5)
+        for n, score in enumerate(rng.random(100000)):
+            index.upsert({'title': f'topic {n}', 'platform': 'reddit'}, float(score), at=1_700_000_000.0)
+        started = time.perf_counter()
+        for _ in range(100):
+            index.top(10, now=1_700_000_000.0)
+        assert (time.perf_counter() - started) / 100 < 0.005
+
+    def test_observe_skips_stale_sources(self):
+        index = TopKIndex()
+        index.observe(TrendingData(
+            google_trends=[{'title': 'g', 'platform': 'google_trends'}],
+            reddit_trends=[{'title': 'r', 'platform': 'reddit', 'score': 0.7}],
+            sources={'google_trends': {'status': 'ok'}, 'reddit': {'status': 'error', 'stale': True}},
+            timestamp=datetime.now(),
+        ))
+        assert [t['title'] for t in index.top(5)] == ['g']
+        assert index.top(5)[0]['base_score'] == 0.5  # scored on the fly when the snapshot had no scores
+
+    def test_observe_skips_sources_not_refreshed_since_last_snapshot(self):
+        index = TopKIndex()
+        first, later = datetime(2024, 1, 15, 12), datetime(2024, 1, 15, 14)
+        for timestamp, google_refreshed in ((first, '12:00'), (later, '14:00')):
+            index.observe(TrendingData(
+                google_trends=[{'title': 'g', 'platform': 'google_trends', 'score': 0.5}],
+                reddit_trends=[{'title': 'r', 'platform': 'reddit', 'score': 0.5}],
+                sources={'google_trends': {'status': 'ok', 'refreshed_at': google_refreshed},
+                         'reddit': {'status': 'ok', 'refreshed_at': '12:00'}},
+                timestamp=timestamp,
+            ))
+        # Only google was refreshed again; reddit's item keeps decaying from its first sighting
+        updated = {t['title']: t['updated_at'] for t in index.top(5, now=later.timestamp())}
+        assert updated == {'g': later, 'r': first}
+        assert index.updates == 3
+
+
+class TestTrendSearchIndex:
+
+    ITEMS = [
+        {'title': 'OpenAI releases new AI model', 'platform': 'news', 'url': 'https://example.com/1', 'metadata': {'source': 'techcrunch.com'}},
+        {'title': 'AI art sparks debate', 'platform': 'reddit', 'metadata': {'subreddit': 'technology', 'comments': 40}},
+        {'title': 'Champions League final tonight', 'platform': 'google_trends', 'metadata': {'region': 'india'}},
+        {'title': 'New iPhone leaks', 'platform': 'reddit', 'metadata': {'subreddit': 'apple', 'published': '2024-01-15T12:00:00Z'}},
+    ]
+
+    @staticmethod
+    def brute_force_bm25(index, query):
+        """Textbook BM25 over the indexed term counts, to check the vectorized scoring"""
+        docs = [d for d in index.docs if d is not None]
+        average = sum(sum(d['terms'].values()) for d in docs) / len(docs)
+        scores = {}
+        for term in set(query.lower().split()):
+            df = sum(term in d['terms'] for d in docs)
+            idf = np.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+            for d in docs:
+                tf = d['terms'].get(term, 0)
+                if tf:
+                    norm = index.K1 * (1 - index.B + index.B * sum(d['terms'].values()) / average)
+                    scores[d['title']] = scores.get(d['title'], 0) + idf * tf * (index.K1 + 1) / (tf + norm)
+        return scores
+
+    def test_ranks_titles_and_metadata_by_bm25(self):
+        rng = np.random.default_rng(2)
+        words = ['ai', 'model', 'chip', 'launch', 'court', 'vote', 'match', 'goal', 'storm', 'market']
+        index = TrendSearchIndex()
+        index.add(self.ITEMS + [
+            {'title': ' '.join(rng.choice(words, size=rng.integers(2, 7))) + f' story{i}', 'platform': 'news'}
+            for i in range(300)
+        ])
+
+        for query in ['ai', 'ai model', 'market storm goal']:
+            hits, matched = index.search(query, limit=10)
+            expected = self.brute_force_bm25(index, query)
+            assert matched == len(expected)
+            assert [h['score'] for h in hits] == pytest.approx(sorted(expected.values(), reverse=True)[:10], abs=1e-3)
+            assert all(h['score'] == pytest.approx(expected[h['title']], abs=1e-3) for h in hits)
+
+        assert [h['title'] for h in index.search('technology')[0]] == ['AI art sparks debate']
+        assert index.search('2024')[1] == 0  # publication dates are not indexed
+        assert index.search('the of')[0] == []
+
+    def test_platform_filter(self):
+        index = TrendSearchIndex()
+        index.add(self.ITEMS)
+        hits, matched = index.search('new ai', platform='reddit')
+        assert matched == 2 and {h['title'] for h in hits} == {'AI art sparks debate', 'New iPhone leaks'}
+        assert index.search('ai', platform='tiktok') == ([], 0)
+
+    def test_updates_are_incremental(self):
+        index = TrendSearchIndex()
+        assert index.add(self.ITEMS, at=1_700_000_000.0) == 4
+        assert index.add(self.ITEMS, at=1_700_000_600.0) == 0  # unchanged text leaves the postings alone
+        assert index.docs[index.keys[('news', 'openai releases new ai model')]]['updated_at'] == 1_700_000_600.0
+
+        moved = {**self.ITEMS[1], 'metadata': {'subreddit': 'art'}}
+        assert index.add([moved]) == 1
+        assert index.search('technology')[1] == 0
+        assert [h['title'] for h in index.search('art')[0]] == ['AI art sparks debate']
+        assert len(index.keys) == 4 and index.free == []
+
+    def test_evicts_least_recently_seen(self):
+        index = TrendSearchIndex(max_docs=100)
+        for n in range(300):
+            index.add([{'title': f'topic{n} common', 'platform': 'news'}], at=1_700_000_000.0 + n)
+        assert len(index.keys) <= 100
+        assert index.search('topic0')[1] == 0
+        assert index.search('topic299')[1] == 1
+        assert index.search('common')[1] == len(index.keys)
+
+    def test_observe_skips_stale_sources(self):
+        index = TrendSearchIndex()
+        index.observe(TrendingData(
+            google_trends=[self.ITEMS[2]],
+            reddit_trends=[],
+            news_trends=[self.ITEMS[0]],
+            sources={'google_trends': {'status': 'ok'}, 'news': {'status': 'error', 'stale': True}},
+            timestamp=datetime.now(),
+        ))
+        assert index.search('final')[1] == 1
+        assert index.search('openai')[1] == 0
+
+    def test_observe_skips_sources_not_refreshed_since_last_snapshot(self):
+        index = TrendSearchIndex()
+        first, later = datetime(2024, 1, 15, 12), datetime(2024, 1, 15, 14)
+        for timestamp, news_refreshed in ((first, '12:00'), (later, '14:00')):
+            index.observe(TrendingData(
+                google_trends=[self.ITEMS[2]],
+                reddit_trends=[],
+                news_trends=[self.ITEMS[0]],
+                sources={'google_trends': {'status': 'ok', 'refreshed_at': '12:00'},
+                         'news': {'status': 'ok', 'refreshed_at': news_refreshed}},
+                timestamp=timestamp,
+            ))
+        # The unrefreshed source is not treated as seen again, so it ages towards eviction
+        assert index.search('final')[0][0]['updated_at'] == first
+        assert index.search('openai')[0][0]['updated_at'] == later
+
+    def test_selective_queries_are_sub_millisecond_at_scale(self):
+        rng = np.random.default_rng(9)
+        vocabulary = [f'w{i}' for i in range(20000)]
+        ranks = np.minimum(rng.zipf(1.3, size=(200000, 6)), len(vocabulary)) - 1
+        index = TrendSearchIndex(max_docs=10**6)
+        index.add([
+            {'title': ' '.join(vocabulary[r] for r in row), 'platform': ('reddit', 'news')[i % 2]}
+            for i, row in enumerate(ranks)
+        ])
+
+        queries = [('w0', None), ('w250', None), ('w300 w700', None), ('w120 w900 w4000', 'news')]
+        for query, platform in queries:
+            index.search(query, platform=platform)  # first query after a refresh builds the arrays
+        started = time.perf_counter()
+        for _ in range(50):
+            for query, platform in queries:
+                index.search(query, platform=platform)
+        assert (time.perf_counter() - started) / (50 * len(queries)) < 0.001
@@ -1,6 +1,28 @@
+import asyncio
+import json
+import time
 import pytest
+from types import SimpleNamespace
+from pytrends.exceptions import ResponseError, TooManyRequestsError
 from fastapi.testclient import TestClient
 from app.main import app
+from datetime import datetime, timedelta
+from app.analytics.search import TrendSearchIndex
+from app.analytics.top_k import TopKIndex
+from app.analytics.velocity import VelocityEngine
+from app.api import routes
+from app.api.dependencies import get_ai_analyzer, get_collector_manager
+from app.api.refresher import TrendingRefresher, trending_refresher
+from app.models import StrategyResponse, TrendingData, TrendItem
+from app.storage.trend_store import TrendStore
+from app.utils.cache import MemoryCache
+from app.collectors import google_trends
+from app.collectors.base import BaseCollector
+from app.collectors.google_trends import GoogleTrendsCollector
+from app.collectors.news_api import NewsAPICollector
+from app.collectors.pytrends_pool import PyTrendsPool
+from app.collectors.reddit import RedditCollector
+from app.config import settings
 
 client = TestClient(app)
 
@@ -20,3 +42,502 @@ def test_trending_endpoint():
     data = response.json()
     assert "google_trends" in data
     assert "reddit_trends" in data
+
+
+@pytest.fixture
+def offline_manager(monkeypatch):
+    # TrendReq() hits Google while constructing; keep tests offline
+    monkeypatch.setattr(google_trends, 'PYTRENDS_AVAILABLE', False)
+    get_collector_manager.cache_clear()
+    yield get_collector_manager()
+    get_collector_manager.cache_clear()
+
+
+class _FakeCollector(BaseCollector):
+    def __init__(self, items=None, delay=0.0, error=None):
+        super().__init__()
+        self.items = items or []
+        self.delay = delay
+        self.error = error
+
+    def memo_key(self):
+        return (id(self),)
+
+    async def collect(self):
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.items
+
+
+@pytest.mark.asyncio
+async def test_collect_all_runs_sources_concurrently_with_partial_results(monkeypatch, offline_manager):
+    manager = offline_manager
+    manager.collectors = {
+        'google_trends': _FakeCollector([{'title': 'g', 'platform': 'google_trends'}], delay=0.2),
+        'reddit': _FakeCollector([{'title': 'r', 'platform': 'reddit'}], delay=0.2),
+        'news': _FakeCollector(delay=5.0),
+    }
+    monkeypatch.setitem(settings.COLLECTOR_TIMEOUTS, 'news', 0.3)
+
+    started = time.perf_counter()
+    results = await manager.collect_all()
+    elapsed = time.perf_counter() - started
+
+    # Bounded by the slowest deadline, not the sum of every source
+    assert elapsed < 1.0
+    assert results['google_trends']['status'] == 'ok'
+    assert results['reddit']['count'] == 1
+    assert results['news']['status'] == 'timeout'
+
+    data = manager.build_trending_data(results)
+    assert data.google_trends[0]['title'] == 'g'
+    assert data.news_trends == []
+    assert data.sources['news']['status'] == 'timeout'
+    assert 'items' not in data.sources['reddit']
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast_and_shows_in_health(monkeypatch, offline_manager):
+    manager = offline_manager
+    manager.collectors = {
+        'google_trends': _FakeCollector(delay=5.0),
+        'reddit': _FakeCollector([{'title': 'r', 'platform': 'reddit'}]),
+    }
+    monkeypatch.setitem(settings.COLLECTOR_TIMEOUTS, 'google_trends', 0.05)
+    monkeypatch.setattr(settings, 'CIRCUIT_MIN_CALLS', 2)
+    manager.breakers = {}
+
+    for _ in range(2):
+        results = await manager.collect_all()
+        assert results['google_trends']['status'] == 'timeout'
+
+    started = time.perf_counter()
+    results = await manager.collect_all()
+    assert time.perf_counter() - started < 0.04
+    assert results['google_trends']['status'] == 'circuit_open'
+    assert results['reddit']['status'] == 'ok'
+
+    breakers = client.get("/api/v1/health").json()["circuit_breakers"]
+    assert breakers['google_trends']['state'] == 'open'
+    assert breakers['reddit']['state'] == 'closed'
+
+
+@pytest.mark.asyncio
+async def test_google_fallback_reuses_the_refresh_reddit_fetch(monkeypatch, offline_manager):
+    fetches = []
+
+    async def reddit_collect(self):
+        fetches.append(self.limit)
+        await asyncio.sleep(0.05)
+        return [{'title': 'r', 'platform': 'reddit'}]
+
+    monkeypatch.setattr(RedditCollector, 'collect', reddit_collect)
+    manager = offline_manager  # pytrends unavailable: Google falls back to Reddit
+    manager.collectors = {'google_trends': GoogleTrendsCollector(), 'reddit': RedditCollector()}
+
+    results = await manager.collect_all()
+
+    assert fetches == [10]
+    assert results['google_trends']['status'] == 'substituted'
+    assert results['google_trends']['substituted_by'] == 'reddit'
+    assert results['reddit']['status'] == 'ok'
+
+    data = manager.build_trending_data(results)
+    # The substitute is labelled, not published twice
+    assert data.google_trends == []
+    assert data.reddit_trends == [{'title': 'r', 'platform': 'reddit', 'score': 0.5}]
+    assert data.sources['google_trends']['substituted_by'] == 'reddit'
+
+    # Without its own source in the snapshot, the substitute data is kept
+    alone = manager.build_trending_data({'google_trends': results['google_trends']})
+    assert alone.google_trends == [{'title': 'r', 'platform': 'reddit', 'score': 0.5}]
+
+
+class _ThrottledTrendReq:
+    def trending_searches(self, pn):
+        raise TooManyRequestsError.from_response(SimpleNamespace(status_code=429, headers={'Retry-After': '30'}))
+
+
+@pytest.mark.asyncio
+async def test_google_throttling_is_reported_as_rate_limited(monkeypatch, offline_manager):
+    monkeypatch.setattr(google_trends, 'PYTRENDS_AVAILABLE', True)
+    monkeypatch.setattr(settings, 'RATE_LIMIT_MAX_WAIT', 0.1)
+    pool = PyTrendsPool(size=1, workers=1, cookie_ttl=60, factory=_ThrottledTrendReq)
+    collector = GoogleTrendsCollector(pool=pool)
+    collector.rate_limit_key = 'google-throttle-test'
+    manager = offline_manager
+    manager.collectors = {'google_trends': collector}
+    manager.breakers = {}
+
+    # A 429 from pytrends, then the limiter refusing to wait out its Retry-After
+    for _ in range(4):
+        result = await manager.collect_source('google_trends')
+        assert result['status'] == 'rate_limited' and 'substituted_by' not in result
+        assert result['error'].startswith('Rate limit exceeded')
+    assert manager.get_breaker('google_trends').state == 'closed'
+    await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_source_failing_behind_its_fallback_opens_its_breaker(monkeypatch, offline_manager):
+    async def reddit_collect(self):
+        return [{'title': 'r', 'platform': 'reddit'}]
+
+    monkeypatch.setattr(RedditCollector, 'collect', reddit_collect)
+    monkeypatch.setattr(google_trends, 'PYTRENDS_AVAILABLE', True)
+    monkeypatch.setattr(settings, 'CIRCUIT_MIN_CALLS', 2)
+    calls = []
+
+    class RetiredTrendReq:
+        def trending_searches(self, pn):
+            calls.append(pn)
+            raise ResponseError.from_response(SimpleNamespace(status_code=404, headers={}))
+
+    pool = PyTrendsPool(size=1, workers=1, cookie_ttl=60, factory=RetiredTrendReq)
+    manager = offline_manager
+    manager.collectors = {'google_trends': GoogleTrendsCollector(pool=pool)}
+    manager.breakers = {}
+
+    for _ in range(2):
+        result = await manager.collect_source('google_trends')
+        assert result['status'] == 'substituted' and result['count'] == 1
+
+    assert manager.get_breaker('google_trends').state == 'open'
+    result = await manager.collect_source('google_trends')
+    assert result['status'] == 'circuit_open'
+    assert len(calls) == 2  # the open breaker spares the failing pytrends call
+    await pool.stop()
+
+
+def test_snapshot_publishes_a_cross_platform_story_once(offline_manager):
+    def result(*items):
+        return {'items': list(items), 'status': 'ok', 'count': len(items)}
+
+    data = offline_manager.build_trending_data({
+        'google_trends': result({'title': 'OpenAI releases GPT-5', 'platform': 'google_trends'},
+                                {'title': 'Monsoon arrives', 'platform': 'google_trends'}),
+        'reddit': result({'title': 'OpenAI released GPT-5 today', 'platform': 'reddit', 'engagement_score': 900},
+                         {'title': 'Cat video', 'platform': 'reddit', 'engagement_score': 10}),
+        'news': result({'title': 'GPT-5: OpenAI releases its new model', 'platform': 'news'}),
+    })
+
+    titles = [t['title'] for t in data.google_trends + data.reddit_trends + data.news_trends]
+    assert sum('GPT-5' in title for title in titles) == 1
+    assert 'Monsoon arrives' in titles and 'Cat video' in titles
+    gpt = next(t for t in data.google_trends + data.reddit_trends + data.news_trends if 'GPT-5' in t['title'])
+    assert gpt['metadata']['platforms'] == ['google_trends', 'news', 'reddit']
+
+
+@pytest.mark.asyncio
+async def test_news_without_any_feed_is_an_error_not_mock_data(monkeypatch, offline_manager):
+    async def no_feeds(self):
+        return []
+
+    monkeypatch.setattr(NewsAPICollector, '_collect_feeds', no_feeds)
+    manager = offline_manager
+    manager.collectors = {'news': NewsAPICollector(feeds=['http://127.0.0.1:1/rss'])}
+    manager.breakers = {}
+
+    result = await manager.collect_source('news')
+
+    assert result['status'] == 'error' and result['items'] == []
+    assert 'no items from any of 1 feeds' in result['error']
+    assert manager.get_breaker('news').get_stats()['failure_rate'] == 1.0
+    assert manager.build_trending_data({'news': result}).news_trends == []
+
+
+def test_trending_endpoint_reports_failed_sources(monkeypatch, offline_manager):
+    manager = offline_manager
+    monkeypatch.setattr(manager, 'collectors', {
+        'google_trends': _FakeCollector(error=RuntimeError("down")),
+        'reddit': _FakeCollector([{'title': 'r', 'platform': 'reddit'}]),
+        'news': _FakeCollector([{'title': 'n', 'platform': 'news'}]),
+    })
+    client.get("/api/v1/cache/clear")
+
+    response = client.get("/api/v1/trending")
+    client.get("/api/v1/cache/clear")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["google_trends"] == []
+    assert data["news_trends"][0]["title"] == "n"
+    assert data["sources"]["google_trends"]["status"] == "error"
+    assert data["sources"]["reddit"]["status"] == "ok"
+
+
+@pytest.fixture
+def refresher(offline_manager):
+    refresher = TrendingRefresher(cache=MemoryCache("test"), intervals={}, max_age=timedelta(seconds=60))
+    yield refresher
+
+
+def _patch_sources(monkeypatch, manager, results):
+    calls = {}
+
+    async def collect_source(platform, timeout=None):
+        calls[platform] = calls.get(platform, 0) + 1
+        await asyncio.sleep(0.05)
+        outcome = results[platform]
+        if isinstance(outcome, Exception):
+            return {'items': [], 'status': 'error', 'count': 0, 'error': str(outcome)}
+        return {'items': outcome, 'status': 'ok', 'count': len(outcome), 'error': None}
+
+    monkeypatch.setattr(manager, 'collect_source', collect_source)
+    monkeypatch.setattr(manager, 'collectors', {platform: None for platform in results})
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_concurrent_cache_misses_trigger_one_refresh(monkeypatch, offline_manager, refresher):
+    calls = _patch_sources(monkeypatch, offline_manager, {'reddit': [{'title': 'r', 'platform': 'reddit'}]})
+
+    results = await asyncio.gather(*(refresher.get_snapshot() for _ in range(5)))
+
+    assert calls == {'reddit': 1}
+    assert all(r is results[0] for r in results)
+    assert refresher.flight.get_stats()['coalesced'] == 4
+
+
+@pytest.mark.asyncio
+async def test_stale_snapshot_served_while_refreshing(monkeypatch, offline_manager, refresher):
+    results = {'reddit': [{'title': 'old', 'platform': 'reddit'}], 'news': [{'title': 'n', 'platform': 'news'}]}
+    calls = _patch_sources(monkeypatch, offline_manager, results)
+    await refresher.get_snapshot()
+
+    # Expire the snapshot; reddit now fails, news has new items
+    refresher.max_age = timedelta(0)
+    results['reddit'] = RuntimeError("down")
+    results['news'] = [{'title': 'n2', 'platform': 'news'}]
+
+    stale = await refresher.get_snapshot()
+    assert stale.stale is True
+    assert stale.news_trends[0]['title'] == 'n'
+
+    await asyncio.sleep(0.1)
+    refresher.max_age = timedelta(seconds=60)
+    fresh = await refresher.get_snapshot()
+    assert calls == {'reddit': 2, 'news': 2}
+    assert fresh.stale is False
+    assert fresh.news_trends[0]['title'] == 'n2'
+    # Last good reddit items are kept, flagged stale
+    assert fresh.reddit_trends[0]['title'] == 'old'
+    assert fresh.sources['reddit']['stale'] is True
+
+
+@pytest.mark.asyncio
+async def test_stop_waits_for_refresh_started_by_stale_read(monkeypatch, offline_manager, refresher):
+    calls = _patch_sources(monkeypatch, offline_manager, {'reddit': [{'title': 'r', 'platform': 'reddit'}]})
+    await refresher.get_snapshot()
+    refresher.max_age = timedelta(0)
+
+    await refresher.get_snapshot()
+    assert len(refresher._refreshing) == 1
+
+    await refresher.stop()
+    assert calls == {'reddit': 2}
+    assert not refresher._refreshing
+
+
+@pytest.mark.asyncio
+async def test_background_loop_refreshes_each_source_on_its_interval(monkeypatch, offline_manager):
+    calls = _patch_sources(monkeypatch, offline_manager, {
+        'reddit': [{'title': 'r', 'platform': 'reddit'}],
+        'news': [{'title': 'n', 'platform': 'news'}],
+    })
+    refresher = TrendingRefresher(cache=MemoryCache("test"), intervals={'reddit': 0.1, 'news': 10.0})
+
+    refresher.start()
+    await asyncio.sleep(0.35)
+    await refresher.stop()
+
+    assert calls['news'] == 1
+    assert calls['reddit'] >= 2
+    assert await refresher.cache.get('snapshot') is not None
+
+
+@pytest.mark.asyncio
+async def test_workers_sharing_a_cache_reuse_one_snapshot(monkeypatch, offline_manager):
+    calls = _patch_sources(monkeypatch, offline_manager, {'reddit': [{'title': 'r', 'platform': 'reddit'}]})
+    shared = MemoryCache("shared")
+    first, second = TrendingRefresher(cache=shared), TrendingRefresher(cache=shared)
+
+    await first.get_snapshot()
+    snapshot = await second.get_snapshot()
+
+    assert calls == {'reddit': 1}
+    assert snapshot.reddit_trends[0]['title'] == 'r'
+    stats = await shared.get_stats()
+    assert stats['hits'] >= 1 and stats['bytes_used'] > 0
+
+
+def test_strategy_stream_sends_ndjson_events(monkeypatch):
+    class StreamingAnalyzer:
+        async def stream_analysis(self, trends_data, target_audience, niche):
+            yield "trend", TrendItem(title="AI", platform="reddit")
+            raise RuntimeError("completion cut off")
+
+    async def snapshot():
+        return TrendingData(google_trends=[], reddit_trends=[{'title': 'r', 'platform': 'reddit'}])
+
+    monkeypatch.setattr(trending_refresher, 'get_snapshot', snapshot)
+    app.dependency_overrides[get_ai_analyzer] = StreamingAnalyzer
+    try:
+        response = client.get("/api/v1/strategy/stream", params={"niche": "Tech"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events[0] == {"event": "trend", "data": {"title": "AI", "platform": "reddit", "engagement_score": None, "url": None, "metadata": None}}
+    assert events[1]["event"] == "error"
+
+
+def test_batch_analysis_shares_one_snapshot_and_reports_errors_per_pair(monkeypatch):
+    seen = []
+
+    class BatchAnalyzer:
+        async def analyze_batch(self, trends_data, pairs):
+            seen.append(trends_data)
+            return [
+                RuntimeError("rate limited") if niche == "Broken"
+                else StrategyResponse(top_trends=[], content_strategy=[], analysis_summary=f"{audience}/{niche}")
+                for audience, niche in pairs
+            ]
+
+    snapshots = []
+
+    async def snapshot():
+        snapshots.append(1)
+        return TrendingData(google_trends=[], reddit_trends=[{'title': 'r', 'platform': 'reddit'}])
+
+    monkeypatch.setattr(trending_refresher, 'get_snapshot', snapshot)
+    app.dependency_overrides[get_ai_analyzer] = BatchAnalyzer
+    try:
+        response = client.post("/api/v1/analyze/batch", json={"pairs": [
+            {"target_audience": "Gen Z", "niche": "Tech"},
+            {"target_audience": "Gen Z", "niche": "Broken"},
+            {"target_audience": "Gen Z", "niche": "Tech"},
+        ]})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    body = response.json()
+    assert len(snapshots) == 1 and len(seen) == 1
+    assert body["unique_pairs"] == 2
+    assert [r["status"] for r in body["results"]] == ["ok", "error", "ok"]
+    assert body["results"][0]["strategy"]["analysis_summary"] == "Gen Z/Tech"
+    assert "rate limited" in body["results"][1]["error"]
+
+
+def test_batch_analysis_rejects_oversized_batches(monkeypatch):
+    monkeypatch.setattr(settings, 'BATCH_MAX_PAIRS', 1)
+    app.dependency_overrides[get_ai_analyzer] = lambda: None
+    try:
+        response = client.post("/api/v1/analyze/batch", json={"pairs": [{}, {}]})
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_published_snapshots_reach_trend_history(monkeypatch, offline_manager, refresher, tmp_path):
+    results = {'reddit': [{'title': 'Rising Topic', 'platform': 'reddit', 'engagement_score': 10}]}
+    _patch_sources(monkeypatch, offline_manager, results)
+    store = TrendStore(path=str(tmp_path / "trends.db"))
+    refresher.add_listener(store.record)
+    refresher.add_listener(store.record)  # registering twice is a no-op
+
+    await refresher.refresh()
+    results['reddit'] = [{'title': 'Other', 'platform': 'reddit'}, results['reddit'][0]]
+    await refresher.refresh()
+    await store.flush()
+
+    points = await store.history("rising topic")
+    assert [(p['rank'], p['score']) for p in points] == [(1, 10), (2, 10)]
+    await store.close()
+
+
+def test_trend_history_endpoint(monkeypatch, tmp_path):
+    store = TrendStore(path=str(tmp_path / "trends.db"))
+    now = datetime.now()
+    for hours_ago, score in ((30, 1), (2, 20), (1, 30)):
+        store.record(TrendingData(
+            google_trends=[],
+            reddit_trends=[{'title': 'AI Agents', 'platform': 'reddit', 'engagement_score': score}],
+            timestamp=now - timedelta(hours=hours_ago),
+        ))
+    asyncio.run(store.flush())
+    monkeypatch.setattr(routes, 'trend_store', store)
+
+    response = client.get("/api/v1/trends/history", params={"title": "ai agents!"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["normalized_title"] == "ai agents"
+    assert [p["score"] for p in body["points"]] == [20, 30]
+
+    assert client.get("/api/v1/trends/history", params={"title": "AI Agents", "hours": 48}).json()["points"][0]["score"] == 1
+    assert client.get("/api/v1/trends/history").status_code == 422
+    asyncio.run(store.close())
+
+
+def test_trend_history_is_unavailable_when_the_store_is_disabled(monkeypatch, tmp_path):
+    path = tmp_path / "trends.db"
+    monkeypatch.setattr(settings, 'TREND_STORE_ENABLED', False)
+    monkeypatch.setattr(routes, 'trend_store', TrendStore(path=str(path)))
+
+    response = client.get("/api/v1/trends/history", params={"title": "AI Agents"})
+
+    assert response.status_code == 404
+    assert not path.exists()
+
+
+def test_emerging_trends_endpoint(monkeypatch):
+    engine = VelocityEngine(window=4)
+    start = datetime(2024, 1, 15, 8)
+    for hour, score in enumerate([5, 50, 5000]):
+        engine.observe(TrendingData(
+            google_trends=[],
+            reddit_trends=[{'title': 'Breakout', 'platform': 'reddit', 'engagement_score': score},
+                           {'title': 'Steady', 'platform': 'reddit', 'engagement_score': 900}],
+            timestamp=start + timedelta(hours=hour),
+        ))
+    monkeypatch.setattr(routes, 'velocity_engine', engine)
+
+    response = client.get("/api/v1/trends/emerging", params={"limit": 5})
+    assert response.status_code == 200
+    body = response.json()
+    assert [t["title"] for t in body["trends"]] == ["Breakout"]
+    assert body["tracked_topics"] == 2 and body["snapshots"] == 3
+
+
+def test_top_trends_endpoint(monkeypatch):
+    index = TopKIndex()
+    index.upsert({'title': 'AI chips', 'platform': 'news', 'url': 'https://example.com/ai'}, 0.9)
+    index.upsert({'title': 'Transfer window', 'platform': 'reddit'}, 0.8)
+    index.upsert({'title': 'AI art', 'platform': 'reddit'}, 0.3)
+    monkeypatch.setattr(routes, 'top_k_index', index)
+
+    body = client.get("/api/v1/trends/top", params={"limit": 2}).json()
+    assert [t["title"] for t in body["trends"]] == ["AI chips", "Transfer window"]
+    assert body["indexed"] == 3
+    reddit_ai = client.get("/api/v1/trends/top", params={"platform": "reddit", "keyword": "ai"}).json()
+    assert [t["title"] for t in reddit_ai["trends"]] == ["AI art"]
+
+
+def test_search_trends_endpoint(monkeypatch):
+    index = TrendSearchIndex()
+    index.add([
+        {'title': 'AI chips shortage', 'platform': 'news', 'url': 'https://example.com/ai'},
+        {'title': 'Transfer window news', 'platform': 'reddit', 'metadata': {'subreddit': 'soccer'}},
+    ])
+    monkeypatch.setattr(routes, 'trend_search_index', index)
+
+    body = client.get("/api/v1/trends/search", params={"q": "ai chips"}).json()
+    assert [h["title"] for h in body["hits"]] == ["AI chips shortage"]
+    assert body["matched"] == 1 and body["indexed"] == 2 and body["took_ms"] >= 0
+    soccer = client.get("/api/v1/trends/search", params={"q": "soccer", "platform": "reddit"}).json()
+    assert [h["title"] for h in soccer["hits"]] == ["Transfer window news"]
+    assert client.get("/api/v1/trends/search").status_code == 422
@@ -0,0 +1,220 @@
+import asyncio
+import fnmatch
+import time
+import pytest
+import pytest_asyncio
+from app.utils.cache import MemoryCache, SQLiteCache, RedisCache
+
+
+class FakeRedisServer:
+    """Just enough of the Redis protocol to stand in for a real server"""
+
+    def __init__(self):
+        self.data = {}
+        self.server = None
+        self.delay = 0.0  # seconds before each reply
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _read_command(self, reader):
+        header = await reader.readline()
+        if not header:
+            return None
+        args = []
+        for _ in range(int(header[1:-2])):
+            length = int((await reader.readline())[1:-2])
+            args.append((await reader.readexactly(length + 2))[:-2])
+        return args
+
+    def _live(self, key):
+        entry = self.data.get(key)
+        if entry and entry[1] is not None and entry[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return entry
+
+    def _execute(self, args):
+        command = args[0].upper()
+        if command == b"GET":
+            entry = self._live(args[1])
+            return None if entry is None else entry[0]
+        if command == b"SET":
+            options = [a.upper() for a in args[3:]]
+            if b"NX" in options and self._live(args[1]):
+                return None
+            expires = None
+            if b"PX" in options:
+                expires = time.monotonic() + int(args[3 + options.index(b"PX") + 1]) / 1000
+            self.data[args[1]] = (args[2], expires)
+            return "OK"
+        if command == b"DEL":
+            return sum(1 for key in args[1:] if self.data.pop(key, None) is not None)
+        if command == b"SCAN":
+            pattern = args[args.index(b"MATCH") + 1].decode()
+            return [b"0", [k for k in self.data if fnmatch.fnmatch(k.decode(), pattern)]]
+        if command == b"INFO":
+            return f"# Memory\r\nused_memory:{sum(len(v[0]) for v in self.data.values())}\r\nevicted_keys:0\r\n".encode()
+        return "OK"
+
+    def _encode(self, value):
+        if value is None:
+            return b"$-1\r\n"
+        if isinstance(value, str):
+            return f"+{value}\r\n".encode()
+        if isinstance(value, int):
+            return f":{value}\r\n".encode()
+        if isinstance(value, list):
+            return b"*%d\r\n" % len(value) + b"".join(self._encode(v) for v in value)
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+    async def _handle(self, reader, writer):
+        while True:
+            args = await self._read_command(reader)
+            if args is None:
+                break
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            writer.write(self._encode(self._execute(args)))
+            try:
+                await writer.drain()
+            except ConnectionError:
+                break
+        writer.close()
+
+
+@pytest_asyncio.fixture
+async def redis_url():
+    server = FakeRedisServer()
+    port = await server.start()
+    yield f"redis://127.0.0.1:{port}/0"
+    await server.stop()
+
+
+class TestMemoryCache:
+
+    @pytest.mark.asyncio
+    async def test_ttl_expiry_and_hit_rate(self):
+        cache = MemoryCache("t")
+        await cache.set("a", {"x": 1}, ttl=0.05)
+
+        assert await cache.get("a") == {"x": 1}
+        await asyncio.sleep(0.06)
+        assert await cache.get("a") is None
+
+        stats = await cache.get_stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+        assert stats["entries"] == 0 and stats["bytes_used"] == 0
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self):
+        cache = MemoryCache("t", max_entries=2)
+        await cache.set("a", 1)
+        await cache.set("b", 2)
+        await cache.get("a")  # b is now least recently used
+        await cache.set("c", 3)
+
+        assert await cache.get("b") is None
+        assert await cache.get("a") == 1
+        assert (await cache.get_stats())["evictions"] == 1
+
+    @pytest.mark.asyncio
+    async def test_add_only_when_absent(self):
+        cache = MemoryCache("t")
+        assert await cache.add("lock", "w1", ttl=0.05) is True
+        assert await cache.add("lock", "w2") is False
+        await asyncio.sleep(0.06)
+        assert await cache.add("lock", "w2") is True
+
+
+class TestSQLiteCache:
+
+    @pytest.mark.asyncio
+    async def test_shared_between_instances(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+        first, second = SQLiteCache("t", path=path), SQLiteCache("t", path=path)
+
+        await first.set("snapshot", {"items": [1, 2]})
+        assert await second.get("snapshot") == {"items": [1, 2]}
+        assert await second.add("snapshot", {}) is False
+
+        await second.clear()
+        assert await first.get("snapshot") is None
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction_and_usage(self, tmp_path):
+        cache = SQLiteCache("t", path=str(tmp_path / "cache.db"), max_entries=2)
+        await cache.set("a", "x" * 10)
+        await asyncio.sleep(0.01)
+        await cache.set("b", "y")
+        await asyncio.sleep(0.01)
+        await cache.get("a")
+        await cache.set("c", "z")
+
+        assert await cache.get("b") is None
+        stats = await cache.get_stats()
+        assert stats["evictions"] == 1
+        assert stats["entries"] == 2
+        assert stats["bytes_used"] > 0
+
+    @pytest.mark.asyncio
+    async def test_ttl_expiry(self, tmp_path):
+        cache = SQLiteCache("t", path=str(tmp_path / "cache.db"))
+        await cache.set("a", 1, ttl=0.05)
+        await asyncio.sleep(0.06)
+        assert await cache.get("a") is None
+
+
+class TestRedisCache:
+
+    @pytest.mark.asyncio
+    async def test_round_trip_against_stand_in(self, redis_url):
+        cache = RedisCache("t", url=redis_url)
+        other = RedisCache("other", url=redis_url)
+
+        await cache.set("snapshot", {"title": "AI"}, ttl=60)
+        await other.set("snapshot", "kept")
+        assert await cache.get("snapshot") == {"title": "AI"}
+        assert await cache.add("snapshot", {}) is False
+
+        await cache.clear()
+        assert await cache.get("snapshot") is None
+        assert await other.get("snapshot") == "kept"
+
+        stats = await cache.get_stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+        assert stats["entries"] == 0
+
+    @pytest.mark.asyncio
+    async def test_unreachable_server_degrades_to_miss(self):
+        cache = RedisCache("t", url="redis://127.0.0.1:1/0")
+        assert await cache.get("a") is None
+        await cache.set("a", 1)
+        await cache.clear()
+        # Nobody holds a lease the server could not record
+        assert await cache.add("lock", "worker") is False
+
+    @pytest.mark.asyncio
+    async def test_cancelled_command_does_not_leave_its_reply_behind(self):
+        server = FakeRedisServer()
+        port = await server.start()
+        try:
+            cache = RedisCache("t", url=f"redis://127.0.0.1:{port}/0")
+            await cache.set("a", "first")
+            server.delay = 0.2
+            pending = asyncio.ensure_future(cache.get("a"))
+            await asyncio.sleep(0.05)
+            pending.cancel()
+            server.delay = 0.0
+
+            await cache.set("b", "second")
+            assert await cache.get("b") == "second"
+            assert await cache.get("a") == "first"
+        finally:
+            await server.stop()
@@ -1,6 +1,20 @@
+import asyncio
+import threading
+import time
+import pandas as pd
 import pytest
+from types import SimpleNamespace
+from aiohttp import web
+from pytrends.exceptions import ResponseError
+from app.collectors import base, google_trends
+from app.collectors.http_cache import HTTPCache
+from app.collectors.pytrends_pool import PyTrendsPool
 from app.collectors.google_trends import GoogleTrendsCollector
+from app.collectors.news_api import NewsAPICollector
 from app.collectors.reddit import RedditCollector
+from app.collectors.http_client import HTTPClient
+from app.config import settings
+from app.utils.exceptions import RateLimitError
 
 @pytest.mark.asyncio
 async def test_google_trends_collector():
@@ -22,3 +36,328 @@ async def test_reddit_collector():
     if data:
         assert 'title' in data[0]
         assert 'engagement_score' in data[0]
+
+@pytest.mark.asyncio
+async def test_collectors_share_pooled_session():
+    client = HTTPClient()
+    await client.start()
+    try:
+        first, second = RedditCollector(limit=1), RedditCollector(limit=1)
+        async with client.acquire(first.session) as a, client.acquire(second.session) as b:
+            assert a is b is client.session
+            assert a.connector.limit_per_host == settings.HTTP_POOL_LIMIT_PER_HOST
+    finally:
+        await client.close()
+    assert client.session is None
+
+@pytest.mark.asyncio
+async def test_http_session_without_lifespan_is_short_lived():
+    collector = RedditCollector(limit=1)
+    async with collector.http_session() as session:
+        assert not session.closed
+    assert session.closed
+
+@pytest.mark.asyncio
+async def test_fetch_honours_429_retry_after_and_raises_rate_limit_error(monkeypatch):
+    hits = []
+
+    async def listing(request):
+        hits.append(asyncio.get_running_loop().time())
+        if len(hits) == 1:
+            return web.json_response({}, status=429, headers={'Retry-After': '0.1'})
+        return web.json_response({'data': {'children': [{'data': {
+            'title': 'Post', 'score': 5, 'permalink': '/r/x/1', 'subreddit': 'x', 'num_comments': 1
+        }}]}})
+
+    app = web.Application()
+    app.router.add_get('/hot.json', listing)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/hot.json"
+    monkeypatch.setattr(settings, 'RATE_LIMIT_BASE_BACKOFF', 0.01)
+
+    try:
+        collector = RedditCollector(limit=1)
+        collector.rate_limit_key = 'reddit-test'
+        data = await collector.fetch(url)
+        assert data['data']['children'][0]['data']['title'] == 'Post'
+        # The retry waited out Retry-After
+        assert hits[1] - hits[0] >= 0.1
+        assert collector.rate_limiter.get_stats()['throttled'] == 1
+
+        # A Retry-After beyond RATE_LIMIT_MAX_WAIT fails fast instead of sleeping
+        hits.clear()
+        monkeypatch.setattr(settings, 'RATE_LIMIT_MAX_WAIT', 0.5)
+        collector.rate_limiter.penalize(retry_after=30)
+        with pytest.raises(RateLimitError):
+            await collector.fetch(url)
+        assert hits == []
+    finally:
+        await runner.cleanup()
+
+def _rss_item(feed: str, n: int) -> bytes:
+    return (f"<item><title>{feed} story {n}</title><link>https://example.com/{feed}/{n}</link>"
+            f"<pubDate>Mon, 15 Jan 2024 12:00:00 GMT</pubDate></item>").encode()
+
+@pytest.mark.asyncio
+async def test_news_feeds_fetched_concurrently_and_parsing_stops_early():
+    hits = []
+
+    async def slow_feed(request):
+        name = request.match_info['name']
+        hits.append(name)
+        await asyncio.sleep(0.3)
+        body = b"<rss><channel>" + b"".join(_rss_item(name, n) for n in range(10)) + b"</channel></rss>"
+        return web.Response(body=body, content_type='application/rss+xml')
+
+    async def endless_feed(request):
+        # Never finishes: only a parser that stops early gets anything out of it
+        hits.append('endless')
+        response = web.StreamResponse(headers={'Content-Type': 'application/rss+xml'})
+        await response.prepare(request)
+        await response.write(b"<rss><channel><title>Endless</title>")
+        n = 0
+        while True:
+            await response.write(_rss_item('endless', n))
+            n += 1
+            await asyncio.sleep(0.02)
+
+    app = web.Application()
+    app.router.add_get('/endless', endless_feed)
+    app.router.add_get('/{name}', slow_feed)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    base = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+    try:
+        feeds = [f"{base}/endless", f"{base}/a", f"{base}/b", f"{base}/c"]
+        collector = NewsAPICollector(limit=8, feeds=feeds, items_per_feed=3, concurrency=4)
+        started = time.monotonic()
+        data = await asyncio.wait_for(collector.collect(), timeout=5)
+        elapsed = time.monotonic() - started
+
+        # Three 0.3s feeds side by side, not one after another
+        assert elapsed < 0.8
+        assert [item['title'] for item in data[:4]] == [
+            'endless story 0', 'endless story 1', 'endless story 2', 'a story 0'
+        ]
+        assert len(data) == 8
+        assert data[0]['metadata']['source'] == base.split('/')[2]
+        assert data[0]['metadata']['published'] == 'Mon, 15 Jan 2024 12:00:00 GMT'
+
+        # One feed at a time: the second is never requested once the first filled the limit
+        hits.clear()
+        collector = NewsAPICollector(limit=3, feeds=[f"{base}/a", f"{base}/b"], concurrency=1)
+        data = await collector.collect()
+        assert [item['title'] for item in data] == ['a story 0', 'a story 1', 'a story 2']
+        assert hits == ['a']
+    finally:
+        await runner.cleanup()
+
+@pytest.mark.asyncio
+async def test_fetch_revalidates_with_etag_and_last_modified_and_honours_max_age(monkeypatch):
+    seen = []
+
+    async def etag(request):
+        seen.append(('etag', request.headers.get('If-None-Match')))
+        if request.headers.get('If-None-Match') == '"v1"':
+            return web.Response(status=304, headers={'ETag': '"v1"'})
+        return web.json_response({'version': 1}, headers={'ETag': '"v1"', 'Cache-Control': 'no-cache'})
+
+    async def modified(request):
+        seen.append(('modified', request.headers.get('If-Modified-Since')))
+        last_modified = 'Mon, 15 Jan 2024 12:00:00 GMT'
+        if request.headers.get('If-Modified-Since') == last_modified:
+            return web.Response(status=304)
+        return web.Response(text='<rss/>', headers={'Last-Modified': last_modified})
+
+    async def fresh(request):
+        seen.append(('fresh', None))
+        return web.json_response({'fresh': True}, headers={'Cache-Control': 'public, max-age=60'})
+
+    app = web.Application()
+    app.router.add_get('/etag', etag)
+    app.router.add_get('/modified', modified)
+    app.router.add_get('/fresh', fresh)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    base_url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+    cache = HTTPCache(max_entries=8)
+    monkeypatch.setattr(base, 'http_cache', cache)
+
+    parsed = []
+
+    async def parse(response):
+        parsed.append(response.status)
+        return await response.json()
+
+    try:
+        collector = RedditCollector(limit=1)
+        collector.rate_limit_key = 'http-cache-test'
+
+        first = await collector.fetch(f"{base_url}/etag", parse=parse)
+        second = await collector.fetch(f"{base_url}/etag", parse=parse)
+        assert first == second == {'version': 1}
+        assert seen == [('etag', None), ('etag', '"v1"')]
+        assert parsed == [200]  # the 304 was not parsed
+
+        assert await collector.fetch(f"{base_url}/modified", as_text=True) == '<rss/>'
+        assert await collector.fetch(f"{base_url}/modified", as_text=True) == '<rss/>'
+        assert seen[2:] == [('modified', None), ('modified', 'Mon, 15 Jan 2024 12:00:00 GMT')]
+
+        await collector.fetch(f"{base_url}/fresh")
+        assert await collector.fetch(f"{base_url}/fresh") == {'fresh': True}
+        assert seen[4:] == [('fresh', None)]  # served from cache within max-age
+
+        assert cache.get_stats() == {
+            'entries': 3, 'max_entries': 8, 'hits': 1, 'revalidated': 2, 'misses': 3
+        }
+    finally:
+        await runner.cleanup()
+
+@pytest.mark.asyncio
+async def test_reddit_paginates_listings_concurrently_and_keeps_top_posts(monkeypatch):
+    in_flight, requests = [0], []
+    max_in_flight = [0]
+
+    async def listing(request):
+        subreddit, name = request.match_info['subreddit'], request.match_info['listing']
+        requests.append((subreddit, name, request.query.get('after')))
+        in_flight[0] += 1
+        max_in_flight[0] = max(max_in_flight[0], in_flight[0])
+        await asyncio.sleep(0.01)
+        in_flight[0] -= 1
+        start = int(request.query.get('after', 't3_-1').split('_')[1]) + 1
+        end = min(start + int(request.query['limit']), 250)
+        children = [{'data': {
+            # hot and top list the same posts, so they must be deduplicated
+            'title': f'{subreddit} {n}', 'score': n + (1000 if subreddit == 'b' else 0),
+            'permalink': f'/r/{subreddit}/{n}', 'subreddit': subreddit, 'num_comments': 0,
+        }} for n in range(start, end)]
+        after = f't3_{end - 1}' if end < 250 else None
+        return web.json_response({'data': {'children': children, 'after': after}})
+
+    app = web.Application()
+    app.router.add_get('/r/{subreddit}/{listing}.json', listing)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    monkeypatch.setitem(settings.RATE_LIMITS, 'reddit-pages-test', {'rate': 1000, 'burst': 100})
+
+    try:
+        collector = RedditCollector(
+            limit=5, subreddits=['a', 'b'], listings=['hot', 'top'], posts_per_listing=250, concurrency=2
+        )
+        collector.base_url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        collector.rate_limit_key = 'reddit-pages-test'
+
+        data = await collector.collect()
+
+        assert [item['title'] for item in data] == ['b 249', 'b 248', 'b 247', 'b 246', 'b 245']
+        # 250 posts per listing: pages of 100, 100 and 50 following the cursor
+        assert len(requests) == 12
+        assert [after for sub, name, after in requests if (sub, name) == ('a', 'hot')] == [None, 't3_99', 't3_199']
+        assert max_in_flight[0] == 2
+
+        posts = [post async for post in collector.iter_posts()]
+        assert len(posts) == 1000
+    finally:
+        await runner.cleanup()
+
+@pytest.mark.asyncio
+async def test_reddit_collect_cancels_cleanly_with_more_pairs_than_concurrency(monkeypatch):
+    started = []
+
+    async def slow_fetch(self, url, **kwargs):
+        started.append(url)
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(RedditCollector, 'fetch', slow_fetch)
+    collector = RedditCollector(
+        limit=5, subreddits=[f's{n}' for n in range(6)], listings=['hot', 'new'], concurrency=2
+    )
+    before = asyncio.all_tasks()
+
+    # What a per-source timeout does, without wait_for so a hang fails instead of blocking the suite
+    collect = asyncio.ensure_future(collector.collect())
+    await asyncio.sleep(0.3)
+    collect.cancel()
+    done, _ = await asyncio.wait({collect}, timeout=1)
+    assert collect in done and collect.cancelled()
+    assert len(started) == 2  # the other pairs were waiting for the request semaphore
+    await asyncio.sleep(0)
+    assert asyncio.all_tasks() - before == set()  # no paginating task outlives the collect
+
+class _FakeTrendReq:
+    def __init__(self):
+        self.thread = threading.current_thread().name
+
+    def trending_searches(self, pn):
+        assert threading.current_thread().name.startswith('pytrends')
+        return pd.DataFrame({0: ['Cricket', 'Elections', 'Monsoon']})
+
+@pytest.mark.asyncio
+async def test_google_trends_reuses_warm_sessions_on_dedicated_executor(monkeypatch):
+    monkeypatch.setattr(google_trends, 'PYTRENDS_AVAILABLE', True)
+    built = []
+
+    def factory():
+        time.sleep(0.2)  # cookie round trip
+        built.append(_FakeTrendReq())
+        return built[-1]
+
+    pool = PyTrendsPool(size=1, workers=1, cookie_ttl=60, factory=factory)
+    await pool.warm()
+    assert built[0].thread.startswith('pytrends')
+
+    collector = GoogleTrendsCollector(limit=2, pool=pool)
+    collector.rate_limit_key = 'google-trends-test'
+    started = time.perf_counter()
+    first = await collector.collect()
+    second = await collector.collect()
+
+    assert time.perf_counter() - started < 0.2  # no bootstrap on the request path
+    assert [t['title'] for t in first] == ['Cricket', 'Elections'] and first == second
+    assert len(built) == 1
+    assert pool.get_stats()['reused'] == 2 and pool.get_stats()['cold_starts'] == 0
+    await pool.stop()
+
+@pytest.mark.asyncio
+async def test_pytrends_pool_renews_old_cookies_and_discards_failed_sessions():
+    pool = PyTrendsPool(size=2, workers=1, cookie_ttl=0.1, factory=object)
+    await pool.warm()
+    old = list(pool._idle)
+    await asyncio.sleep(0.06)  # past half the TTL
+    await pool.warm()
+    assert not set(map(id, old)) & set(map(id, pool._idle))
+
+    with pytest.raises(RuntimeError):
+        async with pool.session():
+            raise RuntimeError("429")
+    assert pool.get_stats()['idle'] == 1 and pool.get_stats()['discarded'] == 1
+    await pool.stop()
+
+@pytest.mark.asyncio
+async def test_pytrends_pool_keeps_sessions_google_answered_with_a_4xx():
+    pool = PyTrendsPool(size=1, workers=1, cookie_ttl=60, factory=object)
+    await pool.warm()
+    session = pool._idle[0][1]
+
+    for status in (429, 404):
+        with pytest.raises(ResponseError):
+            async with pool.session():
+                raise ResponseError.from_response(SimpleNamespace(status_code=status))
+    assert pool._idle[0][1] is session and pool.get_stats()['discarded'] == 0
+
+    with pytest.raises(ResponseError):
+        async with pool.session():
+            raise ResponseError.from_response(SimpleNamespace(status_code=403))  # cookie refused
+    assert pool.get_stats()['idle'] == 0 and pool.get_stats()['discarded'] == 1
+    await pool.stop()
@@ -0,0 +1,92 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from app.models import TrendingData
+from app.storage.trend_store import TrendStore
+
+
+def _snapshot(timestamp, reddit, news=None, reddit_refreshed=None, news_status=None):
+    return TrendingData(
+        google_trends=[],
+        reddit_trends=[{'title': title, 'platform': 'reddit', 'engagement_score': score} for title, score in reddit],
+        news_trends=[{'title': title, 'platform': 'news'} for title in news or []],
+        sources={
+            'reddit': {'status': 'ok', 'refreshed_at': reddit_refreshed or timestamp.isoformat()},
+            'news': news_status or {'status': 'ok', 'refreshed_at': timestamp.isoformat()},
+        },
+        timestamp=timestamp,
+    )
+
+
+class TestTrendStore:
+
+    @pytest.mark.asyncio
+    async def test_history_follows_a_topic_across_snapshots(self, tmp_path):
+        store = TrendStore(path=str(tmp_path / "trends.db"))
+        start = datetime.now() - timedelta(hours=3)
+        store.record(_snapshot(start, [('AI Tools!', 10), ('Other', 5)], news=['AI tools']))
+        store.record(_snapshot(start + timedelta(hours=1), [('Other', 50), ('ai  tools', 40)]))
+        # News re-served from its last good result: not a new observation
+        store.record(_snapshot(
+            start + timedelta(hours=2), [('AI Tools', 90)], news=['AI tools'],
+            news_status={'status': 'error', 'stale': True},
+        ))
+        assert await store.flush() == 6
+
+        points = await store.history("ai tools")
+        assert [(p['platform'], p['rank'], p['score']) for p in points] == [
+            ('reddit', 1, 10), ('news', 1, None), ('reddit', 2, 40), ('reddit', 1, 90)
+        ]
+        assert points[0]['observed_at'] == start
+
+        recent = await store.history("AI TOOLS", since=start + timedelta(minutes=30), platform="reddit")
+        assert [p['score'] for p in recent] == [40, 90]
+        assert [p['score'] for p in await store.history("ai tools", limit=2)] == [40, 90]
+        await store.close()
+
+    @pytest.mark.asyncio
+    async def test_sources_republished_unchanged_are_not_recorded_twice(self, tmp_path):
+        store = TrendStore(path=str(tmp_path / "trends.db"))
+        first = datetime.now()
+        store.record(_snapshot(first, [('Topic', 1)]))
+        # Only news refreshed; reddit carries its earlier refreshed_at
+        store.record(_snapshot(first + timedelta(minutes=5), [('Topic', 1)], reddit_refreshed=first.isoformat()))
+        await store.flush()
+        assert len(await store.history("topic")) == 1
+        await store.close()
+
+    @pytest.mark.asyncio
+    async def test_history_query_uses_title_time_index(self, tmp_path):
+        store = TrendStore(path=str(tmp_path / "trends.db"))
+        plan = await store._db.run(lambda conn: conn.execute(
+            "EXPLAIN QUERY PLAN SELECT observed_at FROM trend_observations"
+            " WHERE title_key = ? AND observed_at >= ? AND observed_at <= ? ORDER BY observed_at DESC LIMIT 10",
+            ("x", 0, 1),
+        ).fetchall())
+        assert "idx_trend_title_time" in " ".join(str(step) for step in plan)
+        await store.close()
+
+    @pytest.mark.asyncio
+    async def test_background_writer_batches_and_stop_flushes(self, tmp_path):
+        store = TrendStore(path=str(tmp_path / "trends.db"), batch_size=2, flush_interval=60)
+        store.start()
+        now = datetime.now() - timedelta(minutes=5)
+        store.record(_snapshot(now, [('a', 1), ('b', 2)]))
+        for _ in range(50):
+            if store.get_stats()['written']:
+                break
+            await asyncio.sleep(0.01)
+        # A full batch woke the writer without waiting for the interval
+        assert store.get_stats()['written'] == 2
+
+        store.record(_snapshot(now + timedelta(minutes=1), [('c', 3)]))
+        await store.stop()
+        assert store.get_stats()['pending'] == 0
+        assert len(await store.history("c")) == 1
+        await store.close()
+
+    def test_backlog_is_bounded(self, tmp_path):
+        store = TrendStore(path=str(tmp_path / "trends.db"), max_pending=3)
+        store.record(_snapshot(datetime.now(), [(f't{n}', n) for n in range(5)]))
+        assert store.get_stats()['pending'] == 3
+        assert store.get_stats()['dropped'] == 2
@@ -0,0 +1,172 @@
+import asyncio
+import time
+import pytest
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from app.utils.circuit_breaker import CircuitBreaker
+from app.utils.exceptions import CircuitOpenError, RateLimitError
+from app.utils.helper import clean_text, extract_keywords, extract_keywords_batch
+from app.utils.rate_limit import RateLimiter, parse_retry_after
+from app.utils.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        runs = 0
+
+        async def refresh():
+            nonlocal runs
+            runs += 1
+            await asyncio.sleep(0.05)
+            return "fresh"
+
+        results = await asyncio.gather(*(flight.do("trending", refresh) for _ in range(10)))
+
+        assert results == ["fresh"] * 10
+        assert runs == 1
+        assert flight.get_stats() == {"calls": 10, "executions": 1, "coalesced": 9, "in_flight": 0}
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_waiter_and_key_is_released(self):
+        flight = SingleFlight()
+
+        async def broken():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        results = await asyncio.gather(*(flight.do("k", broken) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert not flight.in_flight("k")
+
+        async def ok():
+            return 1
+
+        assert await flight.do("k", ok) == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_shared_work(self):
+        flight = SingleFlight()
+
+        async def slow():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        first = asyncio.ensure_future(flight.do("k", slow))
+        second = asyncio.ensure_future(flight.do("k", slow))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        assert await second == "done"
+
+
+class TestRateLimiter:
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_are_paced(self):
+        limiter = RateLimiter("t", rate=50, burst=2)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        finished = []
+
+        async def call():
+            await limiter.acquire()
+            finished.append(loop.time() - started)
+
+        await asyncio.gather(*(call() for _ in range(6)))
+
+        # Two from the burst, then one every 20 ms
+        assert sorted(finished)[1] < 0.01
+        assert 0.07 <= max(finished) < 0.15
+
+    @pytest.mark.asyncio
+    async def test_throttling_backs_off_and_recovers(self):
+        limiter = RateLimiter("t", rate=10, burst=5)
+
+        delay = limiter.penalize(retry_after=0.05)
+        assert 0.05 <= delay <= 0.05 + limiter.base_backoff
+        assert limiter.rate == 5
+
+        with pytest.raises(RateLimitError) as exc:
+            await limiter.acquire(max_wait=0.01)
+        assert exc.value.retry_after >= 1
+
+        for _ in range(20):
+            limiter.record_success()
+        assert limiter.rate == 10
+
+    def test_backoff_without_retry_after_grows_with_jitter(self):
+        limiter = RateLimiter("t", rate=1, base_backoff=1, max_backoff=4)
+        delays = [limiter.penalize() for _ in range(4)]
+        assert 0.5 <= delays[0] <= 1
+        assert 1 <= delays[1] <= 2
+        assert 2 <= delays[3] <= 4
+
+    def test_parse_retry_after(self):
+        assert parse_retry_after("7") == 7.0
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("soon") is None
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+        future = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+        assert 25 < parse_retry_after(future) <= 30
+
+
+class TestCircuitBreaker:
+
+    def test_opens_on_failure_rate_then_probes_after_cooldown(self):
+        breaker = CircuitBreaker("t", failure_threshold=0.5, window=4, min_calls=4, cooldown=0.05)
+        for failed in (False, True, False):
+            breaker.allow()
+            breaker.record_failure() if failed else breaker.record_success()
+        assert breaker.state == "closed"
+
+        breaker.allow()
+        breaker.record_failure()  # 2 of 4 failed
+        assert breaker.state == "open"
+        with pytest.raises(CircuitOpenError):
+            breaker.allow()
+
+        time.sleep(0.06)
+        breaker.allow()  # the half-open probe
+        assert breaker.state == "half_open"
+        with pytest.raises(CircuitOpenError):
+            breaker.allow()  # only one probe at a time
+        breaker.record_success()
+        assert breaker.state == "closed" and breaker.failure_rate == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_probe_reopens(self):
+        breaker = CircuitBreaker("t", window=2, min_calls=1, cooldown=0.02)
+
+        async def down():
+            raise RuntimeError("down")
+
+        with pytest.raises(RuntimeError):
+            await breaker.call(down)
+        assert breaker.state == "open"
+
+        await asyncio.sleep(0.03)
+        with pytest.raises(RuntimeError):
+            await breaker.call(down)
+        assert breaker.state == "open" and breaker.opens == 2
+        assert breaker.retry_in() > 0
+
+
+class TestKeywords:
+
+    def test_clean_text(self):
+        assert clean_text("  Breaking:\n\tAI   beats (humans)!  ") == "Breaking AI beats humans!"
+        assert clean_text("") == ""
+
+    def test_extract_keywords_drops_stop_words_short_words_and_punctuation(self):
+        assert extract_keywords("The Future of AI-powered Search, explained!") == ["future", "powered", "search", "explained"]
+        assert len(extract_keywords(" ".join(f"word{i}" for i in range(30)))) == 10
+
+    def test_batch_matches_single_calls(self):
+        texts = ["Taylor Swift's new album", "UK 5G rollout", None, "the and of"]
+        assert extract_keywords_batch(texts, min_length=2) == [
+            ["taylor", "swift", "new", "album"], ["uk", "5g", "rollout"], [], []
+        ]
+        assert extract_keywords_batch(texts[:2]) == [extract_keywords(t) for t in texts[:2]]